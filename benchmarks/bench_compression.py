@@ -0,0 +1,73 @@
+# Compare file size against save and load time for compression policies.
+# Run with: python benchmarks/bench_compression.py
+#
+# Objects hold a compressible payload (repeated values) and an
+# incompressible one (random noise), as pickled object data and as
+# compute data.
+
+import argparse
+import os
+import tempfile
+import time
+import dryml
+from bench_objects import PayloadObject
+
+
+policies = {
+    'stored': dryml.CompressionPolicy('stored'),
+    'deflated': dryml.CompressionPolicy('deflated'),
+    'deflated-meta-data': dryml.CompressionPolicy(
+        'deflated', compute='stored', object='stored'),
+    'deflated-fast': dryml.CompressionPolicy(('deflated', 1)),
+    'bzip2': dryml.CompressionPolicy('bzip2'),
+    'lzma': dryml.CompressionPolicy('lzma'),
+}
+
+
+def make_object(size, noise):
+    obj = PayloadObject(size=size, noise=noise)
+    with dryml.context.ContextManager({'default': {}}):
+        obj.compute_activate()
+    return obj
+
+
+def bench_policy(obj, policy, directory, repeats):
+    filepath = os.path.join(directory, 'bench.dry')
+    save_times = []
+    load_times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        obj.save_self(filepath, compression=policy)
+        save_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        new_obj = dryml.load_object(filepath)
+        with dryml.context.ContextManager({'default': {}}):
+            new_obj.compute_activate()
+        load_times.append(time.perf_counter() - start)
+        del new_obj
+    return os.path.getsize(filepath), min(save_times), min(load_times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size', type=int, default=1000000,
+                        help="Number of float32 values in each payload")
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'payload':<8} {'policy':<20} {'size (MB)':>10} "
+          f"{'save (s)':>9} {'load (s)':>9}")
+    with tempfile.TemporaryDirectory() as directory:
+        for noise in [False, True]:
+            obj = make_object(args.size, noise)
+            payload = 'noise' if noise else 'zeros'
+            for name, policy in policies.items():
+                size, save_time, load_time = bench_policy(
+                    obj, policy, directory, args.repeats)
+                print(f"{payload:<8} {name:<20} {size/1e6:>10.2f} "
+                      f"{save_time:>9.4f} {load_time:>9.4f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+# Objects used by the benchmarks. They're kept in their own module, since
+# classes defined in __main__ can't be reloaded from saved files.
+
+import pickle
+import zipfile
+import numpy as np
+import dryml
+
+
+class PayloadObject(dryml.Object):
+    def __init__(self, size=1000000, noise=False):
+        if noise:
+            rng = np.random.default_rng(0)
+            self.payload = rng.random(size, dtype=np.float32)
+        else:
+            self.payload = np.zeros(size, dtype=np.float32)
+        self.weights = self.payload.copy()
+
+    def save_object_imp(self, file: zipfile.ZipFile):
+        with file.open('payload.pkl', 'w') as f:
+            f.write(dryml.utils.pickler(self.payload))
+        return True
+
+    def load_object_imp(self, file: zipfile.ZipFile):
+        with file.open('payload.pkl', 'r') as f:
+            self.payload = pickle.loads(f.read())
+        return True
+
+    def save_compute_imp(self, file: zipfile.ZipFile) -> bool:
+        with file.open('weights.npy', 'w') as f:
+            np.save(f, self.weights)
+        return True
+
+    def load_compute_imp(self, file: zipfile.ZipFile) -> bool:
+        with file.open('weights.npy', 'r') as f:
+            self.weights = np.load(f)
+        return True
+
+
+class ConfigObject(dryml.Object):
+    "Holds only scalar and list arguments"
+
+    @dryml.Meta.collect_kwargs
+    def __init__(self, **kwargs):
+        pass
+
+
+class NodeObject(dryml.Object):
+    "A node of an object tree"
+
+    def __init__(self, children=[], value=0):
+        self.children = children
+        self.value = value
+
+
+class LeafNodeObject(NodeObject):
+    "A node with a deeper class hierarchy and a positional argument"
+
+    def __init__(self, name, children=[], scale=1., **kwargs):
+        self.name = name
+        self.scale = scale
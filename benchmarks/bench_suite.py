@@ -0,0 +1,347 @@
+# Timings of the serialization hot paths, and of other paths run once per
+# object or element. Run with: python benchmarks/bench_suite.py
+#
+# Everything runs offline on synthetic objects. Suites follow the asv
+# layout (params, setup, teardown and time_* methods), so they can also
+# be collected by asv. The runner here reports the best time of each
+# benchmark over several rounds.
+
+import argparse
+import atexit
+import os
+import re
+import shutil
+import tempfile
+import timeit
+import numpy as np
+import dryml
+from dryml.data import NumpyDataset
+from dryml.file_intermediary import FileIntermediary
+from bench_objects import ConfigObject, NodeObject, LeafNodeObject
+
+
+def make_flat_object(num_values=200):
+    kwargs = {}
+    for i in range(num_values):
+        kwargs[f"value_{i}"] = [i, float(i), str(i)]
+    return ConfigObject(**kwargs)
+
+
+def make_tree(depth, fanout, value=0):
+    if depth == 0:
+        return NodeObject(value=value)
+    children = [
+        make_tree(depth-1, fanout, value=value*fanout+i)
+        for i in range(fanout)]
+    return NodeObject(children=children, value=value)
+
+
+def make_object(shape):
+    if shape == 'flat':
+        return make_flat_object()
+    elif shape == 'nested':
+        # 121 objects
+        return make_tree(4, 3)
+    elif shape == 'deep':
+        # A chain of 30 objects
+        return make_tree(30, 1)
+    elif shape == 'collection':
+        # A list of 50 tuples of 3 objects
+        return dryml.List(*[
+            dryml.Tuple(*[NodeObject(value=i*3+j) for j in range(3)])
+            for i in range(50)])
+    raise ValueError(f"Unknown object shape {shape}")
+
+
+_repo_directories = {}
+
+
+def repo_directory(num_objects):
+    "Get a directory holding num_objects saved objects, shared by suites"
+    if num_objects not in _repo_directories:
+        directory = tempfile.mkdtemp(prefix='dryml-bench-repo-')
+        atexit.register(shutil.rmtree, directory, True)
+        for i in range(num_objects):
+            obj = ConfigObject(lr=float(i % 10), layers=[i % 7, 32])
+            obj.save_self(os.path.join(directory, f"{i:06d}.dry"))
+        _repo_directories[num_objects] = directory
+    return _repo_directories[num_objects]
+
+
+class SaveLoadSuite:
+    params = ['flat', 'nested', 'deep']
+    param_names = ['shape']
+
+    def setup(self, shape):
+        self.directory = tempfile.mkdtemp(prefix='dryml-bench-')
+        self.obj = make_object(shape)
+        self.filepath = os.path.join(self.directory, 'obj.dry')
+        self.obj.save_self(self.filepath)
+
+    def teardown(self, shape):
+        shutil.rmtree(self.directory)
+
+    def time_save(self, shape):
+        self.obj.save_self(self.filepath)
+
+    def time_save_to_buffer(self, shape):
+        buffer = FileIntermediary()
+        dryml.save_object(self.obj, buffer)
+        buffer.close()
+
+    def time_load(self, shape):
+        dryml.load_object(self.filepath)
+
+    def time_load_definition(self, shape):
+        dryml.load_definition(self.filepath)
+
+
+class DefinitionSuite:
+    params = ['flat', 'nested', 'deep', 'collection']
+    param_names = ['shape']
+
+    def setup(self, shape):
+        self.obj = make_object(shape)
+        self.obj_def = self.obj.definition()
+
+    def time_definition(self, shape):
+        self.obj.definition()
+
+    def time_get_hash_str(self, shape):
+        self.obj_def.get_hash_str()
+
+    def time_individual_id(self, shape):
+        self.obj_def.get_individual_id()
+
+    def time_individual_id_cold(self, shape):
+        # Drops the memoized hash of the top level definition
+        self.obj_def.invalidate_hash()
+        self.obj_def.get_individual_id()
+
+    def time_category_id(self, shape):
+        self.obj_def.get_category_id()
+
+    def time_build(self, shape):
+        self.obj_def.build()
+
+
+class ConstructionSuite:
+    params = ['flat', 'nested', 'subclass']
+    param_names = ['shape']
+
+    def setup(self, shape):
+        self.children = [NodeObject(value=i) for i in range(3)]
+        self.kwargs = {f"value_{i}": [i, float(i)] for i in range(10)}
+
+    def time_construct(self, shape):
+        if shape == 'flat':
+            ConfigObject(**self.kwargs)
+        elif shape == 'nested':
+            NodeObject(children=self.children, value=1)
+        else:
+            LeafNodeObject('leaf', children=self.children, value=1, scale=2.)
+
+
+class RepoScanSuite:
+    params = [1000, 10000, 100000]
+    param_names = ['num_objects']
+
+    def setup(self, num_objects):
+        self.directory = repo_directory(num_objects)
+        self.index_directory = tempfile.mkdtemp(prefix='dryml-bench-index-')
+        for filename in os.listdir(self.directory):
+            os.symlink(os.path.join(self.directory, filename),
+                       os.path.join(self.index_directory, filename))
+        # Build the index once so scans only check it
+        dryml.Repo(self.index_directory, use_index=True).index.close()
+
+    def teardown(self, num_objects):
+        shutil.rmtree(self.index_directory)
+
+    def time_scan(self, num_objects):
+        dryml.Repo(self.directory)
+
+    def time_scan_indexed(self, num_objects):
+        dryml.Repo(self.index_directory, use_index=True).index.close()
+
+
+class SelectorSuite:
+    params = [1000, 10000]
+    param_names = ['num_defs']
+
+    def setup(self, num_defs):
+        self.defs = [
+            ConfigObject(lr=float(i % 10), layers=[i % 7, 32]).definition()
+            for i in range(num_defs)]
+        self.kwarg_sel = dryml.Selector(ConfigObject, kwargs={'lr': 3.})
+        self.def_sel = dryml.Selector.build(self.defs[len(self.defs)//2])
+
+    def time_match_kwargs(self, num_defs):
+        for obj_def in self.defs:
+            self.kwarg_sel(obj_def)
+
+    def time_match_definition(self, num_defs):
+        for obj_def in self.defs:
+            self.def_sel(obj_def)
+
+
+class NumpyDatasetSuite:
+    params = [10000, 100000]
+    param_names = ['num_elements']
+
+    def setup(self, num_elements):
+        rng = np.random.default_rng(0)
+        X = rng.random((num_elements, 32), dtype=np.float32)
+        Y = rng.random((num_elements, 1), dtype=np.float32)
+        self.dataset = NumpyDataset((X, Y), supervised=True)
+        self.unbatched = self.dataset.unbatch()
+        self.rebatched = self.unbatched.batch(batch_size=32)
+        # Not backed by arrays, elements are batched one at a time
+        self.streamed = NumpyDataset(lambda: zip(X, Y), supervised=True)
+
+    def time_unbatch(self, num_elements):
+        for _ in self.dataset.unbatch():
+            pass
+
+    def time_batch(self, num_elements):
+        for _ in self.unbatched.batch(batch_size=32):
+            pass
+
+    def time_batch_streamed(self, num_elements):
+        for _ in self.streamed.batch(batch_size=32):
+            pass
+
+    def time_rebatch(self, num_elements):
+        for _ in self.rebatched.unbatch():
+            pass
+
+    def time_rebatch_batched(self, num_elements):
+        for _ in self.rebatched.batch(batch_size=100):
+            pass
+
+    def time_count(self, num_elements):
+        self.unbatched.count()
+
+    def time_getitem_1000(self, num_elements):
+        for i in range(0, num_elements, num_elements//1000):
+            self.unbatched[i]
+
+    def time_skip_take(self, num_elements):
+        for _ in self.rebatched.skip(num_elements//64).take(10):
+            pass
+
+    def time_shuffle(self, num_elements):
+        for _ in self.unbatched.shuffle(1000, seed=0):
+            pass
+
+    def time_shuffle_full(self, num_elements):
+        for _ in self.streamed.shuffle(None, seed=0):
+            pass
+
+    def time_shuffle_permuted(self, num_elements):
+        for _ in self.dataset.shuffle(None, seed=0).batch(batch_size=32):
+            pass
+
+
+class NpyDatasetSuite:
+    params = [100000, 1000000]
+    param_names = ['num_elements']
+
+    def setup(self, num_elements):
+        self.directory = tempfile.mkdtemp(prefix='dryml-bench-npy-')
+        x_dir = os.path.join(self.directory, 'x')
+        os.mkdir(x_dir)
+        rng = np.random.default_rng(0)
+        # Shards of 100000 rows
+        for i, start in enumerate(range(0, num_elements, 100000)):
+            num_rows = min(100000, num_elements-start)
+            np.save(os.path.join(x_dir, f"{i:04d}.npy"),
+                    rng.random((num_rows, 32), dtype=np.float32))
+        y_path = os.path.join(self.directory, 'y.npy')
+        np.save(y_path, rng.random((num_elements, 1), dtype=np.float32))
+        self.dataset = dryml.data.RandomAccessDataset.from_npy(
+            (x_dir, y_path), supervised=True)
+
+    def teardown(self, num_elements):
+        shutil.rmtree(self.directory)
+
+    def time_batch(self, num_elements):
+        for _ in self.dataset.batch(batch_size=256):
+            pass
+
+    def time_shuffle_chunks(self, num_elements):
+        for _ in self.dataset.shuffle_chunks(8192, seed=0) \
+                             .batch(batch_size=256):
+            pass
+
+    def time_shuffle_permuted(self, num_elements):
+        for _ in self.dataset.shuffle(None, seed=0).batch(batch_size=256):
+            pass
+
+
+suites = [
+    SaveLoadSuite,
+    DefinitionSuite,
+    ConstructionSuite,
+    RepoScanSuite,
+    SelectorSuite,
+    NumpyDatasetSuite,
+    NpyDatasetSuite,
+]
+
+
+def bench(suite_cls, param, method_name, rounds, min_time):
+    "Get the best time of a single call of a benchmark method"
+    suite = suite_cls()
+    if hasattr(suite, 'setup'):
+        suite.setup(param)
+    try:
+        method = getattr(suite, method_name)
+        timer = timeit.Timer(lambda: method(param))
+        # Run enough calls per round to reach min_time
+        number, total = timer.autorange()
+        number = max(1, int(min_time * number / total))
+        return min(timer.repeat(repeat=rounds, number=number)) / number
+    finally:
+        if hasattr(suite, 'teardown'):
+            suite.teardown(param)
+
+
+def format_time(seconds):
+    for unit, scale in [('s', 1.), ('ms', 1e-3), ('us', 1e-6)]:
+        if seconds >= scale:
+            return f"{seconds/scale:.3f} {unit}"
+    return f"{seconds/1e-9:.1f} ns"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--filter', type=str, default=None,
+                        help="Only run benchmarks whose name matches")
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--min-time', type=float, default=0.2,
+                        help="Minimum time of each round in seconds")
+    parser.add_argument('--quick', action='store_true',
+                        help="Only run the first parameter of each suite")
+    args = parser.parse_args()
+
+    name_re = re.compile(args.filter) if args.filter is not None else None
+    print(f"{'benchmark':<50} {'param':>10} {'time':>12}")
+    for suite_cls in suites:
+        method_names = sorted(
+            n for n in dir(suite_cls) if n.startswith('time_'))
+        params = suite_cls.params
+        if args.quick:
+            params = params[:1]
+        for method_name in method_names:
+            name = f"{suite_cls.__name__}.{method_name}"
+            if name_re is not None and name_re.search(name) is None:
+                continue
+            for param in params:
+                best = bench(suite_cls, param, method_name,
+                             args.rounds, args.min_time)
+                print(f"{name:<50} {param!s:>10} {format_time(best):>12}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,24 @@
+import argparse
+import os
+from dryml.checkpoint import compact_checkpoint, list_deltas
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        "Fold the deltas of incremental dry checkpoints into single files.")
+    parser.add_argument(
+        "input", nargs='+',
+        help="The filepaths of the checkpoint base dry files", type=str)
+    parser.add_argument(
+        "--compression", type=str, default=None,
+        help="Compression of the compacted files, for instance 'deflated'")
+    args = parser.parse_args()
+
+    for file_path in args.input:
+        if not os.path.exists(file_path):
+            print(f"File {file_path} doesn't exist.")
+            continue
+
+        num_deltas = len(list_deltas(file_path))
+        compact_checkpoint(file_path, compression=args.compression)
+        print(f"{file_path}: folded {num_deltas} deltas")
@@ -55,9 +55,11 @@ def draw_tree(trees):
 file_blocklist = [
    'meta_data.pkl',
    'cls_def.dill',
+   'cls_def.ref',
    'dry_args.pkl',
    'dry_kwargs.pkl',
    'dry_mut.pkl',
+   'manifest.pkl',
 ]
 
 
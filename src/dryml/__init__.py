@@ -8,6 +8,12 @@ from dryml.object import Object, ObjectFile, ObjectFactory, \
     build_obj_tree
 from dryml.selector import Selector
 from dryml.repo import Repo
+from dryml.blob_store import BlobStore
+from dryml.compression import CompressionPolicy
+from dryml.background_save import save_object_async, wait_for_saves
+from dryml.checkpoint import Checkpointer, load_checkpoint, \
+    compact_checkpoint
+from dryml.partial_load import load_definition, load_sub_object
 from dryml.collections import List, Tuple, Dict
 from dryml.workshop import Workshop
 from dryml.context import compute_context, compute
@@ -23,6 +29,9 @@ __all__ = [
     ObjectFactory,
     Selector,
     Repo,
+    BlobStore,
+    CompressionPolicy,
+    Checkpointer,
     List,
     Tuple,
     Dict,
@@ -31,6 +40,12 @@ __all__ = [
     Workshop,
     load_object,
     save_object,
+    save_object_async,
+    wait_for_saves,
+    load_checkpoint,
+    compact_checkpoint,
+    load_definition,
+    load_sub_object,
     change_object_cls,
     context,
     IncompleteDefinitionError,
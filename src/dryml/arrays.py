@@ -0,0 +1,135 @@
+# Store numpy arrays as .npy zip members.
+#
+# Arrays pickled into a member are copied into the pickle stream when
+# saved, and out of it again when loaded. Arrays stored as their own
+# uncompressed .npy members can instead be memory mapped in place when
+# the .dry file is on disk, so large lookup tables and statistics aren't
+# read until they're used.
+
+import io
+import pickle
+import zipfile
+import numpy as np
+from dryml.file_intermediary import zip_member_segment
+
+
+# Arrays smaller than this are left in the pickle stream
+min_member_bytes = 64*1024
+
+
+def is_array_member(val) -> bool:
+    "Whether a value is pickled as a separate .npy member"
+    return type(val) in (np.ndarray, np.memmap) and \
+        not val.dtype.hasobject and \
+        val.nbytes >= min_member_bytes
+
+
+def save_array(zf: zipfile.ZipFile, name: str, array: np.ndarray):
+    "Write an array to a zipfile as a .npy member"
+    array = np.asanyarray(array)
+    if array.dtype.hasobject:
+        raise TypeError(
+            f"Array {name} holds python objects, which can't be stored "
+            "as a .npy member.")
+    force_zip64 = array.nbytes + 4096 > zipfile.ZIP64_LIMIT
+    with zf.open(name, 'w', force_zip64=force_zip64) as f:
+        np.lib.format.write_array(f, array, allow_pickle=False)
+
+
+def _map_array(zf: zipfile.ZipFile, name: str):
+    "Memory map a stored .npy member, or return None if it can't be"
+    segment = zip_member_segment(zf, name)
+    if segment is None:
+        return None
+
+    try:
+        version = np.lib.format.read_magic(segment)
+        if version == (1, 0):
+            header = np.lib.format.read_array_header_1_0(segment)
+        elif version == (2, 0):
+            header = np.lib.format.read_array_header_2_0(segment)
+        else:
+            return None
+        data_offset = segment.offset + segment.tell()
+        filepath = segment.filepath
+    finally:
+        segment.close()
+
+    shape, fortran_order, dtype = header
+    if dtype.hasobject:
+        return None
+    if np.prod(shape) == 0:
+        # Empty files can't be mapped
+        return np.empty(shape, dtype=dtype)
+    array = np.memmap(
+        filepath, dtype=dtype, mode='r', offset=data_offset, shape=shape,
+        order='F' if fortran_order else 'C')
+    # A plain ndarray view keeps the mapping alive
+    return array.view(np.ndarray)
+
+
+def load_array(zf: zipfile.ZipFile, name: str,
+               mmap: bool = True) -> np.ndarray:
+    """
+    Load a .npy member of a zipfile.
+
+    mmap: Map the array in place, without copying it, when the member is
+        stored uncompressed in a file on disk. Mapped arrays are read-only.
+    """
+    if mmap:
+        array = _map_array(zf, name)
+        if array is not None:
+            return array
+    with zf.open(name, 'r') as f:
+        return np.lib.format.read_array(f, allow_pickle=False)
+
+
+class ArrayPickler(pickle.Pickler):
+    "Pickles large arrays as separate .npy members of a zipfile"
+
+    def __init__(self, file, zf: zipfile.ZipFile, prefix: str, **kwargs):
+        super().__init__(file, **kwargs)
+        self.zf = zf
+        self.prefix = prefix
+        self.names = {}
+
+    def persistent_id(self, val):
+        if not is_array_member(val):
+            return None
+        name = self.names.get(id(val), None)
+        if name is None:
+            name = f"{self.prefix}{len(self.names)}.npy"
+            save_array(self.zf, name, val)
+            self.names[id(val)] = name
+        return ('npy', name)
+
+
+class ArrayUnpickler(pickle.Unpickler):
+    "Unpickles data written by ArrayPickler"
+
+    def __init__(self, file, zf: zipfile.ZipFile, mmap: bool = True,
+                 **kwargs):
+        super().__init__(file, **kwargs)
+        self.zf = zf
+        self.mmap = mmap
+
+    def persistent_load(self, pid):
+        kind, name = pid
+        if kind != 'npy':
+            raise pickle.UnpicklingError(f"Unknown persistent id {pid}")
+        return load_array(self.zf, name, mmap=self.mmap)
+
+
+def dump_with_arrays(obj, zf: zipfile.ZipFile, prefix: str) -> bytes:
+    """
+    Pickle a value, writing the large arrays it holds to the zipfile as
+    .npy members named {prefix}{n}.npy. Load it with load_with_arrays.
+    """
+    buffer = io.BytesIO()
+    ArrayPickler(buffer, zf, prefix, protocol=4).dump(obj)
+    return buffer.getvalue()
+
+
+def load_with_arrays(data: bytes, zf: zipfile.ZipFile, mmap: bool = True):
+    "Unpickle a value pickled with dump_with_arrays"
+    return ArrayUnpickler(io.BytesIO(data), zf, mmap=mmap).load()
@@ -0,0 +1,94 @@
+# Saving objects on a background thread.
+#
+# Compute data is captured synchronously, so objects can keep training
+# while their zip files are assembled and written in the background.
+# Saves run one at a time in submission order, so later saves of a file
+# always win.
+
+import atexit
+import threading
+import concurrent.futures
+from typing import Optional
+from dryml.object import Object, FileType, save_object
+from dryml.save_cache import SaveCache
+
+
+class BackgroundSaver(object):
+    """
+    Runs saves on a single background thread, keeping track of the saves
+    which haven't completed yet.
+    """
+
+    def __init__(self):
+        self._executor = None
+        self._lock = threading.Lock()
+        self._pending = set()
+
+    def submit(self, func, *args, **kwargs) -> concurrent.futures.Future:
+        with self._lock:
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix='dryml-save')
+            future = self._executor.submit(func, *args, **kwargs)
+            self._pending.add(future)
+        future.add_done_callback(self._done)
+        return future
+
+    def _done(self, future):
+        with self._lock:
+            self._pending.discard(future)
+
+    def pending(self) -> int:
+        "Number of saves which haven't completed"
+        with self._lock:
+            return len(self._pending)
+
+    def wait(self, timeout: Optional[float] = None):
+        """
+        Wait for all pending saves. Raises the error of the first failed
+        save, if any.
+        """
+        with self._lock:
+            futures = list(self._pending)
+        done, not_done = concurrent.futures.wait(futures, timeout=timeout)
+        if len(not_done) > 0:
+            raise TimeoutError(
+                f"{len(not_done)} saves didn't complete within {timeout}s")
+        for future in futures:
+            future.result()
+
+    def shutdown(self):
+        "Complete pending saves and stop the background thread"
+        with self._lock:
+            executor = self._executor
+            self._executor = None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+background_saver = BackgroundSaver()
+atexit.register(background_saver.shutdown)
+
+
+def save_object_async(obj: Object, file: FileType,
+                      save_cache: Optional[SaveCache] = None,
+                      **kwargs) -> concurrent.futures.Future:
+    """
+    Save an object on a background thread. Takes the same arguments as
+    save_object, and returns a future of its result.
+
+    The compute data of the object and its contained objects is captured
+    before returning. Other content is read by the background thread, so
+    the object shouldn't otherwise be modified, saved or have its compute
+    loaded until the save completes.
+    """
+    if save_cache is None:
+        save_cache = SaveCache()
+    save_cache.snapshot_compute(obj)
+    return background_saver.submit(
+        save_object, obj, file, save_cache=save_cache, **kwargs)
+
+
+def wait_for_saves(timeout: Optional[float] = None):
+    "Wait for all pending background saves to complete"
+    background_saver.wait(timeout=timeout)
@@ -0,0 +1,121 @@
+import os
+import hashlib
+import tempfile
+import zipfile
+from typing import Optional
+from dryml.file_intermediary import FileSegment, COPY_CHUNK_SIZE
+
+
+# Name of the blob directory within a repository directory
+blob_dir_name = 'blobs'
+
+
+class BlobStore(object):
+    """
+    A content addressed store of immutable binary blobs.
+
+    Blobs are stored once under the sha256 digest of their content,
+    so identical payloads saved by many objects share a single file.
+    """
+
+    @staticmethod
+    def for_directory(directory: str, create: bool = True):
+        "Get the blob store belonging to a repository directory"
+        return BlobStore(
+            os.path.join(directory, blob_dir_name), create=create)
+
+    @staticmethod
+    def find_for_file(filepath: str) -> Optional['BlobStore']:
+        "Find the blob store next to a saved file, if there is one"
+        directory = os.path.join(
+            os.path.dirname(os.path.abspath(filepath)), blob_dir_name)
+        if not os.path.isdir(directory):
+            return None
+        return BlobStore(directory, create=False)
+
+    def __init__(self, directory: str, create: bool = True):
+        if not os.path.exists(directory):
+            if create:
+                os.makedirs(directory)
+            else:
+                raise ValueError(f"Blob directory {directory} doesn't exist!")
+        self.directory = directory
+
+    def __repr__(self):
+        return f"BlobStore({self.directory})"
+
+    def __eq__(self, other):
+        if not isinstance(other, BlobStore):
+            return False
+        return os.path.realpath(self.directory) == \
+            os.path.realpath(other.directory)
+
+    def __contains__(self, digest: str):
+        return os.path.exists(self.path(digest))
+
+    def path(self, digest: str) -> str:
+        return os.path.join(self.directory, digest[:2], digest)
+
+    def put(self, file) -> str:
+        """
+        Store the content of a readable file, returning its digest.
+        Content already present in the store isn't written again.
+        """
+        file.seek(0)
+        m = hashlib.sha256()
+        # Hash while copying to a temporary file within the store, so
+        # the final move is an atomic rename.
+        tmp_f = tempfile.NamedTemporaryFile(
+            mode='wb', dir=self.directory, delete=False)
+        try:
+            with tmp_f:
+                while True:
+                    chunk = file.read(COPY_CHUNK_SIZE)
+                    if len(chunk) == 0:
+                        break
+                    m.update(chunk)
+                    tmp_f.write(chunk)
+
+            digest = m.hexdigest()
+            target_path = self.path(digest)
+            if os.path.exists(target_path):
+                os.remove(tmp_f.name)
+            else:
+                os.makedirs(os.path.dirname(target_path), exist_ok=True)
+                os.replace(tmp_f.name, target_path)
+        except Exception as e:
+            if os.path.exists(tmp_f.name):
+                os.remove(tmp_f.name)
+            raise e
+
+        return digest
+
+    def open(self, digest: str) -> FileSegment:
+        "Open a blob for reading. Nothing is read until it's accessed."
+        path = self.path(digest)
+        if not os.path.exists(path):
+            raise KeyError(f"Blob {digest} not found in {self}")
+        return FileSegment(path, 0, os.path.getsize(path))
+
+
+def write_blob_ref(zf: zipfile.ZipFile, name: str, digest: str):
+    "Write a reference to a blob as a member of a zipfile"
+    with zf.open(name, mode='w') as f:
+        f.write(digest.encode('utf-8'))
+
+
+def read_blob_ref(zf: zipfile.ZipFile, name: str) -> str:
+    "Read a blob reference member from a zipfile"
+    with zf.open(name, mode='r') as f:
+        return f.read().decode('utf-8')
+
+
+def open_blob_ref(zf: zipfile.ZipFile, name: str,
+                  blob_store: Optional[BlobStore]) -> FileSegment:
+    "Open the blob referenced by a member of a zipfile"
+    digest = read_blob_ref(zf, name)
+    if blob_store is None:
+        raise RuntimeError(
+            f"Member {name} references blob {digest}, but no blob "
+            "store is available to resolve it.")
+    return blob_store.open(digest)
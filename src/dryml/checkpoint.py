@@ -0,0 +1,417 @@
+# Incremental checkpoints of objects.
+#
+# A checkpoint is a regular .dry file, the base, along with an append-only
+# series of deltas kept in a directory next to it. Each delta holds the
+# content (compute data and save_object_imp members) of the objects which
+# changed since the previous checkpoint, and references the definitions
+# and unchanged objects in the base. Compaction folds the deltas back
+# into a single .dry file.
+
+import os
+import re
+import shutil
+import uuid
+import pickle
+import hashlib
+import zipfile
+from typing import Optional, Union, Tuple, Dict
+from dryml.object import Object, load_object, save_object, \
+    file_resolve
+from dryml.blob_store import BlobStore
+from dryml.compression import CompressionPolicy, CompressionType
+from dryml.file_intermediary import FileIntermediary, FileSegment, \
+    open_zip_member, COPY_CHUNK_SIZE
+from dryml.utils import ReproducibleZipFile, pickler
+
+
+delta_re = re.compile(r"^([0-9]{8})\.delta$")
+delta_header_name = 'delta.pkl'
+
+
+def delta_directory(filepath: str) -> str:
+    "Get the directory holding the deltas of a checkpoint"
+    return f"{file_resolve(filepath)}.deltas"
+
+
+def base_token(filepath: str) -> str:
+    """
+    Identify the content of a base file. Deltas record the token of the
+    base they apply to, so deltas left over from a replaced base are
+    ignored. Only the zip directory is read.
+    """
+    m = hashlib.sha256()
+    with zipfile.ZipFile(file_resolve(filepath), mode='r') as zf:
+        for info in zf.infolist():
+            m.update(pickler((info.filename, info.CRC, info.file_size)))
+    return m.hexdigest()
+
+
+def list_deltas(filepath: str) -> Dict[int, str]:
+    "Get the paths of the deltas of a checkpoint by sequence number"
+    directory = delta_directory(filepath)
+    if not os.path.isdir(directory):
+        return {}
+    deltas = {}
+    for filename in os.listdir(directory):
+        m = delta_re.match(filename)
+        if m is not None:
+            deltas[int(m.groups()[0])] = os.path.join(directory, filename)
+    return dict(sorted(deltas.items()))
+
+
+def read_delta_header(delta_path: str) -> dict:
+    with zipfile.ZipFile(delta_path, mode='r') as zf:
+        with zf.open(delta_header_name, 'r') as f:
+            return pickle.loads(f.read())
+
+
+def current_deltas(filepath: str, token: Optional[str] = None,
+                   seq: Optional[int] = None) -> Dict[int, Tuple[str, dict]]:
+    """
+    Get the deltas applying to the current base of a checkpoint, up to
+    and including sequence number seq.
+    """
+    if token is None:
+        token = base_token(filepath)
+    deltas = {}
+    for delta_seq, delta_path in list_deltas(filepath).items():
+        if seq is not None and delta_seq > seq:
+            break
+        header = read_delta_header(delta_path)
+        if header['base'] == token:
+            deltas[delta_seq] = (delta_path, header)
+    return deltas
+
+
+def remove_deltas(filepath: str, keep_token: Optional[str] = None):
+    """
+    Remove the deltas of a checkpoint. When keep_token is given, deltas
+    applying to the base with that token are kept.
+    """
+    for delta_path in list_deltas(filepath).values():
+        if keep_token is not None and \
+                read_delta_header(delta_path)['base'] == keep_token:
+            continue
+        # Loaded objects may still reference their data in the delta
+        FileSegment.materialize_file(delta_path)
+        os.remove(delta_path)
+
+    directory = delta_directory(filepath)
+    if os.path.isdir(directory) and len(os.listdir(directory)) == 0:
+        os.rmdir(directory)
+
+
+def link_or_copy(src: str, dst: str):
+    "Hard link a file, or copy it if it can't be linked"
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def export_checkpoint(filepath: str, dst_filepath: str,
+                      seq: Optional[int] = None,
+                      token: Optional[str] = None):
+    """
+    Make a self-contained copy of a checkpoint, holding its base and its
+    deltas up to sequence number seq. Checkpoint files are replaced but
+    never modified, so they're hard linked where possible. Later
+    checkpoints to filepath don't change the copy.
+
+    token: The base token the checkpoint was taken with. A ValueError is
+        raised if the base has since been replaced.
+    """
+    filepath = file_resolve(filepath)
+    dst_filepath = file_resolve(dst_filepath)
+    current_token = base_token(filepath)
+    if token is not None and token != current_token:
+        raise ValueError(
+            f"The base of checkpoint {filepath} has been replaced since "
+            "the requested checkpoint was taken.")
+
+    deltas = current_deltas(filepath, token=current_token, seq=seq)
+    link_or_copy(filepath, dst_filepath)
+    if len(deltas) > 0:
+        dst_directory = delta_directory(dst_filepath)
+        os.makedirs(dst_directory, exist_ok=True)
+        for delta_path, _ in deltas.values():
+            link_or_copy(delta_path, os.path.join(
+                dst_directory, os.path.basename(delta_path)))
+
+
+def graph_objects(obj: Object, objects: Optional[dict] = None) -> dict:
+    "Get all objects in an object's graph by dry_id"
+    if objects is None:
+        objects = {}
+    if obj.dry_id not in objects:
+        objects[obj.dry_id] = obj
+        for sub_obj in obj.__dry_obj_container_list__:
+            graph_objects(sub_obj, objects)
+    return objects
+
+
+def apply_deltas(obj: Object, filepath: str,
+                 seq: Optional[int] = None,
+                 token: Optional[str] = None) -> int:
+    """
+    Load the content held by a checkpoint's deltas into an object loaded
+    from its base. Returns the sequence number of the last applied delta,
+    or 0 if there were none.
+    """
+    deltas = current_deltas(filepath, token=token, seq=seq)
+    if len(deltas) == 0:
+        return 0
+
+    # Only the latest content of each object is needed.
+    latest = {}
+    for delta_seq, (delta_path, header) in deltas.items():
+        for dry_id in header['objects']:
+            latest[dry_id] = delta_path
+
+    objects = graph_objects(obj)
+    for dry_id, delta_path in latest.items():
+        if dry_id not in objects:
+            raise RuntimeError(
+                f"Delta {delta_path} holds content for object {dry_id}, "
+                f"which isn't part of the checkpointed object.")
+        with open(delta_path, 'rb') as f, \
+                zipfile.ZipFile(f, mode='r') as delta_zf:
+            # Compute data is referenced in place within the delta.
+            content = open_zip_member(delta_zf, f"objects/{dry_id}.zip")
+            with zipfile.ZipFile(content, mode='r') as zf:
+                if not objects[dry_id].load_object(zf):
+                    raise RuntimeError(
+                        f"Error loading content of object {dry_id} "
+                        f"from {delta_path}")
+
+    return max(deltas.keys())
+
+
+def load_checkpoint(filepath: str, update: bool = False,
+                    reload: bool = False, repo=None,
+                    seq: Optional[int] = None,
+                    token: Optional[str] = None) -> Object:
+    """
+    Load an object from a checkpoint, its base file and deltas.
+
+    seq: Only apply deltas up to this sequence number.
+    token: The base token the checkpoint was taken with. A ValueError is
+        raised if the base has since been replaced.
+    """
+    filepath = file_resolve(filepath)
+    current_token = None
+    if token is not None or os.path.isdir(delta_directory(filepath)):
+        current_token = base_token(filepath)
+    if token is not None and token != current_token:
+        raise ValueError(
+            f"The base of checkpoint {filepath} has been replaced since "
+            "the requested checkpoint was taken.")
+
+    obj = load_object(filepath, update=update, reload=reload, repo=repo)
+    if current_token is not None:
+        apply_deltas(obj, filepath, seq=seq, token=current_token)
+    return obj
+
+
+def compact_checkpoint(filepath: str, update: bool = False,
+                       compression: Union[CompressionPolicy,
+                                          CompressionType, None] = None):
+    "Fold the deltas of a checkpoint into a single .dry file"
+    filepath = file_resolve(filepath)
+    if len(list_deltas(filepath)) == 0:
+        return
+    obj = load_checkpoint(filepath, update=update)
+    if not save_object(obj, filepath, update=update,
+                       compression=compression):
+        raise RuntimeError(f"Error compacting checkpoint {filepath}")
+    remove_deltas(filepath)
+
+
+class Checkpointer(object):
+    """
+    Writes checkpoints of an object to a file.
+
+    The first checkpoint writes the whole object. Later checkpoints only
+    write deltas holding the content of objects which changed, until
+    max_deltas deltas have been written, at which point the whole object
+    is written again and the deltas are removed. The content of objects
+    is serialized at each checkpoint, and only written if its digest
+    changed.
+
+    skip_unchanged: Don't serialize objects which weren't marked
+        modified since their content was last written. See
+        Object.mark_modified. Objects in compute mode are still compared
+        by digest, and changes made without marking other objects aren't
+        written.
+
+    Load checkpoints with load_checkpoint.
+    """
+
+    def __init__(self, obj: Object, filepath: str,
+                 max_deltas: Optional[int] = None,
+                 compression: Union[CompressionPolicy, CompressionType,
+                                    None] = None,
+                 blob_store: Optional[BlobStore] = None,
+                 skip_unchanged: bool = False):
+        if max_deltas is not None and max_deltas < 0:
+            raise ValueError("max_deltas must not be negative")
+        self.obj = obj
+        self.filepath = file_resolve(filepath)
+        self.max_deltas = max_deltas
+        self.compression = CompressionPolicy.build(compression)
+        # Store used by full saves
+        self.blob_store = blob_store
+        # Token and file signature of the base written by this checkpointer
+        self.token = None
+        self._base_sig = None
+        self.seq = 0
+        self.num_deltas = 0
+        self.skip_unchanged = skip_unchanged
+        # dry_id -> digest of the last written content
+        self._digests = {}
+        # dry_id -> generation of the last written content of objects
+        # whose changes are tracked
+        self._generations = {}
+
+    def _base_signature(self):
+        try:
+            st = os.stat(self.filepath)
+        except FileNotFoundError:
+            return None
+        return (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+
+    def base_is_current(self) -> bool:
+        "Whether the base on disk is the one this checkpointer wrote"
+        return self.token is not None and \
+            self._base_signature() == self._base_sig
+
+    def save(self, full: bool = False) -> int:
+        """
+        Write a checkpoint, returning its sequence number. Nothing is
+        written if no object changed since the last checkpoint.
+
+        full: Write the whole object instead of a delta.
+        """
+        if full or not self.base_is_current() or \
+                (self.max_deltas is not None and
+                 self.num_deltas >= self.max_deltas):
+            self._save_full()
+        else:
+            self._save_delta()
+        return self.seq
+
+    def _tracked_generation(self, obj: Object) -> Optional[int]:
+        "Get the generation of an object whose changes are tracked"
+        if not self.skip_unchanged or obj.__dry_compute_mode__:
+            return None
+        return obj.dry_generation
+
+    def _save_full(self):
+        # Take generations before saving, so changes made while saving
+        # are written next time.
+        generations = {
+            dry_id: self._tracked_generation(obj)
+            for dry_id, obj in graph_objects(self.obj).items()}
+        if not save_object(self.obj, self.filepath,
+                           blob_store=self.blob_store,
+                           compression=self.compression):
+            raise RuntimeError(
+                f"Error saving checkpoint of {self.obj.dry_id}")
+        self.token = base_token(self.filepath)
+        self._base_sig = self._base_signature()
+        self.seq += 1
+        self.num_deltas = 0
+        self._digests = {}
+        self._generations = {}
+        for dry_id, obj in graph_objects(self.obj).items():
+            generation = generations.get(dry_id, None)
+            if generation is not None:
+                self._generations[dry_id] = generation
+                continue
+            content, digest = self._serialize_content(obj)
+            content.close()
+            self._digests[dry_id] = digest
+        remove_deltas(self.filepath)
+
+    def _serialize_content(self, obj: Object) -> Tuple[FileIntermediary, str]:
+        "Serialize the content of an object, along with its digest"
+        content = FileIntermediary()
+        with ReproducibleZipFile(
+                content, mode='w',
+                compression_policy=self.compression) as zf:
+            if not obj.save_object(zf):
+                content.close()
+                raise RuntimeError(
+                    f"Error saving content of object {obj.dry_id}")
+
+        m = hashlib.sha256()
+        content.seek(0)
+        while True:
+            chunk = content.read(COPY_CHUNK_SIZE)
+            if len(chunk) == 0:
+                break
+            m.update(chunk)
+        return content, m.hexdigest()
+
+    def _changed_content(self) -> dict:
+        "Serialize the content of objects which changed"
+        changed = {}
+        for dry_id, obj in graph_objects(self.obj).items():
+            generation = self._tracked_generation(obj)
+            if generation is not None and \
+                    self._generations.get(dry_id, None) == generation:
+                continue
+            content, digest = self._serialize_content(obj)
+            if self._digests.get(dry_id, None) == digest:
+                content.close()
+                if generation is not None:
+                    self._generations[dry_id] = generation
+            else:
+                changed[dry_id] = (content, digest, generation)
+        return changed
+
+    def _save_delta(self):
+        changed = self._changed_content()
+        if len(changed) == 0:
+            return
+
+        seq = self.seq + 1
+        directory = delta_directory(self.filepath)
+        os.makedirs(directory, exist_ok=True)
+        delta_path = os.path.join(directory, f"{seq:08d}.delta")
+        tmp_path = os.path.join(
+            directory, f".{seq:08d}.{uuid.uuid4().hex}.tmp")
+        try:
+            with open(tmp_path, 'wb') as f:
+                with ReproducibleZipFile(f, mode='w') as zf:
+                    for dry_id, (content, _, _) in changed.items():
+                        with zf.open(f"objects/{dry_id}.zip", 'w') as m:
+                            content.seek(0)
+                            shutil.copyfileobj(content, m, COPY_CHUNK_SIZE)
+                    header = {
+                        'version': 1,
+                        'base': self.token,
+                        'seq': seq,
+                        'objects': list(changed.keys()),
+                    }
+                    with zf.open(delta_header_name, 'w') as m:
+                        m.write(pickler(header))
+            os.replace(tmp_path, delta_path)
+        except Exception as e:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise e
+        finally:
+            for content, _, _ in changed.values():
+                content.close()
+
+        for dry_id, (_, digest, generation) in changed.items():
+            self._digests[dry_id] = digest
+            if generation is not None:
+                self._generations[dry_id] = generation
+        self.seq = seq
+        self.num_deltas += 1
+
+    def compact(self):
+        "Write the whole object, removing the deltas"
+        self._save_full()
@@ -1,9 +1,60 @@
+import weakref
 from collections import UserList, UserDict
 from dryml.object import Object, ObjectDef
 from dryml.config import Meta
 from typing import Mapping
 
 
+# Collections holding each collection, whose cached definitions depend
+# on it. They're kept here rather than on the collections, so copies and
+# pickles of collections don't carry them.
+_containing_collections = weakref.WeakKeyDictionary()
+
+
+def _drop_definition_cache(coll: Object):
+    "Drop the cached definitions of a collection and those holding it"
+    coll.__dict__['_definition_cache'] = None
+    containers = _containing_collections.pop(coll, {})
+    for ref in containers.values():
+        container = ref()
+        if container is not None:
+            _drop_definition_cache(container)
+
+
+def collection_modified(coll: Object):
+    "Drop the cached definition of a modified collection"
+    _drop_definition_cache(coll)
+    coll.mark_modified()
+
+
+def cached_definition(coll: Object, elements, make_def) -> ObjectDef:
+    """
+    Get the definition of a collection, only building it with
+    make_def(element_definitions) if an element's definition changed.
+    Collections among the elements drop the cached definition when
+    they're modified.
+    """
+    cache = coll.__dict__.get('_definition_cache', None)
+    if cache is not None and cache[1] is coll.data:
+        return cache[0]
+
+    element_defs = []
+    for obj in elements:
+        element_defs.append(obj.definition())
+        if isinstance(obj, (List, Tuple, Dict)):
+            containers = _containing_collections.setdefault(obj, {})
+            containers[id(coll)] = weakref.ref(coll)
+    if cache is not None and len(cache[2]) == len(element_defs) and \
+            all(a is b for a, b in zip(cache[2], element_defs)):
+        obj_def = cache[0]
+    else:
+        obj_def = make_def(element_defs)
+    # The collection's data may be replaced outright, so the cache is
+    # only kept for the same data.
+    coll.__dict__['_definition_cache'] = (obj_def, coll.data, element_defs)
+    return obj_def
+
+
 class List(Object, UserList):
     @Meta.collect_args
     def __init__(self, *args, **kwargs):
@@ -20,16 +71,66 @@ class List(Object, UserList):
 
     # We have to do a special implementation of definition
     # We want the reported dry_args to always match whats in
-    # the list. this should be computed dynamically
+    # the list. It's rebuilt when the list or its elements change.
     def definition(self):
-        dry_args = []
-        for obj in self:
-            dry_args.append(obj.definition())
-        return ObjectDef(
-            type(self),
-            *dry_args,
-            dry_mut=True,
-            **self.dry_kwargs)
+        def make_def(element_defs):
+            return ObjectDef(
+                type(self),
+                *element_defs,
+                dry_mut=True,
+                **self.dry_kwargs)
+        return cached_definition(self, self.data, make_def)
+
+    def __setitem__(self, i, item):
+        super().__setitem__(i, item)
+        collection_modified(self)
+
+    def __delitem__(self, i):
+        super().__delitem__(i)
+        collection_modified(self)
+
+    def __iadd__(self, other):
+        result = super().__iadd__(other)
+        collection_modified(self)
+        return result
+
+    def __imul__(self, n):
+        result = super().__imul__(n)
+        collection_modified(self)
+        return result
+
+    def append(self, item):
+        super().append(item)
+        collection_modified(self)
+
+    def insert(self, i, item):
+        super().insert(i, item)
+        collection_modified(self)
+
+    def pop(self, i=-1):
+        result = super().pop(i)
+        collection_modified(self)
+        return result
+
+    def remove(self, item):
+        super().remove(item)
+        collection_modified(self)
+
+    def clear(self):
+        super().clear()
+        collection_modified(self)
+
+    def reverse(self):
+        super().reverse()
+        collection_modified(self)
+
+    def sort(self, *args, **kwargs):
+        super().sort(*args, **kwargs)
+        collection_modified(self)
+
+    def extend(self, other):
+        super().extend(other)
+        collection_modified(self)
 
 
 class Tuple(Object):
@@ -52,20 +153,19 @@ class Tuple(Object):
 
     # We have to do a special implementation of definition
     # We want the reported dry_args to always match whats in
-    # the list. this should be computed dynamically
+    # the tuple. It's rebuilt when its elements change.
     def definition(self):
-        dry_args = []
-        is_mutable = False
-        for obj in self.data:
-            obj_def = obj.definition()
-            if obj_def.dry_mut:
-                is_mutable = True
-            dry_args.append(obj_def)
-        return ObjectDef(
-            type(self),
-            *dry_args,
-            dry_mut=is_mutable,
-            **self.dry_kwargs)
+        def make_def(element_defs):
+            is_mutable = False
+            for obj_def in element_defs:
+                if obj_def.dry_mut:
+                    is_mutable = True
+            return ObjectDef(
+                type(self),
+                *element_defs,
+                dry_mut=is_mutable,
+                **self.dry_kwargs)
+        return cached_definition(self, self.data, make_def)
 
 
 class Dict(Object, UserDict):
@@ -76,15 +176,27 @@ class Dict(Object, UserDict):
 
     # We have to do a special implementation of definition
     # We want the reported dry_args to always match whats in
-    # the list. this should be computed dynamically
+    # the dict. It's rebuilt when the dict or its elements change.
     def definition(self):
-        # Build dry arg dictionary
-        dry_arg = {}
-        for key in self:
-            obj = self[key]
-            dry_arg[key] = obj.definition()
-        return ObjectDef(
-            type(self),
-            dry_arg,
-            dry_mut=True,
-            **self.dry_kwargs)
+        def make_def(element_defs):
+            # Build dry arg dictionary
+            dry_arg = dict(zip(self.data.keys(), element_defs))
+            return ObjectDef(
+                type(self),
+                dry_arg,
+                dry_mut=True,
+                **self.dry_kwargs)
+        return cached_definition(self, self.data.values(), make_def)
+
+    def __setitem__(self, key, item):
+        super().__setitem__(key, item)
+        collection_modified(self)
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        collection_modified(self)
+
+    def __ior__(self, other):
+        result = super().__ior__(other)
+        collection_modified(self)
+        return result
@@ -0,0 +1,121 @@
+import zipfile
+from typing import Optional, Union, Tuple
+
+
+# Names accepted in place of zipfile compression constants
+compression_types = {
+    'stored': zipfile.ZIP_STORED,
+    'deflated': zipfile.ZIP_DEFLATED,
+    'bzip2': zipfile.ZIP_BZIP2,
+    'lzma': zipfile.ZIP_LZMA,
+}
+
+# Members describing an object definition
+meta_member_names = {
+    'meta_data.pkl',
+    'cls_def.dill',
+    'cls_str.txt',
+    'dry_args.pkl',
+    'dry_kwargs.pkl',
+    'dry_mut.pkl',
+}
+
+# Kinds of members a compression policy distinguishes
+member_types = ('meta', 'data', 'array', 'compute', 'object')
+
+CompressionType = Union[str, int, Tuple[Union[str, int], Optional[int]]]
+
+
+def get_member_type(name: str) -> str:
+    """
+    Classify a .dry file member.
+
+    meta: definition members, and blob references.
+    data: content saved by an object's save_object_imp.
+    array: numpy arrays saved as .npy members, see dryml.arrays.
+    compute: the compute data archive.
+    object: nested .dry files of contained objects.
+    """
+    if name.startswith('dry_objects/'):
+        if name.endswith('.ref'):
+            return 'meta'
+        return 'object'
+    if name == 'compute_data.zip':
+        return 'compute'
+    if name in meta_member_names or name.endswith('.ref'):
+        return 'meta'
+    if name.endswith('.npy'):
+        return 'array'
+    return 'data'
+
+
+def resolve_compression(
+        compression: CompressionType) -> Tuple[int, Optional[int]]:
+    "Get the (zipfile compression constant, level) of a compression spec"
+    level = None
+    if type(compression) is tuple:
+        if len(compression) != 2:
+            raise ValueError(
+                f"Compression {compression} must be a (type, level) pair")
+        compression, level = compression
+    if type(compression) is str:
+        if compression not in compression_types:
+            raise ValueError(
+                f"Unsupported compression {compression}. Supported "
+                f"compressions are {list(compression_types.keys())}")
+        compression = compression_types[compression]
+    elif compression not in compression_types.values():
+        raise ValueError(f"Unsupported compression {compression}")
+    if compression == zipfile.ZIP_STORED and level is not None:
+        raise ValueError("Stored members don't have a compression level")
+    return compression, level
+
+
+class CompressionPolicy(object):
+    """
+    Chooses the compression of each member written to a .dry file.
+
+    Members are compressed according to their type (see get_member_type),
+    falling back to the default. Stored members of uncompressed payloads
+    can be memory mapped when loaded, so arrays, compute data and nested
+    objects are usually best left stored, for instance:
+
+        CompressionPolicy('deflated', array='stored', compute='stored',
+                          object='stored')
+    """
+
+    def __init__(self, default: CompressionType = 'stored',
+                 **member_compression: CompressionType):
+        for member_type in member_compression:
+            if member_type not in member_types:
+                raise ValueError(
+                    f"Unknown member type {member_type}. Member types "
+                    f"are {member_types}")
+        self.default = resolve_compression(default)
+        self.member_compression = {
+            k: resolve_compression(v) for k, v in member_compression.items()}
+
+    @staticmethod
+    def build(compression: Union['CompressionPolicy', CompressionType,
+                                 None]):
+        "Get a policy from a policy or a compression applied to all members"
+        if compression is None:
+            return None
+        if isinstance(compression, CompressionPolicy):
+            return compression
+        return CompressionPolicy(compression)
+
+    def __repr__(self):
+        return f"CompressionPolicy({self.default}, " \
+            f"{self.member_compression})"
+
+    def __eq__(self, other):
+        if not isinstance(other, CompressionPolicy):
+            return False
+        return self.default == other.default and \
+            self.member_compression == other.member_compression
+
+    def compression(self, name: str) -> Tuple[int, Optional[int]]:
+        "Get the (compression, level) to use for a member"
+        return self.member_compression.get(
+            get_member_type(name), self.default)
@@ -1,20 +1,27 @@
 import collections
 import copy
 import abc
+import hashlib
 import inspect
 import functools
+import shutil
+import threading
 import zipfile
-from typing import Union, Type, Mapping
+import numpy as np
+from typing import Union, Type, Mapping, Optional
 from dryml.utils import is_nonstring_iterable, is_dictlike, \
-    get_class_from_str, get_class_str, get_hashed_id, init_arg_list_handler, \
-    init_arg_dict_handler, is_supported_scalar_type, is_supported_listlike, \
-    is_supported_dictlike, map_dictlike, map_listlike, equal_recursive
+    get_class_from_str, get_class_str, is_supported_scalar_type, \
+    is_supported_listlike, is_supported_dictlike, map_dictlike, \
+    map_listlike, equal_recursive, ReproducibleZipFile
 from dryml.context.context_tracker import WrongContextError, \
     context, NoContextError
 from dryml.context.process import compute_context
 from dryml.save_cache import SaveCache
-from dryml.file_intermediary import FileIntermediary
+from dryml.file_intermediary import FileIntermediary, zip_member_segment, \
+    open_zip_member
+from dryml.blob_store import write_blob_ref, open_blob_ref
 import uuid
+import weakref
 
 
 class MissingIdError(Exception):
@@ -62,34 +69,54 @@ class BuildStratTracker(object):
         return f"{self.tracker}"
 
 
-# Create a couple global variables
-build_repo = None
-build_cache = None
-build_verbose = None
-def_cache = None
-build_strat = None
+class BuildState(threading.local):
+    """
+    State shared by the nested build calls of a single top level
+    build. Each thread builds independently.
+    """
+    def __init__(self):
+        self.build_repo = None
+        self.build_cache = None
+        self.build_verbose = None
+        self.def_cache = None
+        self.build_strat = None
+
+    def __reduce__(self):
+        # The state is transient, copies start out empty.
+        return (self.__class__, ())
+
+
+_build_state = BuildState()
+
+
+def __getattr__(name):
+    # Expose the current thread's build state as module attributes
+    if name in ('build_repo', 'build_cache', 'build_verbose', 'def_cache',
+                'build_strat'):
+        return getattr(_build_state, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# Exact types of common scalar values, checked before slower isinstance
+# tests. Values of these types are supported, concrete, and never hold
+# objects.
+_plain_scalar_types = frozenset(
+    [type(None), bool, int, float, str, bytes])
 
 
 def is_concrete_val(input_object):
+    if type(input_object) in _plain_scalar_types:
+        return True
     from dryml import Object
     # Is this object a dry definition?
     if isinstance(input_object, Object):
         # A Object itself is a concrete value
         return True
-    elif isinstance(input_object, ObjectDef) or \
-            is_dictlike(input_object) and 'dry_def' in input_object:
-        # Check that there's a Dry ID here.
-        if 'dry_id' not in input_object['dry_kwargs']:
-            return False
-        # Check the args
-        for arg in input_object['dry_args']:
-            if not is_concrete_val(arg):
-                return False
-        # Check the kwargs
-        for key in input_object['dry_kwargs']:
-            kwarg = input_object['dry_kwargs'][key]
-            if not is_concrete_val(kwarg):
-                return False
+    elif isinstance(input_object, ObjectDef):
+        # Definitions memoize the result
+        return input_object.is_concrete()
+    elif is_dictlike(input_object) and 'dry_def' in input_object:
+        return is_concrete_def(input_object)
     elif is_nonstring_iterable(input_object):
         for obj in input_object:
             if not is_concrete_val(obj):
@@ -109,6 +136,22 @@ def is_concrete_val(input_object):
     return True
 
 
+def is_concrete_def(input_def):
+    # Check that there's a Dry ID here.
+    if 'dry_id' not in input_def['dry_kwargs']:
+        return False
+    # Check the args
+    for arg in input_def['dry_args']:
+        if not is_concrete_val(arg):
+            return False
+    # Check the kwargs
+    for key in input_def['dry_kwargs']:
+        kwarg = input_def['dry_kwargs'][key]
+        if not is_concrete_val(kwarg):
+            return False
+    return True
+
+
 class Meta(abc.ABCMeta):
     def __new__(cls, clsname, bases, attrs):
         # Set default init function as python's default
@@ -237,36 +280,47 @@ class Meta(abc.ABCMeta):
         if last_par_kind != inspect.Parameter.VAR_KEYWORD:
             no_final_kwargs = True
 
+        # Plan how arguments are consumed, once per class.
+        # Whether to collect all positional arguments
+        collect_args = getattr(init_func, '__dry_collect_args__', False)
+        # Whether to collect all keyword arguments
+        collect_kwargs = getattr(init_func, '__dry_collect_kwargs__', False)
+        num_tracked_args = len(init_func.__dry_args__)
+        tracked_kwargs = tuple(init_func.__dry_kwargs__)
+        known_kwargs = frozenset(k for k, _ in tracked_kwargs)
+        dont_collect_kwargs = frozenset(['dry_id', 'dry_metadata'])
+
         @functools.wraps(init_func)
         def dry_init(self, *args, dry_args=None, dry_kwargs=None, **kwargs):
-            # Initialize dry arguments
-            dry_args = init_arg_list_handler(dry_args)
-            dry_kwargs = init_arg_dict_handler(dry_kwargs)
+            if dry_args is None:
+                # This is the most derived class, initialize the state
+                # shared by all levels.
+                dry_args = []
 
-            # Initialize compute data holder
-            if not hasattr(self, '__dry_compute_data__'):
-                self.__dry_compute_data__ = None
+                # Initialize compute data holder
+                if not hasattr(self, '__dry_compute_data__'):
+                    self.__dry_compute_data__ = None
 
-            # Initialize compute mode indicator
-            if not hasattr(self, '__dry_compute_mode__'):
-                self.__dry_compute_mode__ = False
+                # Initialize compute mode indicator
+                if not hasattr(self, '__dry_compute_mode__'):
+                    self.__dry_compute_mode__ = False
 
-            # Initialize compute context indicator
-            if not hasattr(self, '__dry_compute_context__'):
-                self.__dry_compute_context__ = 'default'
+                # Initialize compute context indicator
+                if not hasattr(self, '__dry_compute_context__'):
+                    self.__dry_compute_context__ = 'default'
 
-            # manage whether to collect all arguments
-            collect_args = False
-            if hasattr(init_func, '__dry_collect_args__'):
-                if init_func.__dry_collect_args__:
-                    collect_args = True
+                # Store list of Objects we need to later save.
+                if not hasattr(self, '__dry_obj_container_list__'):
+                    self.__dry_obj_container_list__ = []
+            if dry_kwargs is None:
+                dry_kwargs = {}
 
             # Determine how many arguments to collect
             if collect_args:
                 # Collect all the arguments
                 num_args = len(args)
             else:
-                num_args = len(init_func.__dry_args__)
+                num_args = num_tracked_args
 
             if num_args > len(args):
                 raise ExpectedArgumentError(
@@ -274,36 +328,28 @@ class Meta(abc.ABCMeta):
                     f"positional arguments, got {len(args)}. Did you forget "
                     f"to specify a required positional argument?")
 
-            for i in range(num_args):
-                dry_args.append(args[i])
-
-            collect_kwargs = False
-            if hasattr(init_func, '__dry_collect_kwargs__'):
-                if init_func.__dry_collect_kwargs__:
-                    collect_kwargs = True
+            dry_args.extend(args[:num_args])
 
             # Collect keyword arguments and save into dry_kwargs
-            used_kwargs = []
-            for k, v in init_func.__dry_kwargs__:
+            for k, v in tracked_kwargs:
                 # Need to use .get since we are passing a default (v).
                 dry_kwargs[k] = kwargs.get(k, v)
-                used_kwargs.append(k)
 
-            # Collect remaining kwargs if needed.
-            dont_collect_kwargs = ['dry_id', 'dry_metadata']
+            # Collect remaining kwargs if needed, and grab unaltered
+            # arguments to pass to super
             if collect_kwargs:
-                for k in kwargs:
-                    if k not in dont_collect_kwargs:
-                        if k not in used_kwargs:
-                            dry_kwargs[k] = kwargs[k]
-                            used_kwargs.append(k)
-
-            # Grab unaltered arguments to pass to super
+                super_kwargs = {}
+                for k, v in kwargs.items():
+                    if k in dont_collect_kwargs:
+                        super_kwargs[k] = v
+                    elif k not in known_kwargs:
+                        dry_kwargs[k] = v
+            elif len(known_kwargs) > 0:
+                super_kwargs = {
+                    k: v for k, v in kwargs.items() if k not in known_kwargs}
+            else:
+                super_kwargs = kwargs
             super_args = args[num_args:]
-            used_kwargs += ['dry_args', 'dry_kwargs']
-            super_kwargs = {
-                k: v for k, v in kwargs.items() if k not in used_kwargs
-            }
 
             if base:
                 # At the base, we need to validate the dry args
@@ -335,46 +381,27 @@ class Meta(abc.ABCMeta):
 
             # Execute user init
             # Here we make sure to remove special arguments
-            used_kwargs = ['dry_args', 'dry_kwargs']
             if no_final_kwargs:
-                known_kwargs = list(map(
-                    lambda t: t[0],
-                    init_func.__dry_kwargs__))
                 sub_kwargs = {
                     k: v for k, v in kwargs.items() if k in known_kwargs}
             else:
-                sub_kwargs = {
-                    k: v for k, v in kwargs.items() if k not in used_kwargs}
+                sub_kwargs = dict(kwargs)
 
             # Remove dry_id from being used in non-base constructors.
             # Kludge solution.
             if not base:
-                if 'dry_id' in sub_kwargs:
-                    del sub_kwargs['dry_id']
-                if 'dry_metadata' in sub_kwargs:
-                    del sub_kwargs['dry_metadata']
+                sub_kwargs.pop('dry_id', None)
+                sub_kwargs.pop('dry_metadata', None)
 
             if no_var_pars:
                 args = args[:num_args]
 
-            # Store list of Objects we need to later save.
-            if not hasattr(self, '__dry_obj_container_list__'):
-                self.__dry_obj_container_list__ = []
-
-            def _add_dry_objs(el):
-                from dryml import Object
-                if isinstance(el, Object):
-                    self.__dry_obj_container_list__.append(el)
-                if is_nonstring_iterable(el):
-                    for elm in el:
-                        _add_dry_objs(elm)
-                if is_dictlike(el):
-                    for key in el:
-                        elm = el[key]
-                        _add_dry_objs(elm)
-
-            _add_dry_objs(args)
-            _add_dry_objs(sub_kwargs)
+            # Record the Objects we need to later save.
+            container_list = self.__dry_obj_container_list__
+            for el in args:
+                collect_dry_objs(el, container_list)
+            for el in sub_kwargs.values():
+                collect_dry_objs(el, container_list)
 
             # Call user defined init
             init_func(self, *args, **sub_kwargs)
@@ -395,13 +422,24 @@ class Meta(abc.ABCMeta):
             else:
                 # Load compute data at the base.
                 compute_data_path = 'compute_data.zip'
+                compute_ref_path = 'compute_data.ref'
                 if self.__dry_compute_data__ is not None:
                     del self.__dry_compute_data__
-                if compute_data_path in file.namelist():
-                    with file.open(compute_data_path, 'r') as f:
-                        new_compute_data = FileIntermediary()
-                        new_compute_data.write(f.read())
-                        self.__dry_compute_data__ = new_compute_data
+                if compute_ref_path in file.namelist():
+                    # Compute data is kept in a blob store.
+                    from dryml.object import get_load_blob_store
+                    self.__dry_compute_data__ = open_blob_ref(
+                        file, compute_ref_path, get_load_blob_store())
+                elif compute_data_path in file.namelist():
+                    # Reference the compute data in place when we can,
+                    # it's only read if the object's compute is loaded.
+                    new_compute_data = zip_member_segment(
+                        file, compute_data_path)
+                    if new_compute_data is None:
+                        with file.open(compute_data_path, 'r') as f:
+                            new_compute_data = FileIntermediary()
+                            shutil.copyfileobj(f, new_compute_data)
+                    self.__dry_compute_data__ = new_compute_data
                 else:
                     self.__dry_compute_data__ = None
 
@@ -430,11 +468,21 @@ class Meta(abc.ABCMeta):
                     self.save_compute(save_cache=save_cache)
 
                 # Save compute data if it's there
-                if self.__dry_compute_data__ is not None:
-                    compute_data_path = 'compute_data.zip'
-                    data_buff = self.__dry_compute_data__
-                    with file.open(compute_data_path, 'w') as f:
-                        data_buff.write_to_file(f)
+                data_buff = self.__dry_compute_data__
+                if save_cache is not None:
+                    # Prefer data captured before the save started.
+                    data_buff = save_cache.compute_snapshots.get(
+                        id(self), data_buff)
+                if data_buff is not None:
+                    if save_cache is not None and \
+                            save_cache.blob_store is not None:
+                        # Store the data once, and reference it.
+                        digest = save_cache.blob_store.put(data_buff)
+                        write_blob_ref(file, 'compute_data.ref', digest)
+                    else:
+                        compute_data_path = 'compute_data.zip'
+                        with file.open(compute_data_path, 'w') as f:
+                            data_buff.write_to_file(f)
 
             # Call this class's save object.
             if hasattr(__class__, 'save_object_imp'):
@@ -447,7 +495,7 @@ class Meta(abc.ABCMeta):
 
             if not hasattr(__class__, '__dry_meta_base__'):
                 # If we're not the base, call the super class's save.
-                super().save_object(file)
+                super().save_object(file, save_cache=save_cache)
 
             # Save contained dry objects passed as arguments to construct
             # for obj in self.__dry_obj_container_list__:
@@ -510,6 +558,8 @@ class Meta(abc.ABCMeta):
                 self.compute_prepare_imp()
 
             if is_top_call:
+                # Compute state may now change, make saves pick it up.
+                self.mark_modified()
                 self.__dry_compute_mode__ = True
 
         return compute_prepare
@@ -563,6 +613,8 @@ class Meta(abc.ABCMeta):
                 else:
                     # Set file pointer.
                     f = self.__dry_compute_data__
+                    # Loaded compute state may differ from what was saved
+                    self.mark_modified()
 
             # self.__dry_compute_data__ exists, so we need to load it.
 
@@ -616,7 +668,7 @@ class Meta(abc.ABCMeta):
 
             # Call class save implementation
             if hasattr(__class__, 'save_compute_imp'):
-                with zipfile.ZipFile(
+                with ReproducibleZipFile(
                         f, mode='w') as zf:
                     compute_imp_res = __class__.save_compute_imp(
                         self, zf)
@@ -653,9 +705,46 @@ def validate_key(key):
     raise TypeError(f"Unsupported key ({key}) of type {type(key)}")
 
 
+def collect_dry_objs(el, container_list: list):
+    "Append the Objects held by a value to a list"
+    el_type = type(el)
+    if el_type in _plain_scalar_types:
+        return
+    if el_type is list or el_type is tuple:
+        for elm in el:
+            collect_dry_objs(elm, container_list)
+        return
+    if el_type is dict:
+        for elm in el:
+            collect_dry_objs(elm, container_list)
+        for elm in el.values():
+            collect_dry_objs(elm, container_list)
+        return
+    from dryml import Object
+    if isinstance(el, Object):
+        container_list.append(el)
+    if is_nonstring_iterable(el):
+        for elm in el:
+            collect_dry_objs(elm, container_list)
+    if is_dictlike(el):
+        for key in el:
+            collect_dry_objs(el[key], container_list)
+
+
 # Assumption, for Objects, definitions are not valid values.
 # All definitions should be resolved into objects.
 def validate_val_obj(val):
+    val_type = type(val)
+    if val_type in _plain_scalar_types:
+        return
+    if val_type is list or val_type is tuple:
+        for el in val:
+            validate_val_obj(el)
+        return
+    if val_type is dict:
+        for el in val.values():
+            validate_val_obj(el)
+        return
     if is_supported_scalar_type(val):
         return
     from dryml import Object
@@ -770,6 +859,264 @@ def def_to_cat_def(val, cache=None):
             f"Unsupported value {val} of type {type(val)} encountered!")
 
 
+def _hash_str(m, val):
+    data = val.encode('utf-8')
+    m.update(b's%d:' % len(data))
+    m.update(data)
+
+
+def _hash_bytes(m, val):
+    m.update(b'y%d:' % len(val))
+    m.update(val)
+
+
+# Hash functions of exact scalar types
+_scalar_hashers = {
+    type(None): lambda m, val: m.update(b'N'),
+    bool: lambda m, val: m.update(b'b1' if val else b'b0'),
+    int: lambda m, val: m.update(b'i%d;' % val),
+    float: lambda m, val: m.update(
+        b'f' + float.hex(val).encode('ascii') + b';'),
+    str: _hash_str,
+    bytes: _hash_bytes,
+}
+
+
+def hash_def_val(m, val):
+    """
+    Feed a definition value to a hash object. Each value is tagged with
+    its type, so different structures never produce the same stream.
+    Nested definitions contribute their memoized hash, and dictionaries
+    hash the same regardless of insertion order.
+    """
+    hasher = _scalar_hashers.get(type(val), None)
+    if hasher is not None:
+        hasher(m, val)
+    elif isinstance(val, ObjectDef):
+        m.update(b'D' + val.get_hash().encode('ascii'))
+    elif is_supported_listlike(val):
+        m.update(b'T' if type(val) is tuple else b'l')
+        m.update(b'%d:' % len(val))
+        for el in val:
+            hash_def_val(m, el)
+    elif is_supported_dictlike(val):
+        m.update(b'd%d:' % len(val))
+        if all(type(k) is str for k in val):
+            for k in sorted(val):
+                _hash_str(m, k)
+                hash_def_val(m, val[k])
+        else:
+            # Hash each item on its own, and combine them in sorted order
+            item_hashes = []
+            for k in val:
+                item_m = hashlib.blake2b(digest_size=16)
+                hash_def_val(item_m, k)
+                hash_def_val(item_m, val[k])
+                item_hashes.append(item_m.digest())
+            m.update(b'h')
+            for item_hash in sorted(item_hashes):
+                m.update(item_hash)
+    elif isinstance(val, type):
+        m.update(b't')
+        _hash_str(m, get_class_str(val))
+    elif isinstance(val, (np.ndarray, np.number, np.bool_)):
+        array = np.ascontiguousarray(val)
+        if array.dtype.hasobject:
+            raise TypeError("Can't hash arrays of python objects")
+        m.update(b'a' + array.dtype.str.encode('ascii') +
+                 str(array.shape).encode('ascii') + b':')
+        m.update(array.data)
+    else:
+        from dryml import Object
+        if isinstance(val, Object):
+            m.update(b'D' + val.definition().get_hash().encode('ascii'))
+            return
+        # Other values are hashed by their string representation
+        m.update(b'?')
+        _hash_str(m, f"{get_class_str(val)}:{val}")
+
+
+def _track_val(val, owner: 'ObjectDef'):
+    """
+    Prepare a definition value for memoizing values computed from it.
+    Nested lists and dicts are replaced by tracked versions, which drop
+    the memos of the owning definition when modified, and nested
+    definitions drop them through their own memos. Returns the value to
+    keep, and whether it's memoizable. Other mutable values, like
+    arrays, aren't.
+    """
+    if type(val) in _plain_scalar_types or \
+            isinstance(val, (type, np.number, np.bool_)):
+        return val, True
+    if type(val) is tuple:
+        tracked = [_track_val(el, owner) for el in val]
+        if any(new_el is not el for (new_el, _), el in zip(tracked, val)):
+            val = tuple(new_el for new_el, _ in tracked)
+        return val, all(memoizable for _, memoizable in tracked)
+    if type(val) in (list, DefList, dict, DefDict):
+        if type(val) in (list, dict) or val._owner is None or \
+                val._owner() is not owner:
+            val = DefList(val) if isinstance(val, list) else DefDict(val)
+            val._owner = weakref.ref(owner)
+        memoizable = True
+        items = enumerate(val) if type(val) is DefList else val.items()
+        for key, el in list(items):
+            new_el, el_memoizable = _track_val(el, owner)
+            if new_el is not el:
+                # Replacing an element doesn't drop the memo
+                val.__dry_plain_type__.__setitem__(val, key, new_el)
+            memoizable = memoizable and el_memoizable
+        return val, memoizable
+    if isinstance(val, ObjectDef):
+        val._add_dependent(owner)
+        return val, val._get_memo() is not None
+    return val, False
+
+
+class DefList(list):
+    """
+    A list within a definition. Modifying it drops the memoized values
+    of the owning definition. It's pickled and copied as a plain list,
+    and compares equal to one.
+    """
+
+    __slots__ = ('_owner',)
+    __dry_plain_type__ = list
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self._owner = None
+
+    def _modified(self):
+        owner = self._owner() if self._owner is not None else None
+        if owner is not None:
+            owner.invalidate_hash()
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._modified()
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._modified()
+
+    def __iadd__(self, other):
+        result = super().__iadd__(other)
+        self._modified()
+        return result
+
+    def __imul__(self, n):
+        result = super().__imul__(n)
+        self._modified()
+        return result
+
+    def append(self, value):
+        super().append(value)
+        self._modified()
+
+    def extend(self, values):
+        super().extend(values)
+        self._modified()
+
+    def insert(self, i, value):
+        super().insert(i, value)
+        self._modified()
+
+    def pop(self, *args):
+        result = super().pop(*args)
+        self._modified()
+        return result
+
+    def remove(self, value):
+        super().remove(value)
+        self._modified()
+
+    def clear(self):
+        super().clear()
+        self._modified()
+
+    def sort(self, *args, **kwargs):
+        super().sort(*args, **kwargs)
+        self._modified()
+
+    def reverse(self):
+        super().reverse()
+        self._modified()
+
+    def __reduce__(self):
+        return (list, (list(self),))
+
+
+class DefDict(dict):
+    """
+    A dict within a definition. Modifying it drops the memoized values
+    of the owning definition. It's pickled and copied as a plain dict,
+    and compares equal to one.
+    """
+
+    __slots__ = ('_owner',)
+    __dry_plain_type__ = dict
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._owner = None
+
+    def _modified(self):
+        owner = self._owner() if self._owner is not None else None
+        if owner is not None:
+            owner.invalidate_hash()
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._modified()
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._modified()
+
+    def __ior__(self, other):
+        result = super().__ior__(other)
+        self._modified()
+        return result
+
+    def pop(self, *args):
+        result = super().pop(*args)
+        self._modified()
+        return result
+
+    def popitem(self):
+        result = super().popitem()
+        self._modified()
+        return result
+
+    def clear(self):
+        super().clear()
+        self._modified()
+
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        self._modified()
+
+    def setdefault(self, key, default=None):
+        result = super().setdefault(key, default)
+        self._modified()
+        return result
+
+    def __reduce__(self):
+        return (dict, (dict(self),))
+
+
+class DefKwargs(DefDict):
+    """
+    The keyword arguments of a definition. Modifying them drops the
+    memoized values of the definition. They're pickled as plain
+    dictionaries.
+    """
+
+    __slots__ = ()
+    __dry_plain_type__ = None
+
+
 class ObjectDef(collections.UserDict):
     @staticmethod
     def from_dict(def_dict: Mapping, render_cache=None):
@@ -845,7 +1192,7 @@ class ObjectDef(collections.UserDict):
         validate_val_def(args)
         self.data['dry_args'] = args
         validate_val_def(kwargs)
-        self.data['dry_kwargs'] = kwargs
+        self.data['dry_kwargs'] = DefKwargs(kwargs)
 
     def __eq__(self, other):
         return equal_recursive(self, other)
@@ -894,8 +1241,83 @@ class ObjectDef(collections.UserDict):
                 raise TypeError(
                     f"Value of type {type(value)} not supported "
                     "for class assignment!")
+        elif key == 'dry_kwargs':
+            self.data[key] = DefKwargs(value)
         else:
             self.data[key] = value
+        self.invalidate_hash()
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self.invalidate_hash()
+
+    def __copy__(self):
+        # Copies share values, but not memoized values or the kwargs
+        # tracking modifications for this definition.
+        inst = super().__copy__()
+        inst.__dict__.pop('_memo', None)
+        inst.__dict__.pop('_dependents', None)
+        kwargs = inst.data.get('dry_kwargs', None)
+        if kwargs is not None:
+            inst.data['dry_kwargs'] = DefKwargs(kwargs)
+        return inst
+
+    def __getstate__(self):
+        # Memoized values aren't part of the definition.
+        state = self.__dict__.copy()
+        state.pop('_memo', None)
+        state.pop('_dependents', None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        kwargs = self.data.get('dry_kwargs', None)
+        if kwargs is not None and type(kwargs) is not DefKwargs:
+            self.data['dry_kwargs'] = DefKwargs(kwargs)
+
+    def _get_memo(self) -> Optional[dict]:
+        """
+        Get the memoized values of this definition. Nested lists and
+        dicts are replaced by tracked versions the first time, see
+        _track_val. Definitions holding values which can be modified
+        without notice aren't memoized, and None is returned.
+        """
+        memo = self.__dict__.get('_memo', None)
+        if memo is None:
+            kwargs = self.data['dry_kwargs']
+            args, memoizable = _track_val(self.data['dry_args'], self)
+            self.data['dry_args'] = args
+            if type(kwargs) is DefKwargs:
+                kwargs._owner = weakref.ref(self)
+                for key, val in list(kwargs.items()):
+                    new_val, val_memoizable = _track_val(val, self)
+                    if new_val is not val:
+                        dict.__setitem__(kwargs, key, new_val)
+                    memoizable = memoizable and val_memoizable
+            else:
+                memoizable = False
+            memo = {} if memoizable else False
+            self.__dict__['_memo'] = memo
+        return memo if memo is not False else None
+
+    def _add_dependent(self, container: 'ObjectDef'):
+        "Drop the memos of a containing definition along with ours"
+        dependents = self.__dict__.setdefault('_dependents', {})
+        dependents[id(container)] = weakref.ref(container)
+
+    def invalidate_hash(self):
+        """
+        Drop memoized values, along with those of the definitions
+        containing this one. Called when the definition or its kwargs
+        are modified.
+        """
+        if self.__dict__.get('_memo', None) is not None:
+            self.__dict__['_memo'] = None
+            dependents = self.__dict__.pop('_dependents', {})
+            for ref in dependents.values():
+                container = ref()
+                if container is not None:
+                    container.invalidate_hash()
 
     def to_dict(self, cls_str: bool = False, render_cache=None):
         raise RuntimeError("Functionality Questionable")
@@ -964,76 +1386,64 @@ class ObjectDef(collections.UserDict):
         reset_verbose = False
         construct_object = True
 
-        global build_repo
-        global build_cache
-        global def_cache
-        global build_strat
-        global build_verbose
-
         # Handle setting of build_verbose
-        if build_verbose is None:
+        if _build_state.build_verbose is None:
             if verbose is None:
-                build_verbose = False
+                _build_state.build_verbose = False
             else:
                 if type(verbose) is not bool:
                     raise TypeError("verbose must be a bool!")
-                build_verbose = verbose
+                _build_state.build_verbose = verbose
             reset_verbose = True
         else:
             if verbose is not None:
                 if type(verbose) is not bool:
                     raise TypeError("verbose must be a bool!")
-                if verbose != build_verbose:
+                if verbose != _build_state.build_verbose:
                     raise ValueError(
                         "Can't change verbose once set by a superior call.")
 
         # Handle creation of build repo
         if repo is not None:
-            if build_repo is not None:
-                if repo is not build_repo:
+            if _build_state.build_repo is not None:
+                if repo is not _build_state.build_repo:
                     raise RuntimeError(
                         "different repos not currently supported")
             else:
                 # Set the call_repo
-                build_repo = repo
+                _build_state.build_repo = repo
                 reset_repo = True
 
         # Handle creation of build cache
-        if build_cache is None:
-            build_cache = {}
-            def_cache = {}
+        if _build_state.build_cache is None:
+            _build_state.build_cache = {}
+            _build_state.def_cache = {}
             reset_cache = True
 
         # Handle creation of build strat cache
-        if build_strat is None:
-            build_strat = BuildStratTracker()
+        if _build_state.build_strat is None:
+            _build_state.build_strat = BuildStratTracker()
             reset_strat = True
 
         # Define a cleanup function to call in the event of error
         # and at the end of the function.
         def cleanup():
-            global build_repo
-            global build_cache
-            global def_cache
-            global build_strat
-            global build_verbose
-
             # Reset the repo for this function
             if reset_repo:
-                build_repo = None
+                _build_state.build_repo = None
 
             # Reset the build cache
             if reset_cache:
-                build_cache = None
-                def_cache = None
+                _build_state.build_cache = None
+                _build_state.def_cache = None
 
             # Reset the build strat cache
             if reset_strat:
-                build_strat = None
+                _build_state.build_strat = None
 
             # Reset the verbose indicator
             if reset_verbose:
-                build_verbose = None
+                _build_state.build_verbose = None
 
         # Create some book-keeping variables
         obj = None
@@ -1041,9 +1451,9 @@ class ObjectDef(collections.UserDict):
         construct_object = True
 
         # Check whether this SPECIFIC definition has been built yet.
-        if self.tracking_id in def_cache:
-            obj = def_cache[self.tracking_id]
-            if build_verbose:
+        if self.tracking_id in _build_state.def_cache:
+            obj = _build_state.def_cache[self.tracking_id]
+            if _build_state.build_verbose:
                 print(
                     "Object with id {obj.dry_id} built for definition "
                     f"with tracking id {self.tracking_id} was found "
@@ -1060,10 +1470,10 @@ class ObjectDef(collections.UserDict):
 
         # Check the cache
         if obj is None and not construction_required and \
-                build_cache is not None:
+                _build_state.build_cache is not None:
             try:
-                obj = build_cache[obj_id]
-                if build_verbose:
+                obj = _build_state.build_cache[obj_id]
+                if _build_state.build_verbose:
                     print(f"Found object with id {obj_id} in "
                           "the build cache.")
                 construct_object = False
@@ -1072,16 +1482,16 @@ class ObjectDef(collections.UserDict):
 
         # Check the repo
         if obj is None and (not construction_required) and \
-                (build_repo is not None) and \
-                ('repo' not in build_strat[obj_id]):
+                (_build_state.build_repo is not None) and \
+                ('repo' not in _build_state.build_strat[obj_id]):
             try:
-                build_strat[obj_id].add('repo')
-                obj = build_repo.get_obj(self, load=True)
-                build_cache[obj_id] = obj
-                def_cache[self.tracking_id] = obj
+                _build_state.build_strat[obj_id].add('repo')
+                obj = _build_state.build_repo.get_obj(self, load=True)
+                _build_state.build_cache[obj_id] = obj
+                _build_state.def_cache[self.tracking_id] = obj
                 construct_object = False
-                build_strat[obj_id].remove('repo')
-                if build_verbose:
+                _build_state.build_strat[obj_id].remove('repo')
+                if _build_state.build_verbose:
                     print(f"Found object with id {obj_id} in the "
                           "repository.")
             except KeyError:
@@ -1092,18 +1502,27 @@ class ObjectDef(collections.UserDict):
             # Check the zipfile
             if obj is None and (not construction_required) \
                     and construct_object and (load_zip is not None) \
-                    and ('zip' not in build_strat[obj_id]):
+                    and ('zip' not in _build_state.build_strat[obj_id]):
                 target_filename = f"dry_objects/{obj_id}.dry"
-                from dryml import load_object
+                target_ref_filename = f"dry_objects/{obj_id}.ref"
+                from dryml.object import load_object, get_load_blob_store
+                target_file = None
                 if target_filename in load_zip.namelist():
-                    build_strat[obj_id].add('zip')
-                    with load_zip.open(target_filename) as f:
+                    target_file = open_zip_member(load_zip, target_filename)
+                elif target_ref_filename in load_zip.namelist():
+                    # The object is kept in a blob store.
+                    target_file = open_blob_ref(
+                        load_zip, target_ref_filename,
+                        get_load_blob_store())
+                if target_file is not None:
+                    _build_state.build_strat[obj_id].add('zip')
+                    with target_file as f:
                         obj = load_object(f)
-                        build_cache[obj_id] = obj
-                        def_cache[self.tracking_id] = obj
+                        _build_state.build_cache[obj_id] = obj
+                        _build_state.def_cache[self.tracking_id] = obj
                         construct_object = False
-                    build_strat[obj_id].remove('zip')
-                    if build_verbose:
+                    _build_state.build_strat[obj_id].remove('zip')
+                    if _build_state.build_verbose:
                         print(f"Found object with id {obj_id} in the "
                               "zip file.")
 
@@ -1119,9 +1538,9 @@ class ObjectDef(collections.UserDict):
 
                 # Save object in the build cache.
                 obj_id = obj.dry_id
-                build_cache[obj_id] = obj
-                def_cache[self.tracking_id] = obj
-                if build_verbose:
+                _build_state.build_cache[obj_id] = obj
+                _build_state.def_cache[self.tracking_id] = obj
+                if _build_state.build_verbose:
                     print(f"Explicitly constructed new object. id: {obj_id}")
 
             elif obj is None and not construct_object:
@@ -1190,8 +1609,41 @@ class ObjectDef(collections.UserDict):
             kwargs_hash_str = str(self.kwargs)
         return class_hash_str+args_hash_str+kwargs_hash_str
 
+    def get_hash(self, no_id: bool = False,
+                 no_metadata: bool = False) -> str:
+        """
+        Get a hash of the structure of this definition. It's memoized
+        when no value of the definition can be modified in place.
+
+        no_id: Leave out the top level dry_id.
+        no_metadata: Leave out the top level dry_metadata.
+        """
+        memo = self._get_memo()
+        key = ('hash', no_id, no_metadata)
+        if memo is None or key not in memo:
+            kwargs = self.kwargs
+            if no_id or no_metadata:
+                kwargs = copy.copy(kwargs)
+                if no_id:
+                    kwargs.pop('dry_id', None)
+                if no_metadata:
+                    kwargs.pop('dry_metadata', None)
+            m = hashlib.blake2b(digest_size=16)
+            hash_def_val(m, self.cls)
+            hash_def_val(m, self.args)
+            hash_def_val(m, kwargs)
+            if memo is None:
+                return m.hexdigest()
+            memo[key] = m.hexdigest()
+        return memo[key]
+
     def is_concrete(self):
-        return is_concrete_val(self)
+        memo = self._get_memo()
+        if memo is None:
+            return is_concrete_def(self)
+        if 'concrete' not in memo:
+            memo['concrete'] = is_concrete_def(self)
+        return memo['concrete']
 
     def __hash__(self):
         if not self.is_concrete():
@@ -1203,7 +1655,7 @@ class ObjectDef(collections.UserDict):
         if not self.is_concrete():
             raise IncompleteDefinitionError(
                 "Definition {self} has no dry_id!")
-        return get_hashed_id(self.get_hash_str())
+        return self.get_hash()
 
     def get_category_id(self):
-        return get_hashed_id(self.get_hash_str(no_id=True, no_metadata=True))
+        return self.get_hash(no_id=True, no_metadata=True)
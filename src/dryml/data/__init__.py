@@ -1,6 +1,8 @@
 from dryml.data.dataset import Dataset, NotIndexedError, \
     NotSupervisedError
 from dryml.data.numpy_dataset import NumpyDataset
+from dryml.data.random_access_dataset import RandomAccessDataset
+from dryml.data.sharded_array import ShardedArray
 import dryml.data.util as util
 import dryml.data.transforms as transforms
 
@@ -10,6 +12,8 @@ __all__ = [
     NotIndexedError,
     NotSupervisedError,
     NumpyDataset,
+    RandomAccessDataset,
+    ShardedArray,
     util,
     transforms,
 ]
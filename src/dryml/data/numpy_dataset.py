@@ -1,12 +1,59 @@
 from dryml.data.dataset import Dataset
+from dryml.data.sharded_array import ShardedArray
 from dryml.data.util import nested_batcher, nested_unbatcher, \
-    nested_flatten
+    nested_flatten, stack_arrays, array_batcher, nested_slice, \
+    nested_apply, buffered_shuffler
 from dryml.utils import is_iterator
 from dryml.data.util import taker, skiper
 import numpy as np
 from typing import Callable
 
 
+def is_array(data) -> bool:
+    "Whether data can back an array dataset"
+    return isinstance(data, (np.ndarray, ShardedArray))
+
+
+def array_data_gen(data, batch_size=None, drop_remainder=True, order=None):
+    """
+    Get a function returning a generator of the rows of nested arrays, or
+    of batches of batch_size rows.
+
+    order: The indices of the rows to yield, in order, or a function
+        giving them for each pass.
+    """
+    def pass_order():
+        if callable(order):
+            return order()
+        return order
+
+    if batch_size is None:
+        if order is None:
+            def data_gen():
+                return nested_unbatcher(lambda: [data])
+        else:
+            def data_gen():
+                # Gather rows in chunks
+                return nested_unbatcher(lambda: array_batcher(
+                    data, 1024, drop_remainder=False, order=pass_order()))
+    else:
+        def data_gen():
+            return array_batcher(
+                data, batch_size, drop_remainder=drop_remainder,
+                order=pass_order())
+    return data_gen
+
+
+def array_dataset_size(num_rows, batch_size=None, drop_remainder=True):
+    "Get the number of elements yielded by array_data_gen"
+    if batch_size is None:
+        return num_rows
+    size = num_rows // batch_size
+    if not drop_remainder and num_rows % batch_size != 0:
+        size += 1
+    return size
+
+
 class NumpyDataset(Dataset):
     """
     A Numpy based dataset based on a list of numpy elements
@@ -16,7 +63,21 @@ class NumpyDataset(Dataset):
             self, data, indexed=False,
             supervised=False, batch_size=None, size=None):
 
-        if type(data) is np.ndarray or type(data) is tuple:
+        # Nested arrays holding every row of this dataset, when it's
+        # backed by them. Batches are then slices of these arrays.
+        self._array_data = None
+        # Gives the order of the rows for each pass, if they're reordered
+        self._array_order = None
+        self._num_rows = None
+        self._drop_remainder = True
+
+        if is_array(data) or type(data) is tuple:
+            if any(type(d) is ShardedArray for d in nested_flatten(data)):
+                # The data is held as a single batch, which would have to
+                # be read into memory.
+                raise TypeError(
+                    "ShardedArrays need a RandomAccessDataset, see "
+                    "RandomAccessDataset.from_npy.")
             data_size = len(data)
             if type(data) is tuple:
                 size_set = set(map(lambda d: len(d), nested_flatten(data)))
@@ -30,6 +91,10 @@ class NumpyDataset(Dataset):
 
             self._data_gen = lambda: [data]
             self.size = 1
+            if data_size > 0 and \
+                    all(is_array(d) for d in nested_flatten(data)):
+                self._array_data = data
+                self._num_rows = data_size
 
         elif callable(data):
             # We have a method which is supposed to yield
@@ -60,14 +125,19 @@ class NumpyDataset(Dataset):
                     super().__init__(
                         indexed=indexed, supervised=supervised,
                         batch_size=len(data))
-                    self._data_gen = lambda: [data.to_numpy()]
+                    array_data = data.to_numpy()
+                    self._data_gen = lambda: [array_data]
+                    self._array_data = array_data
+                    self._num_rows = len(data)
                     self.size = 1
                 elif indexed is True:
                     super().__init__(
                         indexed=indexed, supervised=supervised,
                         batch_size=len(data))
-                    self._data_gen = lambda: [(data.index.to_numpy(),
-                                              data.to_numpy())]
+                    array_data = (data.index.to_numpy(), data.to_numpy())
+                    self._data_gen = lambda: [array_data]
+                    self._array_data = array_data
+                    self._num_rows = len(data)
                     self.size = 1
             elif type(data) is list:
                 data_size = len(data)
@@ -93,6 +163,72 @@ class NumpyDataset(Dataset):
                 else:
                     self.size = size
 
+    def _from_arrays(
+            self, data, batch_size=None, drop_remainder=True,
+            indexed=None, order=None, num_rows=None) -> Dataset:
+        """
+        Create a dataset backed by nested arrays holding all of its rows.
+        It yields single rows, or slices of batch_size rows if batch_size
+        is given. Datasets with a fixed order are RandomAccessDatasets.
+
+        order: The indices of the rows to yield, in order, or a function
+            giving them for each pass. Batches are then gathered from the
+            arrays.
+        num_rows: The number of rows yielded when order is a function.
+        """
+        if indexed is None:
+            indexed = self.indexed
+
+        if not callable(order):
+            from dryml.data.random_access_dataset import RandomAccessDataset
+            return RandomAccessDataset(
+                data,
+                indexed=indexed,
+                supervised=self.supervised,
+                batch_size=batch_size,
+                drop_remainder=drop_remainder,
+                order=order)
+
+        dataset = NumpyDataset(
+            array_data_gen(
+                data, batch_size=batch_size,
+                drop_remainder=drop_remainder, order=order),
+            indexed=indexed,
+            supervised=self.supervised,
+            batch_size=batch_size,
+            size=array_dataset_size(num_rows, batch_size, drop_remainder))
+        dataset._array_data = data
+        dataset._array_order = order
+        dataset._num_rows = num_rows
+        dataset._drop_remainder = drop_remainder
+        return dataset
+
+    def _from_array_rows(self, rows: slice) -> Dataset:
+        "Create an array dataset yielding a range of this dataset's rows"
+        order = self._array_order
+        data = self._array_data
+        num_rows = len(range(*rows.indices(self._num_rows)))
+        if order is None:
+            data = nested_slice(data, rows)
+            sub_order = None
+        elif callable(order):
+            def sub_order():
+                return order()[rows]
+        else:
+            sub_order = order[rows]
+        return self._from_arrays(
+            data,
+            batch_size=self.batch_size,
+            drop_remainder=self._drop_remainder,
+            order=sub_order,
+            num_rows=num_rows)
+
+    def _array_rows(self, n):
+        "Get the number of rows held by n elements of an array dataset"
+        if self.batched:
+            return n*self.batch_size
+        return n
+
     def as_indexed(self, start=0) -> Dataset:
         """
         If not already indexed, return a version of this dataset
@@ -100,6 +236,30 @@ class NumpyDataset(Dataset):
         """
         if self.indexed:
             return self
+        elif self._array_data is not None and \
+                not callable(self._array_order):
+            data = self._array_data
+            order = self._array_order
+            positions = np.arange(start, start+self._num_rows)
+            if order is None:
+                index = positions
+            elif len(np.unique(order)) == len(order):
+                # Store the position of each row, so gathering the index
+                # in order gives the positions.
+                index = np.full(
+                    len(nested_flatten(data)[0]), -1, dtype=np.int64)
+                index[order] = positions
+            else:
+                # Rows are repeated, gather them in order
+                data = nested_apply(data, lambda leaf: np.asarray(leaf[order]))
+                index = positions
+                order = None
+            return self._from_arrays(
+                (index, data),
+                batch_size=self.batch_size,
+                drop_remainder=self._drop_remainder,
+                indexed=True,
+                order=order)
         else:
             if not self.batched:
                 def enumerate_dataset(gen_func, start=0):
@@ -154,21 +314,42 @@ class NumpyDataset(Dataset):
         """
         return self.data_gen()
 
+    def random_access(self) -> Dataset:
+        """
+        Get a RandomAccessDataset yielding the same elements as this
+        dataset, if it's backed by arrays in a fixed order.
+        """
+        if self._array_data is None or callable(self._array_order):
+            raise TypeError(
+                "Only datasets backed by arrays in a fixed order can be "
+                "accessed randomly.")
+        return self._from_arrays(
+            self._array_data,
+            batch_size=self.batch_size,
+            drop_remainder=self._drop_remainder,
+            order=self._array_order)
+
     def batch(self, batch_size=32, drop_remainder=True) -> Dataset:
         """
         Batch this data
         """
-        if self.batched:
-            if self.batch_size != batch_size:
-                return self.unbatch().batch(batch_size=batch_size)
-            else:
-                return self
+        if self.batched and self.batch_size == batch_size:
+            return self
+        elif self._array_data is not None:
+            # Batches are slices of the arrays
+            return self._from_arrays(
+                self._array_data, batch_size=batch_size,
+                drop_remainder=drop_remainder,
+                order=self._array_order,
+                num_rows=self._num_rows)
+        elif self.batched:
+            return self.unbatch().batch(batch_size=batch_size)
         else:
             return NumpyDataset(
                 lambda: nested_batcher(
                      self.data_gen,
                      batch_size,
-                     lambda e: np.stack(e, axis=0),
+                     stack_arrays,
                      drop_remainder=drop_remainder),
                 indexed=self.indexed,
                 supervised=self.supervised,
@@ -181,6 +362,11 @@ class NumpyDataset(Dataset):
         """
         if not self.batched:
             return self
+        elif self._array_data is not None:
+            return self._from_arrays(
+                self._array_data,
+                order=self._array_order,
+                num_rows=self._num_rows)
         else:
             return NumpyDataset(
                 lambda: nested_unbatcher(self.data_gen),
@@ -205,6 +391,9 @@ class NumpyDataset(Dataset):
         Take only a specific number of examples
         """
 
+        if self._array_data is not None:
+            return self._from_array_rows(slice(None, self._array_rows(n)))
+
         new_size = self.size
         if new_size is np.nan:
             new_size = n
@@ -227,6 +416,9 @@ class NumpyDataset(Dataset):
         Skip a specific number of examples
         """
 
+        if self._array_data is not None:
+            return self._from_array_rows(slice(self._array_rows(n), None))
+
         new_size = self.size
         if new_size is not np.nan and new_size is not np.inf:
             if n > new_size:
@@ -303,46 +495,75 @@ class NumpyDataset(Dataset):
             batch_size=self.batch_size,
             size=self.size)
 
-    def shuffle(self, buffer_size, seed=None):
-        # create generator of data
-        def shuffler():
-            # Create new generator
-            rng = np.random.default_rng(seed=seed)
-
-            # create iterator on unbatched data
-            ds_iter = iter(self.unbatch())
-
-            # create buffer and fill it
-            el_buffer = []
-
-            # Fill the buffer
-            for idx in range(buffer_size):
-                try:
-                    el_buffer.append(next(ds_iter))
-                except StopIteration:
-                    break
-
-            while True:
-                # Compute size of buffer, and break out if nothing left
-                num_in_buffer = len(el_buffer)
-                if num_in_buffer == 0:
-                    break
-
-                if num_in_buffer > 1:
-                    idx = rng.integers(low=0, high=num_in_buffer-1)
-                else:
-                    idx = 0
+    def shuffle_chunks(self, chunk_size, seed=None):
+        """
+        Shuffle an array backed dataset in chunks of chunk_size consecutive
+        rows. Chunks are visited in a random order, and their rows are
+        shuffled, so each batch reads rows from a single region of memory
+        mapped arrays. The order is drawn on each pass, and takes 8 bytes
+        of memory per row.
+        """
+        if self._array_data is None:
+            raise TypeError(
+                "Only datasets backed by arrays can be shuffled in chunks.")
+        num_rows = self._num_rows
+        order = self._array_order
 
-                yield el_buffer.pop(idx)
+        def chunk_order():
+            rng = np.random.default_rng(seed=seed)
+            num_chunks = -(-num_rows // chunk_size)
+            chunk_ranks = rng.permutation(num_chunks)
+            rows = np.lexsort((
+                rng.random(num_rows),
+                chunk_ranks[np.arange(num_rows) // chunk_size]))
+            if order is None:
+                return rows
+            elif callable(order):
+                return order()[rows]
+            return order[rows]
+
+        return self._from_arrays(
+            self._array_data,
+            order=chunk_order,
+            num_rows=num_rows)
 
-                # Try to refill the buffer here
-                try:
-                    el_buffer.append(next(ds_iter))
-                except StopIteration:
-                    pass
+    def shuffle(self, buffer_size, seed=None):
+        """
+        Shuffle the elements of this dataset, drawing each one at random
+        from a buffer of the next buffer_size elements. The whole dataset
+        is shuffled if buffer_size is None.
 
+        Array backed datasets shuffled as a whole are permuted instead, so
+        they can be batched by gathering rows without unbatching them.
+        """
+        if self._array_data is not None and \
+                (buffer_size is None or buffer_size >= self._num_rows):
+            num_rows = self._num_rows
+            order = self._array_order
+
+            def permuted_order():
+                rng = np.random.default_rng(seed=seed)
+                permutation = rng.permutation(num_rows)
+                if order is None:
+                    return permutation
+                elif callable(order):
+                    return order()[permutation]
+                return order[permutation]
+
+            return self._from_arrays(
+                self._array_data,
+                order=permuted_order,
+                num_rows=num_rows)
+
+        unbatched = self.unbatch()
+        # Unbatching a stream keeps its number of batches, not rows
+        size = unbatched.size
+        if self.batched and unbatched._array_data is None:
+            size = np.nan
         return NumpyDataset(
-            shuffler,
+            lambda: buffered_shuffler(
+                lambda: iter(unbatched), buffer_size, seed=seed),
             indexed=self.indexed,
             supervised=self.supervised,
-            batch_size=None)
+            batch_size=None,
+            size=size)
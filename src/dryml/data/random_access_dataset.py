@@ -0,0 +1,223 @@
+from dryml.data.dataset import Dataset
+from dryml.data.numpy_dataset import NumpyDataset, array_data_gen, \
+    array_dataset_size, is_array
+from dryml.data.sharded_array import ShardedArray
+from dryml.data.util import nested_flatten, nested_renester, \
+    nested_apply, get_data_batch_size
+import os
+import numpy as np
+from typing import Tuple, Union
+
+
+class RandomAccessDataset(NumpyDataset):
+    """
+    A Numpy based dataset backed by nested arrays, whose elements can be
+    accessed by index. Arrays may be memory maps. Skipping, taking and
+    splitting slice the arrays or the order of their rows, and batches
+    are slices of the arrays, or are gathered from them.
+    """
+
+    def __init__(
+            self, data, indexed=False, supervised=False,
+            batch_size=None, drop_remainder=True, order=None):
+        """
+        data: Nested arrays with the same number of rows, or a DataFrame.
+            Arrays may be ShardedArrays.
+        batch_size: Yield batches of batch_size rows instead of single
+            rows.
+        drop_remainder: Drop the last batch if it has fewer rows.
+        order: The indices of the rows to yield, in order.
+        """
+        df_test = False
+        try:
+            import pandas as pd
+            if type(data) is pd.core.frame.DataFrame:
+                df_test = True
+        except ImportError:
+            pass
+        if df_test:
+            if indexed:
+                data = (data.index.to_numpy(), data.to_numpy())
+            else:
+                data = data.to_numpy()
+
+        flat_data = nested_flatten(data)
+        for leaf in flat_data:
+            if not is_array(leaf):
+                raise TypeError(
+                    f"RandomAccessDataset needs arrays, got {type(leaf)}")
+        num_rows = get_data_batch_size(flat_data=flat_data)
+        if order is not None:
+            order = np.asarray(order)
+            num_rows = len(order)
+
+        super().__init__(
+            array_data_gen(
+                data, batch_size=batch_size,
+                drop_remainder=drop_remainder, order=order),
+            indexed=indexed,
+            supervised=supervised,
+            batch_size=batch_size,
+            size=array_dataset_size(num_rows, batch_size, drop_remainder))
+        self._array_data = data
+        self._array_order = order
+        self._num_rows = num_rows
+        self._drop_remainder = drop_remainder
+        self._renester = nested_renester(data)
+
+    @staticmethod
+    def from_npy(
+            path: Union[str, tuple, dict], indexed=False, supervised=False,
+            batch_size=None, drop_remainder=True,
+            mmap_mode='r') -> 'RandomAccessDataset':
+        """
+        Create a dataset from .npy files on disk, which are memory mapped
+        so only the rows used are read.
+
+        path: A .npy file, or a directory whose .npy files are shards of a
+            ShardedArray in the order of their names. A tuple or dict of
+            paths gives nested arrays, for instance (x_path, y_path) for
+            a supervised dataset.
+        mmap_mode: How to map the files, None loads them into memory.
+        """
+        def _load(path):
+            if os.path.isdir(path):
+                return ShardedArray.load(path, mmap_mode=mmap_mode)
+            return np.load(path, mmap_mode=mmap_mode)
+
+        data = nested_apply(path, _load)
+        return RandomAccessDataset(
+            data,
+            indexed=indexed,
+            supervised=supervised,
+            batch_size=batch_size,
+            drop_remainder=drop_remainder)
+
+    def random_access(self) -> Dataset:
+        return self
+
+    def _rows(self, rows):
+        "Get the rows at a slice or an index, gathered from the arrays"
+        if self._array_order is not None:
+            rows = self._array_order[rows]
+        return self._renester([
+            np.asarray(leaf[rows]) if isinstance(rows, slice) else leaf[rows]
+            for leaf in nested_flatten(self._array_data)])
+
+    def __getitem__(self, key):
+        """
+        Get an element by its index. Slices and integer arrays of
+        indices give new datasets holding the selected elements.
+        """
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            if not self.batched:
+                return self._from_array_rows(slice(start, stop, step))
+            if step != 1:
+                raise ValueError(
+                    "Batched datasets can only be sliced with a step of 1")
+            stop = max(start, stop)
+            return self._from_array_rows(slice(
+                start*self.batch_size,
+                min(stop*self.batch_size, self._num_rows)))
+
+        if isinstance(key, (list, np.ndarray)):
+            if self.batched:
+                raise TypeError(
+                    "Batched datasets can't be indexed by arrays")
+            order = np.asarray(key, dtype=np.int64)
+            if self._array_order is not None:
+                order = self._array_order[order]
+            elif len(order) > 0 and \
+                    (order.min() < -self._num_rows or
+                     order.max() >= self._num_rows):
+                raise IndexError("Dataset index out of range")
+            return self._from_arrays(
+                self._array_data,
+                drop_remainder=self._drop_remainder,
+                order=order)
+
+        i = int(key)
+        if i < 0:
+            i += len(self)
+        if i < 0 or i >= len(self):
+            raise IndexError("Dataset index out of range")
+        if not self.batched:
+            return self._rows(i)
+        return self._rows(slice(
+            i*self.batch_size,
+            min((i+1)*self.batch_size, self._num_rows)))
+
+    def count(self, limit=-1):
+        """
+        Count the elements of the dataset, without iterating it
+        """
+        if limit > 0 and self.size > limit:
+            return limit+1
+        return self.size
+
+    def permute(self, seed=None) -> Dataset:
+        """
+        Reorder the rows of the dataset with a random permutation drawn
+        once, so the dataset can still be accessed by index.
+        """
+        rng = np.random.default_rng(seed=seed)
+        permutation = rng.permutation(self._num_rows)
+        if self._array_order is not None:
+            permutation = self._array_order[permutation]
+        return self._from_arrays(
+            self._array_data,
+            batch_size=self.batch_size,
+            drop_remainder=self._drop_remainder,
+            order=permutation)
+
+    def split(self, fraction: float) -> Tuple[Dataset, Dataset]:
+        """
+        Split the dataset in two, the first part holding the given
+        fraction of its elements.
+        """
+        if fraction < 0. or fraction > 1.:
+            raise ValueError("The split fraction must be between 0 and 1.")
+        num_first = int(round(len(self)*fraction))
+        return self[:num_first], self[num_first:]
+
+    def _gathered_data(self):
+        "Get the nested arrays in the order of the rows"
+        if self._array_order is None:
+            return self._array_data
+        order = self._array_order
+        return nested_apply(self._array_data, lambda leaf: leaf[order])
+
+    def tf(self):
+        from dryml.data.tf import TFDataset
+        import tensorflow as tf
+
+        if any(type(leaf) is not np.ndarray
+               for leaf in nested_flatten(self._array_data)):
+            # Stream memory mapped data instead of loading all of it
+            return super().tf()
+
+        dataset = tf.data.Dataset.from_tensor_slices(self._gathered_data())
+        if self.batched:
+            dataset = dataset.batch(
+                self.batch_size, drop_remainder=self._drop_remainder)
+
+        return TFDataset(
+            dataset,
+            indexed=self.indexed,
+            supervised=self.supervised,
+            batch_size=self.batch_size,
+            size=self.size)
+
+    def torch(self):
+        from dryml.data.torch import TorchMapDatasetWrapper, TorchDataset
+
+        # Create a map style torch dataset, which torch can sample
+        ds = TorchMapDatasetWrapper(self)
+
+        return TorchDataset(
+            ds,
+            indexed=self.indexed,
+            supervised=self.supervised,
+            batch_size=self.batch_size,
+            size=self.size)
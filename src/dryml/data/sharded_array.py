@@ -0,0 +1,118 @@
+import os
+import numpy as np
+from typing import List
+
+
+class ShardedArray(object):
+    """
+    Arrays concatenated along their first axis without copying them, such
+    as memory mapped .npy shards. Slices within a shard are views of it,
+    slices spanning shards are ShardedArrays, and rows gathered by index
+    are copied into a new array. Converting it with np.asarray
+    concatenates the shards.
+    """
+
+    def __init__(self, shards: List[np.ndarray]):
+        if len(shards) == 0:
+            raise ValueError("A ShardedArray needs at least one shard.")
+        shards = list(shards)
+        for shard in shards[1:]:
+            if shard.shape[1:] != shards[0].shape[1:] or \
+                    shard.dtype != shards[0].dtype:
+                raise ValueError(
+                    f"Shards have different row shapes or dtypes: "
+                    f"{shards[0].shape[1:]} {shards[0].dtype} and "
+                    f"{shard.shape[1:]} {shard.dtype}")
+        self.shards = shards
+        self.offsets = np.cumsum([0]+[len(shard) for shard in shards])
+
+    @staticmethod
+    def load(directory: str, mmap_mode: str = 'r') -> 'ShardedArray':
+        """
+        Memory map the .npy files of a directory as the shards of an
+        array, in the order of their names.
+        """
+        filenames = sorted(
+            f for f in os.listdir(directory) if f.endswith('.npy'))
+        if len(filenames) == 0:
+            raise ValueError(f"No .npy files in {directory}")
+        return ShardedArray([
+            np.load(os.path.join(directory, f), mmap_mode=mmap_mode)
+            for f in filenames])
+
+    @property
+    def shape(self):
+        return (int(self.offsets[-1]),)+self.shards[0].shape[1:]
+
+    @property
+    def dtype(self):
+        return self.shards[0].dtype
+
+    @property
+    def ndim(self):
+        return self.shards[0].ndim
+
+    def __len__(self):
+        return int(self.offsets[-1])
+
+    def _shard_of(self, rows):
+        "Get the shard holding each row"
+        return np.searchsorted(self.offsets, rows, side='right')-1
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            if step != 1:
+                return self[np.arange(start, stop, step)]
+            if stop <= start:
+                return self.shards[0][0:0]
+            first = self._shard_of(start)
+            last = self._shard_of(stop-1)
+            start -= self.offsets[first]
+            stop -= self.offsets[last]
+            if first == last:
+                return self.shards[first][start:stop]
+            return ShardedArray(
+                [self.shards[first][start:]] +
+                self.shards[first+1:last] +
+                [self.shards[last][:stop]])
+
+        if isinstance(key, (list, np.ndarray)):
+            rows = np.asarray(key)
+            if rows.dtype == bool:
+                rows = np.nonzero(rows)[0]
+            rows = np.where(rows < 0, rows+len(self), rows)
+            if len(rows) > 0 and (rows.min() < 0 or rows.max() >= len(self)):
+                raise IndexError("ShardedArray index out of range")
+            shard_ids = self._shard_of(rows)
+            result = np.empty((len(rows),)+self.shape[1:], dtype=self.dtype)
+            for shard_id in np.unique(shard_ids):
+                mask = shard_ids == shard_id
+                result[mask] = \
+                    self.shards[shard_id][rows[mask]-self.offsets[shard_id]]
+            return result
+
+        if isinstance(key, tuple):
+            raise TypeError("ShardedArrays can only be indexed by rows")
+
+        i = int(key)
+        if i < 0:
+            i += len(self)
+        if i < 0 or i >= len(self):
+            raise IndexError("ShardedArray index out of range")
+        shard_id = self._shard_of(i)
+        return self.shards[shard_id][i-self.offsets[shard_id]]
+
+    def __iter__(self):
+        for shard in self.shards:
+            yield from shard
+
+    def __array__(self, dtype=None, copy=None):
+        array = np.concatenate(self.shards, axis=0)
+        if dtype is not None:
+            array = array.astype(dtype)
+        return array
+
+    def __repr__(self):
+        return f"ShardedArray(shape={self.shape}, dtype={self.dtype}, " \
+            f"shards={len(self.shards)})"
@@ -1,8 +1,10 @@
-from dryml.data.torch.dataset import TorchDataset, TorchIterableDatasetWrapper
+from dryml.data.torch.dataset import TorchDataset, \
+    TorchIterableDatasetWrapper, TorchMapDatasetWrapper
 import dryml.data.torch.transforms as transforms
 
 __all__ = [
     TorchDataset,
     TorchIterableDatasetWrapper,
+    TorchMapDatasetWrapper,
     transforms,
 ]
@@ -3,7 +3,8 @@ from dryml.data import Dataset, \
 from typing import Callable
 import torch
 import numpy as np
-from dryml.data.util import taker, skiper, nested_batcher
+from dryml.data.util import taker, skiper, nested_batcher, \
+    buffered_shuffler
 
 
 class TorchIterableDatasetWrapper(torch.utils.data.IterableDataset):
@@ -15,6 +16,26 @@ class TorchIterableDatasetWrapper(torch.utils.data.IterableDataset):
         return iter(self.iterable_gen())
 
 
+class TorchMapDatasetWrapper(torch.utils.data.Dataset):
+    """
+    A map style torch dataset over a dataset which can be accessed by
+    index, converting its elements to tensors.
+    """
+
+    def __init__(self, dataset: Dataset):
+        self.dataset = dataset
+        self.to_tensor = util.nestize(torch.tensor)
+
+    def __len__(self):
+        return len(self.dataset)
+
+    def __getitem__(self, i):
+        return self.to_tensor(self.dataset[i])
+
+    def __iter__(self):
+        return map(self.to_tensor, iter(self.dataset))
+
+
 class TorchDataset(Dataset):
     def __init__(
             self, in_ds: torch.utils.data.Dataset, indexed=False,
@@ -213,48 +234,20 @@ class TorchDataset(Dataset):
         return self
 
     def shuffle(self, buffer_size, seed=None):
-        # create generator of data
-        def shuffler():
-            # Create new generator
-            rng = np.random.default_rng(seed=seed)
-
-            # create iterator on unbatched data
-            ds_iter = iter(self.unbatch())
-
-            # create buffer and fill it
-            el_buffer = []
-
-            # Fill the buffer
-            for idx in range(buffer_size):
-                try:
-                    el_buffer.append(next(ds_iter))
-                except StopIteration:
-                    break
-
-            while True:
-                # Compute size of buffer, and break out if nothing left
-                num_in_buffer = len(el_buffer)
-                if num_in_buffer == 0:
-                    break
-
-                if num_in_buffer > 1:
-                    idx = rng.integers(low=0, high=num_in_buffer-1)
-                else:
-                    idx = 0
-
-                yield el_buffer.pop(idx)
-
-                # Try to refill the buffer here
-                try:
-                    el_buffer.append(next(ds_iter))
-                except StopIteration:
-                    pass
-
+        """
+        Shuffle the elements of this dataset, drawing each one at random
+        from a buffer of the next buffer_size elements. The whole dataset
+        is shuffled if buffer_size is None.
+        """
+        unbatched = self.unbatch()
         ds = TorchIterableDatasetWrapper(
-            shuffler)
+            lambda: buffered_shuffler(
+                lambda: iter(unbatched), buffer_size, seed=seed))
 
         return TorchDataset(
             ds,
             indexed=self.indexed,
             supervised=self.supervised,
-            batch_size=None)
+            batch_size=None,
+            # Unbatching keeps the number of batches, not rows
+            size=np.nan if self.batched else self.size)
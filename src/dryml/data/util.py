@@ -3,6 +3,8 @@ Utility functions for data methods
 """
 
 import inspect
+import itertools
+import numpy as np
 from typing import Callable
 
 
@@ -24,6 +26,8 @@ def nested_flatten(data):
 
 
 def renest_flat(shape_data, flat_data):
+    it = iter(flat_data)
+
     def _renester(data):
         if type(data) is dict:
             res = {}
@@ -36,13 +40,44 @@ def renest_flat(shape_data, flat_data):
                 res.append(_renester(el))
             return tuple(res)
         else:
-            return flat_data.pop(0)
+            return next(it)
 
     res = _renester(shape_data)
 
     return res
 
 
+def nested_renester(shape_data) -> Callable:
+    """
+    Plan the renesting of flat data into the structure of shape_data once,
+    returning a function which renests a list of leaves, in the order
+    given by nested_flatten.
+    """
+    counter = itertools.count()
+
+    def _is_leaf(data):
+        return type(data) is not dict and type(data) is not tuple
+
+    def _plan(data):
+        if type(data) is dict:
+            items = [(key, _plan(data[key])) for key in data]
+            return lambda flat: {key: f(flat) for key, f in items}
+        elif type(data) is tuple:
+            if all(map(_is_leaf, data)):
+                # A tuple of leaves is a slice of the flat data
+                indices = [next(counter) for _ in data]
+                start = indices[0] if len(indices) > 0 else 0
+                stop = start+len(indices)
+                return lambda flat: tuple(flat[start:stop])
+            parts = [_plan(el) for el in data]
+            return lambda flat: tuple(f(flat) for f in parts)
+        else:
+            i = next(counter)
+            return lambda flat: flat[i]
+
+    return _plan(shape_data)
+
+
 def nested_apply(data, func_lambda, *func_args, **func_kwargs):
     flattened_data = nested_flatten(data)
     flattened_data = list(map(
@@ -75,58 +110,116 @@ def get_data_batch_size(full_data=None, flat_data=None):
     return lengths.pop()
 
 
+def nested_flattener(shape_data) -> Callable:
+    """
+    Get a function flattening elements with the structure of shape_data,
+    like nested_flatten. Single leaves and tuples of leaves are returned
+    as they are, without walking them.
+    """
+    if type(shape_data) is tuple and \
+            all(type(el) not in (dict, tuple) for el in shape_data):
+        return lambda data: data
+    elif type(shape_data) not in (dict, tuple):
+        return lambda data: (data,)
+    else:
+        return nested_flatten
+
+
+def stack_arrays(leaves) -> np.ndarray:
+    """
+    Stack a sequence of leaves along a new first axis, like np.stack. A
+    sequence of numeric arrays is copied into a single new array at once.
+    """
+    first = leaves[0]
+    if type(first) is np.ndarray and not first.dtype.hasobject:
+        batch = np.array(leaves)
+        if batch.shape[1:] != first.shape:
+            raise ValueError("all input arrays must have the same shape")
+        return batch
+    return np.stack(leaves, axis=0)
+
+
 def nested_batcher(data_gen, batch_size, stack_method, drop_remainder=True):
     it = iter(data_gen())
+    flattener = None
+    renester = None
     while True:
-        flat_batch_data = None
-        flat_batch_shape = None
-        num_collected = 0
-        try:
-            # Fill up batches
-            while True:
-                el = next(it)
-                el_flat = nested_flatten(el)
-                if flat_batch_data is None:
-                    flat_batch_shape = el
-                    flat_batch_data = list(
-                        map(lambda e: list(),
-                            el_flat))
-                for i in range(len(el_flat)):
-                    flat_batch_data[i].append(el_flat[i])
-                num_collected += 1
-                if num_collected >= batch_size:
-                    break
-        except StopIteration:
-            # Catch stop iteration for partial batches
-            pass
-        if drop_remainder and num_collected != batch_size:
+        # Fill up batches
+        elements = list(itertools.islice(it, batch_size))
+        if len(elements) == 0:
+            break
+        if drop_remainder and len(elements) != batch_size:
             # Exit now and don't yield
             break
-        # if we have a non-empty batch, yield it.
-        if flat_batch_data is not None and \
-                len(flat_batch_data) > 0:
-            flat_batch_data = list(map(
-                stack_method,
-                flat_batch_data))
-            yield renest_flat(
-                flat_batch_shape,
-                flat_batch_data)
+        if renester is None:
+            # The structure is planned once for the whole stream
+            flattener = nested_flattener(elements[0])
+            renester = nested_renester(elements[0])
+        flat_elements = list(map(flattener, elements))
+        num_leaves = set(map(len, flat_elements))
+        if len(num_leaves) > 1:
+            raise ValueError(
+                f"Inconsistent element structures with {num_leaves} leaves")
+        yield renester(list(map(stack_method, zip(*flat_elements))))
+
+
+def array_batcher(data, batch_size, drop_remainder=True, order=None):
+    """
+    Yield batches of batch_size rows of nested arrays as slices, without
+    copying them. If order is given, batches instead gather the rows at
+    the indices it holds, in order.
+    """
+    flat_data = nested_flatten(data)
+    size = get_data_batch_size(flat_data=flat_data)
+    if order is not None:
+        size = len(order)
+    renester = nested_renester(data)
+    stop = size
+    if drop_remainder:
+        stop -= size % batch_size
+    for i in range(0, stop, batch_size):
+        if order is None:
+            rows = slice(i, i+batch_size)
         else:
-            break
+            rows = order[i:i+batch_size]
+        # Slices of sharded arrays may span shards
+        yield renester([np.asarray(leaf[rows]) for leaf in flat_data])
+
+
+def buffered_shuffler(data_gen, buffer_size=None, seed=None):
+    """
+    Shuffle a stream, yielding elements drawn at random from a buffer of
+    the next buffer_size elements. Each element drawn is replaced by the
+    next one in the stream. The whole stream is buffered if buffer_size
+    is None.
+    """
+    rng = np.random.default_rng(seed=seed)
+    it = iter(data_gen())
+    buffer = list(itertools.islice(it, buffer_size))
+    num_in_buffer = len(buffer)
+    end = object()
+    el = end if num_in_buffer == 0 else None
+    while el is not end:
+        # Draw slots in blocks, the buffer stays full until the stream
+        # ends.
+        for idx in rng.integers(num_in_buffer, size=1024).tolist():
+            el = next(it, end)
+            if el is end:
+                break
+            yield buffer[idx]
+            buffer[idx] = el
+    # Drain the rest of the buffer in a random order
+    for idx in rng.permutation(num_in_buffer).tolist():
+        yield buffer[idx]
 
 
 def nested_unbatcher(data_gen):
-    it = iter(data_gen())
-    while True:
-        try:
-            d = next(it)
-        except StopIteration:
-            return
+    for d in data_gen():
         flat_d = nested_flatten(d)
-        length = get_data_batch_size(flat_data=flat_d)
-        for i in range(length):
-            new_d = list(map(lambda el: el[i], flat_d))
-            yield renest_flat(d, new_d)
+        get_data_batch_size(flat_data=flat_d)
+        renester = nested_renester(d)
+        for new_d in zip(*flat_d):
+            yield renester(new_d)
 
 
 def taker(gen_func, n):
@@ -1,7 +1,17 @@
 import io
+import os
+import mmap
+import shutil
+import struct
+import weakref
 from io import BufferedIOBase
 import tempfile
 import zipfile
+from typing import Optional
+
+
+# Size of chunks used when copying file content
+COPY_CHUNK_SIZE = 16*1024*1024
 
 
 class FileIntermediary(BufferedIOBase):
@@ -103,7 +113,7 @@ class FileIntermediary(BufferedIOBase):
         self.close()
 
     # My methods
-    def write_to_file(self, file):
+    def write_to_file(self, file, chunk_size: int = COPY_CHUNK_SIZE):
         # Save current file position
         cur_pos = self.tell()
 
@@ -111,12 +121,270 @@ class FileIntermediary(BufferedIOBase):
         self.flush()
         self.seek(0)
 
-        # Read current file content into file
+        # Copy current file content into file, a chunk at a time so
+        # the content is never held in memory all at once.
         if type(file) is str:
-            file = open(file, 'wb')
-
-        self.seek(0)
-        file.write(self.read())
+            with open(file, 'wb') as f:
+                shutil.copyfileobj(self.tmp_file, f, chunk_size)
+        else:
+            shutil.copyfileobj(self.tmp_file, file, chunk_size)
 
         # Restore position
         self.seek(cur_pos)
+
+
+class FileSegment(BufferedIOBase):
+    """
+    A read-only view of a contiguous byte range of a file on disk.
+
+    Nothing is read when a segment is created. The range is memory mapped
+    the first time it's read from, so large payloads can be referenced
+    without copying them. A segment records the identity of its backing
+    file and refuses to read from it if the file has since been replaced.
+    """
+
+    # Track live segments so they can be materialized before their
+    # backing file is overwritten.
+    _live_segments = weakref.WeakSet()
+
+    def __init__(self, filepath: str, offset: int, size: int):
+        self.filepath = os.path.realpath(filepath)
+        self.offset = offset
+        self._size = size
+        self._file_sig = FileSegment._file_signature(
+            os.stat(self.filepath))
+        self._pos = 0
+        self._map = None
+        self._map_delta = 0
+        self._int_file = None
+        self._closed = False
+        FileSegment._live_segments.add(self)
+
+    @staticmethod
+    def _file_signature(st):
+        return (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+
+    @staticmethod
+    def materialize_file(filepath: str):
+        """
+        Materialize all live segments backed by the given file.
+        Call this before overwriting or truncating the file.
+        """
+        filepath = os.path.realpath(filepath)
+        for segment in list(FileSegment._live_segments):
+            if segment.filepath == filepath:
+                segment.materialize()
+
+    def _open_backing_file(self):
+        f = open(self.filepath, 'rb')
+        sig = FileSegment._file_signature(os.fstat(f.fileno()))
+        if sig != self._file_sig:
+            f.close()
+            raise RuntimeError(
+                f"File {self.filepath} has changed since segment "
+                f"at offset {self.offset} was created!")
+        return f
+
+    def _mapping(self):
+        if self._map is None:
+            with self._open_backing_file() as f:
+                granularity = mmap.ALLOCATIONGRANULARITY
+                map_offset = self.offset - (self.offset % granularity)
+                self._map_delta = self.offset - map_offset
+                self._map = mmap.mmap(
+                    f.fileno(), self._map_delta + self._size,
+                    offset=map_offset, access=mmap.ACCESS_READ)
+        return self._map
+
+    @property
+    def is_materialized(self):
+        return self._int_file is not None
+
+    def is_valid(self) -> bool:
+        "Whether the segment's content can still be read"
+        if self._closed:
+            return False
+        if self._int_file is not None:
+            return True
+        try:
+            st = os.stat(self.filepath)
+        except FileNotFoundError:
+            return False
+        return FileSegment._file_signature(st) == self._file_sig
+
+    def materialize(self):
+        """
+        Copy the segment's content into an intermediary so it no longer
+        depends on the backing file.
+        """
+        if self._closed or self._int_file is not None:
+            return
+        int_file = FileIntermediary()
+        self.write_to_file(int_file)
+        int_file.seek(self._pos)
+        self._release_mapping()
+        self._int_file = int_file
+
+    def _release_mapping(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+    # Implement IOBase, and Buffered IOBase members
+    def close(self):
+        if self._closed:
+            return
+        self._release_mapping()
+        if self._int_file is not None:
+            self._int_file.close()
+        self._closed = True
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def writable(self):
+        return False
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if self._int_file is not None:
+            return self._int_file.seek(offset, whence)
+        if whence == io.SEEK_SET:
+            new_pos = offset
+        elif whence == io.SEEK_CUR:
+            new_pos = self._pos + offset
+        elif whence == io.SEEK_END:
+            new_pos = self._size + offset
+        else:
+            raise ValueError(f"Invalid whence ({whence})")
+        if new_pos < 0:
+            raise ValueError(f"Negative seek position {new_pos}")
+        self._pos = new_pos
+        return self._pos
+
+    def tell(self):
+        if self._int_file is not None:
+            return self._int_file.tell()
+        return self._pos
+
+    def read(self, size=-1):
+        if self._int_file is not None:
+            return self._int_file.read(size)
+        remaining = max(self._size - self._pos, 0)
+        if size is None or size < 0 or size > remaining:
+            size = remaining
+        if size == 0:
+            return b''
+        mapping = self._mapping()
+        start = self._map_delta + self._pos
+        data = mapping[start:start+size]
+        self._pos += size
+        return data
+
+    def read1(self, size=-1):
+        return self.read(size)
+
+    def readinto(self, b):
+        data = self.read(len(b))
+        b[:len(data)] = data
+        return len(data)
+
+    def readinto1(self, b):
+        return self.readinto(b)
+
+    def size(self):
+        return self._size
+
+    def is_empty(self):
+        empty = False
+        if self._size != 0:
+            old_pos = self.tell()
+            self.seek(0)
+            with zipfile.ZipFile(
+                    self, mode='r') as zf:
+                if len(zf.namelist()) == 0:
+                    empty = True
+            self.seek(old_pos)
+        return empty
+
+    def __del__(self):
+        self.close()
+
+    # My methods
+    def write_to_file(self, file, chunk_size=COPY_CHUNK_SIZE):
+        if self._int_file is not None:
+            return self._int_file.write_to_file(file, chunk_size=chunk_size)
+
+        if type(file) is str:
+            with open(file, 'wb') as f:
+                self._copy_to(f, chunk_size)
+        else:
+            self._copy_to(file, chunk_size)
+
+    def _copy_to(self, file, chunk_size):
+        # Copy straight from the backing file, without mapping it.
+        with self._open_backing_file() as f:
+            f.seek(self.offset)
+            remaining = self._size
+            while remaining > 0:
+                chunk = f.read(min(chunk_size, remaining))
+                if len(chunk) == 0:
+                    raise RuntimeError(
+                        f"File {self.filepath} ended before segment "
+                        f"at offset {self.offset} was fully read!")
+                file.write(chunk)
+                remaining -= len(chunk)
+
+
+def zip_member_segment(
+        zf: zipfile.ZipFile, name: str) -> Optional[FileSegment]:
+    """
+    Get a FileSegment spanning the data of an uncompressed zip member.
+    Returns None when the zip isn't backed by a file on disk, or the
+    member can't be read in place.
+    """
+    info = zf.getinfo(name)
+    if info.compress_type != zipfile.ZIP_STORED or info.flag_bits & 0x1:
+        return None
+
+    # Determine where the zipfile itself lives.
+    fp = zf.fp
+    if isinstance(fp, FileSegment) and not fp.is_materialized:
+        filepath = fp.filepath
+        base_offset = fp.offset
+    elif isinstance(fp, io.BufferedReader) and type(fp.name) is str:
+        filepath = fp.name
+        base_offset = 0
+    else:
+        return None
+
+    # The local header may have a different extra field than the central
+    # directory, so we need to read it to find the data offset.
+    old_pos = fp.tell()
+    fp.seek(info.header_offset)
+    header = fp.read(zipfile.sizeFileHeader)
+    fp.seek(old_pos)
+    if len(header) != zipfile.sizeFileHeader or \
+            header[0:4] != zipfile.stringFileHeader:
+        return None
+    fname_len, extra_len = struct.unpack('<HH', header[26:30])
+    data_offset = info.header_offset + zipfile.sizeFileHeader + \
+        fname_len + extra_len
+
+    return FileSegment(filepath, base_offset + data_offset, info.file_size)
+
+
+def open_zip_member(zf: zipfile.ZipFile, name: str):
+    """
+    Open a zip member for reading, in place on disk if possible.
+    """
+    segment = zip_member_segment(zf, name)
+    if segment is not None:
+        return segment
+    return zf.open(name, 'r')
@@ -1,7 +1,7 @@
-import pickle
 import zipfile
 import numpy as np
 from dryml.config import Meta
+from dryml.arrays import dump_with_arrays, load_with_arrays
 from dryml.models import Component, Trainable
 from dryml.models import TrainFunction as BaseTrainFunction
 from dryml.data import Dataset
@@ -31,15 +31,19 @@ class Model(Component):
             return True
         else:
             with file.open(pkl_file_name, 'r') as f:
-                self.mdl = pickle.loads(f.read())
+                self.mdl = load_with_arrays(f.read(), file)
         return True
 
     def save_compute_imp(self, file: zipfile.ZipFile) -> bool:
         # Save Weights
         if self.mdl is not None:
+            # Large fitted arrays, like the training data of neighbors
+            # models, are kept in .npy members so they can be mapped
+            # when loaded.
             pkl_file_name = 'model.pkl'
+            data = dump_with_arrays(self.mdl, file, 'model_arrays/')
             with file.open(pkl_file_name, 'w') as f:
-                f.write(pickle.dumps(self.mdl))
+                f.write(data)
 
         return True
 
@@ -38,6 +38,7 @@ class Trainable(Object):
     def train(self, *args, train_spec=None, train_callbacks=[]):
         # Handle the setting of the train state flag
         self.train_state = Trainable.trained
+        self.mark_modified()
         # This should be the last step in training so no more super is needed
 
     def eval(self, data, *args, **kwargs):
@@ -6,27 +6,51 @@ import os
 import dill
 import pickle
 import io
+import itertools
 import zipfile
 import uuid
 import re
+import shutil
 import numpy as np
+import threading
 import time
+import concurrent.futures
+import contextlib
 
 from typing import IO, Union, Optional, Type, Callable
 from dryml.config import ObjectDef, Meta, MissingIdError, MissingMetadataError
 from dryml.utils import get_current_cls, pickler, static_var, \
     is_supported_scalar_type, is_supported_listlike, is_supported_dictlike, \
     map_dictlike, map_listlike, get_class_from_str, get_class_str, \
-    diff_recursive
+    diff_recursive, ReproducibleZipFile
 from dryml.context.context_tracker import combine_requests, context, \
     NoContextError
-from dryml.file_intermediary import FileIntermediary
+from dryml.file_intermediary import FileIntermediary, FileSegment, \
+    open_zip_member
 from dryml.save_cache import SaveCache
+from dryml.blob_store import BlobStore, write_blob_ref, open_blob_ref
+from dryml.compression import CompressionPolicy, CompressionType
 
 
 FileType = Union[str, IO[bytes]]
 
 
+def dump_class_def(cls: Type) -> Optional[bytes]:
+    """
+    Pickle a class definition. Returns None for classes dill can't
+    pickle, which are then saved by name.
+    """
+    try:
+        return dill.dumps(cls)
+    except TypeError as e:
+        if '_abc_data' in str(e):
+            # In some cases, the class's _abc_impl
+            # attribute seems wrongly constructed?
+            # https://github.com/uqfoundation/dill/issues/332
+            return None
+        raise e
+
+
 def file_resolve(file: str, exact_path: bool = False) -> str:
     if os.path.splitext(file)[1] == '' and not exact_path:
         file = f"{file}.dry"
@@ -34,18 +58,23 @@ def file_resolve(file: str, exact_path: bool = False) -> str:
 
 
 class ObjectFile(object):
-    contained_dry_file_re = re.compile(r"^dry_objects/([a-f0-9-]*)\.dry$")
+    contained_dry_file_re = re.compile(
+        r"^dry_objects/([a-f0-9-]*)\.(dry|ref)$")
+    manifest_name = 'manifest.pkl'
 
     # Supports 'save cached' file writing.
     def __init__(self, file: FileType, exact_path: bool = False,
                  mode: str = 'r', must_exist: bool = True,
-                 save_cache=None, save_caching=True):
+                 save_cache=None, save_caching=True,
+                 compression: Optional[CompressionPolicy] = None):
 
         if type(file) is zipfile.ZipFile:
             raise TypeError(
                 "Passing zipfiles directly is currently not supported.")
 
         self.mode = mode
+        self.compression = compression
+        self._manifest = None
 
         # If file is a string, resolve it to a filepath, and save this filepath
         if type(file) is str:
@@ -57,8 +86,18 @@ class ObjectFile(object):
 
         if self.mode == 'w':
             self._z_file = None
+            # Entries to add to save caches once the file is complete
+            self._cache_on_close = []
             if hasattr(self, 'filepath'):
-                self.binary_file = open(self.filepath, 'wb')
+                # Stream straight into a temporary file next to the
+                # target, which replaces the target once it's complete.
+                directory, filename = os.path.split(
+                    os.path.abspath(self.filepath))
+                self.tmp_filepath = os.path.join(
+                    directory, f".{filename}.{uuid.uuid4().hex}.tmp")
+                self.binary_file = os.fdopen(os.open(
+                    self.tmp_filepath,
+                    os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666), 'wb')
             else:
                 self.binary_file = file
         elif self.mode == 'r':
@@ -85,10 +124,19 @@ class ObjectFile(object):
             if self._z_file is not None:
                 return self._z_file
 
+            if hasattr(self, 'filepath'):
+                # Write members directly to the file on disk.
+                self._z_file = ReproducibleZipFile(
+                    self.binary_file, mode=self.mode,
+                    compression_policy=self.compression)
+                return self._z_file
+
             self.int_file = FileIntermediary()
             self.close_int_file = True
 
-            self._z_file = zipfile.ZipFile(self.int_file, mode=self.mode)
+            self._z_file = ReproducibleZipFile(
+                self.int_file, mode=self.mode,
+                compression_policy=self.compression)
             return self._z_file
         elif self.mode == 'r':
             return self._z_file
@@ -97,7 +145,7 @@ class ObjectFile(object):
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        self.close()
+        self.close(discard=exc_type is not None)
 
     def int_file_detach(self):
         if not hasattr(self, 'int_file'):
@@ -106,7 +154,21 @@ class ObjectFile(object):
         self.close_int_file = False
         return self.int_file
 
-    def close(self):
+    def cache_file(self, save_cache: SaveCache, obj: Object):
+        """
+        Store the written file content in a save cache. Content streamed
+        to disk is cached as a segment of the final file once it's closed.
+        """
+        if hasattr(self, 'int_file'):
+            save_cache.set_object(obj, self.int_file_detach())
+        else:
+            self._cache_on_close.append((save_cache, obj))
+
+    def close(self, discard: bool = False):
+        """
+        Close the file. When writing, discard leaves any existing file
+        at the target path untouched.
+        """
         # Close the zipfile.
         if self._z_file is not None:
             # Avoid accessing z_file property if it doesn't already exist.
@@ -117,7 +179,7 @@ class ObjectFile(object):
         # If we have a binary open, sync any intermediary and close it.
         if hasattr(self, 'binary_file'):
             if self.mode == 'w':
-                if hasattr(self, 'int_file'):
+                if hasattr(self, 'int_file') and not discard:
                     # If there's an intermediary file open, write it to the
                     # binary file.
                     self.int_file.write_to_file(self.binary_file)
@@ -125,24 +187,88 @@ class ObjectFile(object):
                 # We opened the binary file. we should close it.
                 self.binary_file.close()
 
+        # Move a completed temporary file into place.
+        if self.mode == 'w' and hasattr(self, 'filepath'):
+            if discard:
+                os.remove(self.tmp_filepath)
+            else:
+                self._replace_target()
+
         # Close the intermediary if needed.
         if hasattr(self, 'int_file'):
             if self.close_int_file:
                 self.int_file.close()
 
+    def _replace_target(self):
+        # Content cached for the objects saved here is replaced by the
+        # new file, so it doesn't need to be kept.
+        for save_cache, obj in self._cache_on_close:
+            save_cache.discard_object(obj)
+
+        if os.path.exists(self.filepath):
+            # Objects loaded from this file may still reference their
+            # data within it. Detach them before it's replaced.
+            FileSegment.materialize_file(self.filepath)
+            shutil.copymode(self.filepath, self.tmp_filepath)
+        os.replace(self.tmp_filepath, self.filepath)
+
+        if len(self._cache_on_close) > 0:
+            segment = FileSegment(
+                self.filepath, 0, os.path.getsize(self.filepath))
+            for save_cache, obj in self._cache_on_close:
+                save_cache.set_object(obj, segment)
+
     # def update_file(self, obj: Object):
     #     self.cache_object_data_obj(obj)
 
-    def save_meta_data(self):
+    def save_meta_data(self, version: int = 1):
         # Meta_data
         meta_data = {
-            'version': 1
+            'version': version
         }
 
         meta_dump = pickler(meta_data)
         with self.z_file.open('meta_data.pkl', mode='w') as f:
             f.write(meta_dump)
 
+    def save_manifest_v2(self, obj_def: ObjectDef):
+        """
+        Save the version 2 manifest. It holds the object's definition and
+        its contained objects, so it's written after all other members.
+        """
+        objects = {}
+        for name in self.z_file.namelist():
+            m = ObjectFile.contained_dry_file_re.match(name)
+            if m is not None:
+                objects[m.groups()[0]] = name
+
+        manifest = {
+            'version': 2,
+            'cls_str': get_class_str(obj_def.cls),
+            'args': obj_def.args,
+            'kwargs': obj_def.kwargs,
+            'dry_mut': obj_def.dry_mut,
+            'objects': objects,
+        }
+        with self.z_file.open(ObjectFile.manifest_name, mode='w') as f:
+            f.write(pickler(manifest))
+        self._manifest = manifest
+
+    def load_manifest(self):
+        "Load the version 2 manifest, or None for older files"
+        if self._manifest is None:
+            if ObjectFile.manifest_name not in self.z_file.namelist():
+                return None
+            with self.z_file.open(ObjectFile.manifest_name, 'r') as f:
+                self._manifest = pickle.loads(f.read())
+        return self._manifest
+
+    def file_version(self) -> int:
+        manifest = self.load_manifest()
+        if manifest is not None:
+            return manifest['version']
+        return self.load_meta_data()['version']
+
     def load_meta_data(self):
         try:
             with self.z_file.open('meta_data.pkl', 'r') as meta_file:
@@ -154,34 +280,50 @@ class ObjectFile(object):
             raise e
         return meta_data
 
-    def save_class_def_v1(self, obj_def: ObjectDef, update: bool = False):
+    def save_class_def_v1(self, obj_def: ObjectDef, update: bool = False,
+                          save_cache=None):
         # We need to pickle the class definition.
         # By default, error out if class has changed. Check this.
         mod_cls = get_current_cls(obj_def.cls)
         if obj_def.cls != mod_cls and not update:
             raise ValueError("Can't save class definition! It's been changed!")
-        try:
-            cls_def = dill.dumps(mod_cls)
+
+        # Each class only needs to be pickled once per save.
+        if save_cache is not None and mod_cls in save_cache.class_def_cache:
+            cls_def = save_cache.class_def_cache[mod_cls]
+        else:
+            cls_def = dump_class_def(mod_cls)
+            if save_cache is not None:
+                save_cache.class_def_cache[mod_cls] = cls_def
+
+        if cls_def is None:
+            # Fallback to pickling the class name.
+            cls_str = get_class_str(mod_cls)
+            with self.z_file.open('cls_str.txt', mode='w') as f:
+                f.write(cls_str.encode('utf-8'))
+        elif save_cache is not None and save_cache.blob_store is not None:
+            # Keep a single copy of the class in the blob store.
+            blob_store = save_cache.blob_store
+            digest = save_cache.class_def_digests.get(mod_cls, None)
+            if digest is None or digest not in blob_store:
+                digest = blob_store.put(io.BytesIO(cls_def))
+                save_cache.class_def_digests[mod_cls] = digest
+            write_blob_ref(self.z_file, 'cls_def.ref', digest)
+        else:
             with self.z_file.open('cls_def.dill', mode='w') as f:
                 f.write(cls_def)
-        except TypeError as e:
-            if '_abc_data' in str(e):
-                # Fallback to pickling the class name.
-                # In some cases, the class's _abc_impl
-                # attribute seems wrongly constructed?
-                # https://github.com/uqfoundation/dill/issues/332
-                cls_str = get_class_str(mod_cls)
-                with self.z_file.open('cls_str.txt', mode='w') as f:
-                    f.write(cls_str.encode('utf-8'))
-            else:
-                raise e
 
     def load_class_def_v1(self, update: bool = True, reload: bool = False):
         "Helper function for loading a version 1 class definition"
         namelist = self.z_file.namelist()
         # Get class definition
-        if 'cls_def.dill' in namelist:
-            with self.z_file.open('cls_def.dill') as cls_def_file:
+        if 'cls_def.dill' in namelist or 'cls_def.ref' in namelist:
+            if 'cls_def.dill' in namelist:
+                cls_def_file = self.z_file.open('cls_def.dill')
+            else:
+                cls_def_file = open_blob_ref(
+                    self.z_file, 'cls_def.ref', self.blob_store())
+            with cls_def_file:
                 if update:
                     # Get original model definition
                     cls_def_init = dill.loads(cls_def_file.read())
@@ -201,10 +343,36 @@ class ObjectFile(object):
         else:
             raise RuntimeError("No stored class data!")
 
-    def save_definition_v1(self, obj_def: ObjectDef, update: bool = False):
+    def load_class_def_v2(self, update: bool = True, reload: bool = False):
+        """
+        Helper function for loading a version 2 class definition. The
+        pickled class is only read if it's needed.
+        """
+        cls_str = self.load_manifest()['cls_str']
+        namelist = self.z_file.namelist()
+        has_cls_def = 'cls_def.dill' in namelist or 'cls_def.ref' in namelist
+        if update or not has_cls_def:
+            try:
+                return get_class_from_str(cls_str, reload=reload)
+            except (ImportError, AttributeError) as e:
+                if not has_cls_def:
+                    raise RuntimeError(
+                        f"Failed to get class {cls_str}: {e}")
+        return self.load_class_def_v1(update=update, reload=reload)
+
+    def load_definition_v2(self, update: bool = True, reload: bool = False):
+        "Load object def from the manifest"
+        manifest = self.load_manifest()
+        cls = self.load_class_def_v2(update=update, reload=reload)
+        return ObjectDef(
+            cls, *manifest['args'], dry_mut=manifest['dry_mut'],
+            **manifest['kwargs'])
+
+    def save_definition_v1(self, obj_def: ObjectDef, update: bool = False,
+                           save_cache=None):
         "Save object def"
         # Save obj def
-        self.save_class_def_v1(obj_def, update=update)
+        self.save_class_def_v1(obj_def, update=update, save_cache=save_cache)
 
         # Save args from object def
         with self.z_file.open('dry_args.pkl', mode='w') as args_file:
@@ -239,18 +407,30 @@ class ObjectFile(object):
         return ObjectDef(cls, *args, dry_mut=mut, **kwargs)
 
     def definition(self, update: bool = True, reload: bool = False):
-        meta_data = self.load_meta_data()
-        if meta_data['version'] == 1:
+        version = self.file_version()
+        if version == 1:
             return self.load_definition_v1(update=update, reload=reload)
+        elif version == 2:
+            return self.load_definition_v2(update=update, reload=reload)
         else:
             raise RuntimeError(
-                f"File version {meta_data['version']} not supported!")
+                f"File version {version} not supported!")
 
     def load_object_v1(self, update: bool = True,
                        reload: bool = False,
                        as_cls: Optional[Type] = None) -> Object:
-        # Load object
         obj_def = self.load_definition_v1(update=update, reload=reload)
+        return self.load_object_from_def(obj_def, as_cls=as_cls)
+
+    def load_object_v2(self, update: bool = True,
+                       reload: bool = False,
+                       as_cls: Optional[Type] = None) -> Object:
+        obj_def = self.load_definition_v2(update=update, reload=reload)
+        return self.load_object_from_def(obj_def, as_cls=as_cls)
+
+    def load_object_from_def(self, obj_def: ObjectDef,
+                             as_cls: Optional[Type] = None) -> Object:
+        # Load object
         if as_cls is not None:
             obj_def.cls = as_cls
 
@@ -279,55 +459,187 @@ class ObjectFile(object):
     def load_object(self, update: bool = False,
                     reload: bool = False,
                     as_cls: Optional[Type] = None) -> Object:
-        meta_data = self.load_meta_data()
-        version = meta_data['version']
+        version = self.file_version()
         if version == 1:
             return self.load_object_v1(
                 update=update, reload=reload, as_cls=as_cls)
+        elif version == 2:
+            return self.load_object_v2(
+                update=update, reload=reload, as_cls=as_cls)
         else:
             raise RuntimeError(f"DRY version {version} unknown")
 
     def save_object_v1(self, obj: Object, update: bool = False,
                        as_cls: Optional[Type] = None,
-                       save_cache=None) -> bool:
+                       save_cache=None, num_workers: int = 1) -> bool:
+        return self.save_object_version(
+            obj, 1, update=update, as_cls=as_cls, save_cache=save_cache,
+            num_workers=num_workers)
+
+    def save_object_v2(self, obj: Object, update: bool = False,
+                       as_cls: Optional[Type] = None,
+                       save_cache=None, num_workers: int = 1) -> bool:
+        return self.save_object_version(
+            obj, 2, update=update, as_cls=as_cls, save_cache=save_cache,
+            num_workers=num_workers)
+
+    def save_object_version(self, obj: Object, version: int,
+                            update: bool = False,
+                            as_cls: Optional[Type] = None,
+                            save_cache=None, num_workers: int = 1) -> bool:
+        if save_cache is None:
+            return self._save_object_version(
+                obj, version, update=update, as_cls=as_cls,
+                num_workers=num_workers)
+
+        # Contained objects may be saved from several threads. Each is
+        # saved and cached by one thread at a time.
+        with save_cache.object_lock(obj):
+            return self._save_object_version(
+                obj, version, update=update, as_cls=as_cls,
+                save_cache=save_cache, num_workers=num_workers)
+
+    def serialize_sub_objects(self, obj: Object, version: int,
+                              save_cache=None, num_workers: int = 1):
+        """
+        Serialize the contained objects of an object on a pool of threads.
+        Returns the blob digest, when saving to a blob store, or the
+        intermediary file of each object by dry_id, or None on failure.
+        """
+        blob_store = None
+        if save_cache is not None:
+            blob_store = save_cache.blob_store
+
+        sub_objs = {}
+        for sub_obj in obj.__dry_obj_container_list__:
+            sub_objs.setdefault(sub_obj.dry_id, sub_obj)
+
+        def serialize(sub_obj):
+            f = FileIntermediary()
+            try:
+                if not sub_obj.save_self(
+                        f, version=version, save_cache=save_cache):
+                    f.close()
+                    return None
+                if blob_store is not None:
+                    with f:
+                        return blob_store.put(f)
+                return f
+            except Exception as e:
+                f.close()
+                raise e
+
+        with concurrent.futures.ThreadPoolExecutor(
+                max_workers=num_workers) as executor:
+            futures = {
+                obj_id: executor.submit(serialize, sub_obj)
+                for obj_id, sub_obj in sub_objs.items()}
+            concurrent.futures.wait(futures.values())
+
+        serialized = {}
+        error = None
+        for obj_id, future in futures.items():
+            try:
+                serialized[obj_id] = future.result()
+            except Exception as e:
+                if error is None:
+                    error = e
+                serialized[obj_id] = None
+        failed = error is not None or \
+            any(v is None for v in serialized.values())
+        if failed:
+            for v in serialized.values():
+                if isinstance(v, FileIntermediary):
+                    v.close()
+        if error is not None:
+            raise error
+        if failed:
+            return None
+        return serialized
+
+    def _save_object_version(self, obj: Object, version: int,
+                             update: bool = False,
+                             as_cls: Optional[Type] = None,
+                             save_cache=None, num_workers: int = 1) -> bool:
 
         # First, check the save cache.
         if save_cache is not None:
-            # WARNING, the id of an object is only unique for its lifetime.
-            # We must assume objects aren't going out of scope
-            # or being deleted for this to work.
-            if id(obj) in save_cache.obj_cache:
+            saved_int_file = save_cache.get_object(obj)
+            if saved_int_file is not None:
                 # We found the object, write the cached file to
                 # The passed binary.
-                saved_int_file = save_cache.obj_cache[id(obj)]
                 saved_int_file.write_to_file(self.binary_file)
+                if not hasattr(self, 'int_file'):
+                    # Cache the new file in place of the old content
+                    self.cache_file(save_cache, obj)
                 return True
 
         # Save subordinate objects.
-        for sub_obj in obj.__dry_obj_container_list__:
-            # Open a file inside the zip to contain the new object.
-            obj_id = sub_obj.dry_id
-            save_path = f'dry_objects/{obj_id}.dry'
-            if save_path not in self.z_file.namelist():
-                with self.z_file.open(save_path, 'w') as f:
-                    if not sub_obj.save_self(f, save_cache=save_cache):
-                        return False
+        blob_store = None
+        if save_cache is not None:
+            blob_store = save_cache.blob_store
+        serialized = {}
+        if num_workers > 1 and len(obj.__dry_obj_container_list__) > 1:
+            # Serialize them in parallel, and assemble them in order.
+            serialized = self.serialize_sub_objects(
+                obj, version, save_cache=save_cache, num_workers=num_workers)
+            if serialized is None:
+                return False
+        try:
+            for sub_obj in obj.__dry_obj_container_list__:
+                obj_id = sub_obj.dry_id
+                if blob_store is not None:
+                    # Store the object once, and reference it.
+                    ref_path = f'dry_objects/{obj_id}.ref'
+                    if ref_path not in self.z_file.namelist():
+                        digest = serialized.get(obj_id, None)
+                        if digest is None:
+                            with FileIntermediary() as f:
+                                if not sub_obj.save_self(
+                                        f, version=version,
+                                        save_cache=save_cache):
+                                    return False
+                                digest = blob_store.put(f)
+                        write_blob_ref(self.z_file, ref_path, digest)
+                    continue
+
+                # Open a file inside the zip to contain the new object.
+                save_path = f'dry_objects/{obj_id}.dry'
+                if save_path not in self.z_file.namelist():
+                    with self.z_file.open(save_path, 'w') as f:
+                        if obj_id in serialized:
+                            serialized[obj_id].write_to_file(f)
+                        elif not sub_obj.save_self(
+                                f, version=version, save_cache=save_cache):
+                            return False
+        finally:
+            for v in serialized.values():
+                if isinstance(v, FileIntermediary):
+                    v.close()
 
         # Save meta data
-        self.save_meta_data()
+        self.save_meta_data(version=version)
 
-        # Save config v1
         obj_def = obj.definition()
         if as_cls is not None:
             obj_def.cls = as_cls
 
-        self.save_definition_v1(obj_def, update=update)
+        if version == 1:
+            self.save_definition_v1(
+                obj_def, update=update, save_cache=save_cache)
+        else:
+            # The class is also pickled, for loads which don't update it.
+            self.save_class_def_v1(
+                obj_def, update=update, save_cache=save_cache)
 
         # Save object content
         ret_val = obj.save_object(self.z_file, save_cache=save_cache)
 
-        if save_cache is not None:
-            save_cache.obj_cache[id(obj)] = self.int_file_detach()
+        if version == 2:
+            self.save_manifest_v2(obj_def)
+
+        if ret_val and save_cache is not None:
+            self.cache_file(save_cache, obj)
 
         return ret_val
 
@@ -335,6 +647,9 @@ class ObjectFile(object):
         """
         enumerates the ids of contained subordinate objects
         """
+        manifest = self.load_manifest()
+        if manifest is not None:
+            return list(manifest['objects'].keys())
 
         return list(map(
             lambda m: m.groups(1)[0],
@@ -342,70 +657,144 @@ class ObjectFile(object):
                    map(lambda n: ObjectFile.contained_dry_file_re.match(n),
                        self.z_file.namelist()))))
 
+    def blob_store(self) -> Optional[BlobStore]:
+        "Get the blob store used to resolve references in this file"
+        blob_store = get_load_blob_store()
+        if blob_store is None and hasattr(self, 'filepath'):
+            blob_store = BlobStore.find_for_file(self.filepath)
+        return blob_store
+
     def get_contained_object_file(self, dry_id):
-        return self.z_file.open(f"dry_objects/{dry_id}.dry")
+        ref_path = f"dry_objects/{dry_id}.ref"
+        if ref_path in self.z_file.namelist():
+            return open_blob_ref(
+                self.z_file, ref_path, self.blob_store())
+        return open_zip_member(self.z_file, f"dry_objects/{dry_id}.dry")
+
+
+class LoadState(threading.local):
+    """
+    State shared by the nested load calls of a single top level
+    load. Each thread loads independently.
+    """
+    def __init__(self):
+        self.load_repo = None
+        self.load_blob_store = None
+
+    def __reduce__(self):
+        # The state is transient, copies start out empty.
+        return (self.__class__, ())
+
+
+_load_state = LoadState()
+
+
+def get_load_blob_store() -> Optional[BlobStore]:
+    "Get the blob store of the load in progress on this thread"
+    return _load_state.load_blob_store
+
+
+@contextlib.contextmanager
+def using_load_blob_store(file: FileType, exact_path: bool = False,
+                          blob_store: Optional[BlobStore] = None):
+    """
+    Set the blob store used to resolve references while loading a file
+    on this thread, unless an enclosing load already set one. By default,
+    the store next to the file is used if it exists.
+    """
+    reset_blob_store = False
+    if _load_state.load_blob_store is None:
+        if blob_store is None and type(file) is str:
+            blob_store = BlobStore.find_for_file(
+                file_resolve(file, exact_path=exact_path))
+        if blob_store is not None:
+            _load_state.load_blob_store = blob_store
+            reset_blob_store = True
+    elif blob_store is not None and \
+            blob_store != _load_state.load_blob_store:
+        raise RuntimeError("different blob stores not currently supported")
+
+    try:
+        yield
+    finally:
+        if reset_blob_store:
+            _load_state.load_blob_store = None
 
 
-@static_var('load_repo', None)
 def load_object(file: FileType, update: bool = False,
                 exact_path: bool = False,
                 reload: bool = False,
                 as_cls: Optional[Type] = None,
-                repo=None) -> Object:
+                repo=None,
+                blob_store: Optional[BlobStore] = None) -> Object:
     """
     A method for loading an object from disk.
+
+    blob_store: Store used to resolve content kept in a blob store. By
+        default, the store next to the loaded file is used if it exists.
     """
     reset_repo = False
     load_obj = True
 
-    # Handle repo management variables
-    if repo is not None:
-        if load_object.load_repo is not None:
-            raise RuntimeError(
-                "different repos not currently supported")
-        else:
-            # Set the call_repo
-            load_object.load_repo = repo
-            reset_repo = True
-
-    # We now need the object definition
-    with ObjectFile(file, exact_path=exact_path) as dry_file:
-        obj_def = dry_file.definition()
-        # Check whether a repo was given in a prior call
-        if load_object.load_repo is not None:
-            try:
-                # Load the object from the repo
-                obj = load_object.load_repo.get_obj(obj_def)
-                if obj.definition() != obj_def:
-                    raise RuntimeError("Found issue!")
-                load_obj = False
-            except Exception:
-                pass
-
-        if load_obj:
-            obj = dry_file.load_object(update=update,
-                                       reload=reload,
-                                       as_cls=as_cls)
-            if as_cls is not None or reload:
-                if as_cls is not None:
-                    cls = as_cls
-                elif reload:
-                    cls = get_class_from_str(get_class_str(obj_def.cls))
-                new_def = ObjectDef(
-                    cls,
-                    *obj_def.args,
-                    dry_mut=obj_def.dry_mut,
-                    **obj_def.kwargs)
-            else:
-                new_def = obj_def
-            if not obj.definition() == new_def:
+    # Define a cleanup function to call in the event of error
+    # and at the end of the function.
+    def cleanup():
+        # Reset the repo for this function
+        if reset_repo:
+            _load_state.load_repo = None
+
+    try:
+        # Handle repo management variables
+        if repo is not None:
+            if _load_state.load_repo is not None:
                 raise RuntimeError(
-                    f"Loaded object doesn't have expected definition!\n"
-                    f"expected: {new_def}\ngot: {obj.definition()}")
+                    "different repos not currently supported")
+            else:
+                # Set the call_repo
+                _load_state.load_repo = repo
+                reset_repo = True
+
+        # We now need the object definition
+        with using_load_blob_store(file, exact_path=exact_path,
+                                   blob_store=blob_store), \
+                ObjectFile(file, exact_path=exact_path) as dry_file:
+            obj_def = dry_file.definition()
+            # Check whether a repo was given in a prior call
+            if _load_state.load_repo is not None:
+                try:
+                    # Load the object from the repo
+                    obj = _load_state.load_repo.get_obj(obj_def)
+                    if obj.definition() != obj_def:
+                        raise RuntimeError("Found issue!")
+                    load_obj = False
+                except Exception:
+                    pass
+
+            if load_obj:
+                obj = dry_file.load_object(update=update,
+                                           reload=reload,
+                                           as_cls=as_cls)
+                if as_cls is not None or reload:
+                    if as_cls is not None:
+                        cls = as_cls
+                    elif reload:
+                        cls = get_class_from_str(get_class_str(obj_def.cls))
+                    new_def = ObjectDef(
+                        cls,
+                        *obj_def.args,
+                        dry_mut=obj_def.dry_mut,
+                        **obj_def.kwargs)
+                else:
+                    new_def = obj_def
+                if not obj.definition() == new_def:
+                    raise RuntimeError(
+                        f"Loaded object doesn't have expected definition!\n"
+                        f"expected: {new_def}\ngot: {obj.definition()}")
+    except Exception as e:
+        cleanup()
+        raise e
 
-    # Reset the repo for this function
-    if reset_repo:
-        load_object.load_repo = None
+    cleanup()
 
     return obj
 
@@ -457,19 +846,68 @@ def load_object_content(
 def save_object(obj: Object, file: FileType, version: int = 1,
                 exact_path: bool = False, update: bool = False,
                 as_cls: Optional[Type] = None,
-                save_cache=None) -> bool:
+                save_cache=None,
+                blob_store: Optional[BlobStore] = None,
+                compression: Union[CompressionPolicy, CompressionType,
+                                   None] = None,
+                num_workers: int = 1) -> bool:
+    """
+    A method for saving an object to disk.
+
+    version: File format version. Version 1 files can be read by older
+        releases. Version 2 files hold the definition and contained
+        objects in a single manifest, so definitions are read faster.
+        Contained objects are saved with the same version.
+    blob_store: When given, contained objects and compute data are
+        written once to the store, and the file only references them.
+    compression: A CompressionPolicy choosing the compression of each
+        member, or a compression ('stored', 'deflated', 'bzip2', 'lzma')
+        used for all members. Members are stored by default.
+    num_workers: Number of threads serializing the object's contained
+        objects. They're written to the file in the same order as when
+        saved sequentially.
+    """
+    if num_workers < 1:
+        raise ValueError("num_workers must be at least 1")
+    compression = CompressionPolicy.build(compression)
+
     # Initialize a save cache by default.
     close_save_cache = False
     if save_cache is None:
         close_save_cache = True
-        save_cache = SaveCache()
-    with ObjectFile(file, exact_path=exact_path, mode='w',
-                    must_exist=False) as dry_file:
+        save_cache = SaveCache(blob_store=blob_store,
+                               compression=compression)
+    else:
+        if blob_store is not None:
+            if save_cache.blob_store is None:
+                save_cache.blob_store = blob_store
+            elif save_cache.blob_store != blob_store:
+                raise ValueError(
+                    "Save cache already uses a different blob store!")
+        if compression is not None:
+            if save_cache.compression is None:
+                save_cache.compression = compression
+            elif save_cache.compression != compression:
+                raise ValueError(
+                    "Save cache already uses a different compression!")
+    dry_file = ObjectFile(file, exact_path=exact_path, mode='w',
+                          must_exist=False,
+                          compression=save_cache.compression)
+    ret_val = False
+    try:
         if version == 1:
             ret_val = dry_file.save_object_v1(
-                obj, update=update, as_cls=as_cls, save_cache=save_cache)
+                obj, update=update, as_cls=as_cls, save_cache=save_cache,
+                num_workers=num_workers)
+        elif version == 2:
+            ret_val = dry_file.save_object_v2(
+                obj, update=update, as_cls=as_cls, save_cache=save_cache,
+                num_workers=num_workers)
         else:
             raise ValueError(f"File version {version} unknown. Can't save!")
+    finally:
+        # A failed save leaves any existing file untouched
+        dry_file.close(discard=not ret_val)
 
     # Close save caches.
     if save_cache is not None and close_save_cache:
@@ -504,10 +942,28 @@ def obj_to_def(val):
 
 
 # Define a base  Object
+# Source of object generations. Generations are unique across objects so
+# a new object never matches content saved for another with the same id.
+generation_counter = itertools.count(1)
+
+
 class Object(metaclass=Meta):
     # Only ever set for this class.
     __dry_meta_base__ = True
 
+    @property
+    def dry_generation(self) -> int:
+        """
+        Changes when the object is marked modified. Training, loading
+        compute data and preparing compute mark objects modified, other
+        modifications need to call mark_modified.
+        """
+        return self.__dict__.get('__dry_generation__', 0)
+
+    def mark_modified(self):
+        "Indicate that previously saved content of this object is stale"
+        self.__dict__['__dry_generation__'] = next(generation_counter)
+
     # Define the dry_id
     def __init__(self, *args, dry_id=None, dry_metadata=None, **kwargs):
         # Dry ID
@@ -545,6 +1001,11 @@ class Object(metaclass=Meta):
     def save_self(self, file: FileType, version: int = 1, **kwargs) -> bool:
         return save_object(self, file, version=version, **kwargs)
 
+    def save_async(self, file: FileType, version: int = 1, **kwargs):
+        "Save on a background thread. See save_object_async."
+        from dryml.background_save import save_object_async
+        return save_object_async(self, file, version=version, **kwargs)
+
     def __str__(self):
         return str(self.definition())
 
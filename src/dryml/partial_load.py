@@ -0,0 +1,311 @@
+# Loading parts of a saved object graph.
+#
+# load_object builds the whole graph stored in a .dry file. The functions
+# here find a single contained object, by dry_id or by attribute path,
+# and load only that object and the objects it contains. Definitions can
+# also be read without importing or constructing any of the stored
+# classes, for instance to inspect files written by other environments.
+
+import io
+import uuid
+import pickle
+import dill
+import contextlib
+from typing import Optional, Union, List
+from dryml.config import ObjectDef, DefKwargs
+from dryml.object import Object, ObjectFile, FileType, load_object, \
+    using_load_blob_store
+from dryml.blob_store import BlobStore, open_blob_ref
+from dryml.utils import get_class_by_name, is_supported_listlike, \
+    is_supported_dictlike
+
+
+class ClassRef(object):
+    "A stored class which hasn't been imported"
+
+    def __init__(self, module: str, name: str):
+        self.module = module
+        self.name = name
+
+    @staticmethod
+    def from_str(cls_str: str) -> 'ClassRef':
+        module, _, name = cls_str.rpartition('.')
+        return ClassRef(module, name)
+
+    @property
+    def cls_str(self) -> str:
+        return f"{self.module}.{self.name}"
+
+    def resolve(self, reload: bool = False):
+        "Import the class"
+        return get_class_by_name(self.module, self.name, reload=reload)
+
+    def __eq__(self, other):
+        return type(other) is ClassRef and other.cls_str == self.cls_str
+
+    def __hash__(self):
+        return hash(self.cls_str)
+
+    def __repr__(self):
+        return f"ClassRef({self.cls_str})"
+
+
+def _safe_load_type(name):
+    "dill's _load_type, limited to plain data types"
+    if name not in DefinitionUnpickler.safe_type_names:
+        raise pickle.UnpicklingError(f"Refusing to load type {name}")
+    return dill._dill._load_type(name)
+
+
+class DefinitionUnpickler(pickle.Unpickler):
+    """
+    Unpickles stored definitions, leaving classes outside of a few
+    trusted modules as ClassRefs instead of importing them. Only the
+    listed globals of the trusted modules can be loaded, so a stored
+    definition can't call arbitrary functions.
+    """
+
+    safe_globals = {
+        ('builtins', name) for name in (
+            'object', 'bool', 'int', 'float', 'complex', 'str', 'bytes',
+            'bytearray', 'list', 'tuple', 'dict', 'set', 'frozenset',
+            'slice')
+    } | {
+        ('copyreg', '_reconstructor'),
+        ('_codecs', 'encode'),
+        ('collections', 'OrderedDict'),
+        ('uuid', 'UUID'),
+        ('dryml.config', 'ObjectDef'),
+        ('dryml.config', 'DefKwargs'),
+        ('numpy', 'dtype'),
+        ('numpy', 'ndarray'),
+        ('numpy.core.multiarray', '_reconstruct'),
+        ('numpy.core.multiarray', 'scalar'),
+        ('numpy._core.multiarray', '_reconstruct'),
+        ('numpy._core.multiarray', 'scalar'),
+        ('dill._dill', '_create_array'),
+    }
+
+    # Builtin types dill stores by name
+    safe_type_names = {
+        'NoneType', 'bool', 'int', 'float', 'complex', 'str', 'bytes',
+        'bytearray', 'list', 'tuple', 'dict', 'set', 'frozenset', 'slice',
+    }
+
+    trusted_modules = ('builtins', 'copyreg', '_codecs', 'collections',
+                       'uuid', 'dryml.config', 'dill', 'numpy')
+
+    def find_class(self, module, name):
+        if (module, name) in DefinitionUnpickler.safe_globals:
+            return super().find_class(module, name)
+        if module == 'dill._dill' and name == '_load_type':
+            return _safe_load_type
+        if module == 'dill._dill' and name == '_create_type':
+            raise pickle.UnpicklingError(
+                "Found a class stored by value, which can't be read "
+                "without constructing it.")
+        if module.split('.')[0] in DefinitionUnpickler.trusted_modules:
+            raise pickle.UnpicklingError(
+                f"Refusing to load {module}.{name} from a definition")
+        return ClassRef(module, name)
+
+
+def _loads(data: bytes):
+    return DefinitionUnpickler(io.BytesIO(data)).load()
+
+
+def _unresolved_definition(dry_file: ObjectFile) -> ObjectDef:
+    "Read a definition from a file without importing its classes"
+    z_file = dry_file.z_file
+    namelist = z_file.namelist()
+    if ObjectFile.manifest_name in namelist:
+        manifest = _loads(z_file.read(ObjectFile.manifest_name))
+        cls = ClassRef.from_str(manifest['cls_str'])
+        args = manifest['args']
+        kwargs = manifest['kwargs']
+        dry_mut = manifest['dry_mut']
+    else:
+        if 'cls_str.txt' in namelist:
+            cls = ClassRef.from_str(
+                z_file.read('cls_str.txt').decode('utf-8'))
+        elif 'cls_def.dill' in namelist:
+            cls = _loads(z_file.read('cls_def.dill'))
+        elif 'cls_def.ref' in namelist:
+            with open_blob_ref(z_file, 'cls_def.ref',
+                               dry_file.blob_store()) as f:
+                cls = _loads(f.read())
+        else:
+            raise RuntimeError("No stored class data!")
+        args = _loads(z_file.read('dry_args.pkl'))
+        kwargs = _loads(z_file.read('dry_kwargs.pkl'))
+        dry_mut = _loads(z_file.read('dry_mut.pkl'))
+
+    # Stored ClassRefs aren't types, so the definition is assembled the
+    # way unpickling assembles the nested definitions.
+    obj_def = ObjectDef.__new__(ObjectDef)
+    obj_def._tracking_id = uuid.uuid4()
+    obj_def.data = {
+        'cls': cls,
+        'dry_mut': dry_mut,
+        'dry_args': args,
+        'dry_kwargs': DefKwargs(kwargs),
+    }
+    return obj_def
+
+
+def _contained_ids(dry_file: ObjectFile) -> List[str]:
+    "Ids of the directly contained objects, read from the zip directory"
+    ids = []
+    for name in dry_file.z_file.namelist():
+        m = ObjectFile.contained_dry_file_re.match(name)
+        if m is not None:
+            ids.append(m.groups()[0])
+    return ids
+
+
+def _find_object_file(dry_file: ObjectFile, dry_id: str,
+                      stack: contextlib.ExitStack,
+                      visited: Optional[set] = None):
+    """
+    Search the contained objects of a file for the one with the given
+    id, returning its file or None. Only zip directories are read, and
+    the opened files are kept open by the exit stack.
+    """
+    if visited is None:
+        visited = set()
+    contained_ids = [i for i in _contained_ids(dry_file) if i not in visited]
+    if dry_id in contained_ids:
+        return stack.enter_context(
+            dry_file.get_contained_object_file(dry_id))
+
+    for sub_id in contained_ids:
+        visited.add(sub_id)
+        sub_f = stack.enter_context(
+            dry_file.get_contained_object_file(sub_id))
+        sub_file = stack.enter_context(ObjectFile(sub_f))
+        target = _find_object_file(sub_file, dry_id, stack, visited)
+        if target is not None:
+            return target
+    return None
+
+
+@contextlib.contextmanager
+def _open_object_file(file: FileType, exact_path: bool,
+                      blob_store: Optional[BlobStore]):
+    "Open a file, setting the blob store used to resolve its references"
+    with using_load_blob_store(file, exact_path=exact_path,
+                               blob_store=blob_store), \
+            ObjectFile(file, exact_path=exact_path) as dry_file:
+        yield dry_file
+
+
+def positional_arg_names(cls) -> List[str]:
+    """
+    Get the names of the positional arguments stored in the definitions
+    of a class, in the order they're stored. Arguments collected by a
+    Meta.collect_args init have no names, and end the list.
+    """
+    names = []
+    for klass in cls.__mro__:
+        init_func = klass.__dict__.get('__init__', None)
+        if init_func is None or not hasattr(init_func, '__dry_args__'):
+            continue
+        if getattr(init_func, '__dry_collect_args__', False):
+            break
+        names += init_func.__dry_args__
+    return names
+
+
+def resolve_path(obj_def: ObjectDef, path: Union[str, List]) -> ObjectDef:
+    """
+    Get the definition of a contained object from the definition of its
+    container. The path holds the names of the init arguments leading to
+    the object, separated by '.', with integers indexing lists and
+    tuples, for instance 'model' or 'metrics.0'.
+    """
+    if type(path) is str:
+        path = path.split('.')
+
+    val = obj_def
+    for i, key in enumerate(path):
+        where = '.'.join(map(str, path[:i+1]))
+        if isinstance(val, ObjectDef):
+            if key in val.kwargs:
+                val = val.kwargs[key]
+                continue
+            if type(val.cls) is ClassRef:
+                raise ValueError(
+                    f"Can't resolve positional argument {where} of an "
+                    "unimported class.")
+            names = positional_arg_names(val.cls)
+            if key not in names or names.index(key) >= len(val.args):
+                raise ValueError(
+                    f"{val.cls} has no stored argument {where}")
+            val = val.args[names.index(key)]
+        elif is_supported_listlike(val):
+            try:
+                val = val[int(key)]
+            except (ValueError, IndexError):
+                raise ValueError(f"Invalid index at {where}")
+        elif is_supported_dictlike(val):
+            if key not in val:
+                raise ValueError(f"No key at {where}")
+            val = val[key]
+        else:
+            raise ValueError(f"Value at {where} isn't an object or container")
+
+    if not isinstance(val, ObjectDef):
+        raise ValueError(
+            f"Path {'.'.join(map(str, path))} doesn't lead to an object")
+    return val
+
+
+def load_definition(file: FileType, dry_id: Optional[str] = None,
+                    exact_path: bool = False, resolve_classes: bool = False,
+                    blob_store: Optional[BlobStore] = None) -> ObjectDef:
+    """
+    Read the definition of a stored object without loading any objects.
+
+    dry_id: Read the definition of this contained object instead of the
+        top level object.
+    resolve_classes: Import the stored classes. Otherwise, classes are
+        given as ClassRefs and no class is imported or constructed.
+    """
+    with _open_object_file(file, exact_path, blob_store) as dry_file, \
+            contextlib.ExitStack() as stack:
+        if dry_id is not None:
+            target_f = _find_object_file(dry_file, dry_id, stack)
+            if target_f is None:
+                raise KeyError(f"File {file} doesn't contain object {dry_id}")
+            dry_file = stack.enter_context(ObjectFile(target_f))
+
+        if resolve_classes:
+            return dry_file.definition()
+        return _unresolved_definition(dry_file)
+
+
+def load_sub_object(file: FileType, dry_id: Optional[str] = None,
+                    path: Union[str, List, None] = None,
+                    exact_path: bool = False, update: bool = False,
+                    reload: bool = False,
+                    blob_store: Optional[BlobStore] = None) -> Object:
+    """
+    Load a contained object of a stored object, along with the objects
+    it contains, without building the rest of the graph.
+
+    dry_id: The id of the object to load.
+    path: Attribute path of the object within the definition of the top
+        level object, see resolve_path. Either dry_id or path is given.
+    """
+    if (dry_id is None) == (path is None):
+        raise ValueError("Exactly one of dry_id and path must be given.")
+
+    with _open_object_file(file, exact_path, blob_store) as dry_file, \
+            contextlib.ExitStack() as stack:
+        if path is not None:
+            dry_id = resolve_path(dry_file.definition(), path).dry_id
+
+        target_f = _find_object_file(dry_file, dry_id, stack)
+        if target_f is None:
+            raise KeyError(f"File {file} doesn't contain object {dry_id}")
+        return load_object(target_f, update=update, reload=reload)
@@ -5,10 +5,46 @@ from dryml.models import TrainSpec
 from dryml.models import Trainable
 from dryml.data import Dataset
 from dryml import Repo
+from dryml.checkpoint import Checkpointer, load_checkpoint, \
+    export_checkpoint
 import pickle
 import uuid
 
 
+def save_model_checkpoint(model, checkpoint_dir, checkpointer=None):
+    """
+    Save a model to a checkpoint directory. With a checkpointer, the
+    checkpointer's latest checkpoint is linked into the directory, so
+    only changed content is written.
+    """
+    if checkpointer is None:
+        model.save_self(f"{checkpoint_dir}/model.dry")
+    else:
+        seq = checkpointer.save()
+        export_checkpoint(
+            checkpointer.filepath, f"{checkpoint_dir}/model.dry",
+            seq=seq, token=checkpointer.token)
+
+
+def load_model_checkpoint(checkpoint_dir, repo=None):
+    "Load a model saved with save_model_checkpoint"
+    return load_checkpoint(
+        os.path.join(checkpoint_dir, "model.dry"), repo=repo)
+
+
+def trial_checkpoint_file(checkpoint_dir, trial_id, model):
+    """
+    Get the file a trial checkpoints a model to incrementally. Each trial
+    has its own file, since trials cloned from one another share models'
+    dry_ids.
+    """
+    if checkpoint_dir is None:
+        return None
+    trial_dir = os.path.join(checkpoint_dir, str(trial_id))
+    pathlib.Path(trial_dir).mkdir(parents=True, exist_ok=True)
+    return os.path.join(trial_dir, f"{model.dry_id}.dry")
+
+
 class Tune2ObjectSaver(object):
     def __init__(
             self, model: Trainable = None,
@@ -17,7 +53,9 @@ class Tune2ObjectSaver(object):
             test_ds: Dataset = None,
             ctx_reqs=None,
             tmp_checkpoint_dir='/tmp',
-            metrics={}):
+            metrics={},
+            checkpoint_file=None,
+            max_deltas=None):
         if model is None:
             raise ValueError("Must pass a model.")
         self.model = model
@@ -41,6 +79,12 @@ class Tune2ObjectSaver(object):
         self.metrics = metrics
         self.tmp_checkpoint_dir = tmp_checkpoint_dir
 
+        # Write incremental checkpoints of the model to checkpoint_file
+        self.checkpointer = None
+        if checkpoint_file is not None:
+            self.checkpointer = Checkpointer(
+                model, checkpoint_file, max_deltas=max_deltas)
+
     def __call__(self):
         from ray.air import session
         from ray.air.checkpoint import Checkpoint
@@ -63,7 +107,8 @@ class Tune2ObjectSaver(object):
         #       pathlib.Path(checkpoint_dir).mkdir(parents=True, exist_ok=True)
 
         # Save model to checkpoint
-        self.model.save_self(f"{temp_checkpoint_dir}/model.dry")
+        save_model_checkpoint(
+            self.model, temp_checkpoint_dir, self.checkpointer)
         self.train_state.save(f"{temp_checkpoint_dir}/train_state.pkl")
         with open(f"{temp_checkpoint_dir}/ctx_reqs.pkl", 'wb') as f:
             f.write(pickle.dumps(self.ctx_reqs))
@@ -88,10 +133,17 @@ class Tune2Trainer(object):
             self,
             name=None,
             prep_method=None,
-            metrics={}):
+            metrics={},
+            incremental_checkpoint_dir=None,
+            max_deltas=None):
         self._name = name
         self.prep_method = prep_method
         self.metrics = metrics
+        # When set, models are checkpointed incrementally to files in
+        # this directory, which checkpoints link to. It should be on the
+        # same filesystem as the checkpoints, or files are copied.
+        self.incremental_checkpoint_dir = incremental_checkpoint_dir
+        self.max_deltas = max_deltas
 
     def __call__(self, config, checkpoint_dir=None):
         from ray.air import session
@@ -111,9 +163,7 @@ class Tune2Trainer(object):
                     os.path.join(checkpoint_dir, "train_state.pkl"))
 
                 # Load object from checkpoint
-                model = dryml.load_object(
-                    os.path.join(checkpoint_dir, "model.dry"),
-                    repo=repo)
+                model = load_model_checkpoint(checkpoint_dir, repo=repo)
 
                 # Retrieve requested context requirements
                 ctx_filepath = os.path.join(checkpoint_dir, "ctx_reqs.pkl")
@@ -159,7 +209,11 @@ class Tune2Trainer(object):
             repo=repo,
             test_ds=test_ds,
             ctx_reqs=ctx_reqs,
-            metrics=self.metrics,)
+            metrics=self.metrics,
+            checkpoint_file=trial_checkpoint_file(
+                self.incremental_checkpoint_dir, session.get_trial_id(),
+                model),
+            max_deltas=self.max_deltas)
         callbacks = [obj_saver]
 
         # Prepare model for training
@@ -194,7 +248,9 @@ class Tune1ObjectSaver(object):
             repo: Repo = None,
             test_ds: Dataset = None,
             ctx_reqs=None,
-            metrics={}):
+            metrics={},
+            checkpoint_file=None,
+            max_deltas=None):
         if model is None:
             raise ValueError("Must pass a model.")
         self.model = model
@@ -217,6 +273,12 @@ class Tune1ObjectSaver(object):
 
         self.metrics = metrics
 
+        # Write incremental checkpoints of the model to checkpoint_file
+        self.checkpointer = None
+        if checkpoint_file is not None:
+            self.checkpointer = Checkpointer(
+                model, checkpoint_file, max_deltas=max_deltas)
+
     def __call__(self):
         from ray import tune
 
@@ -229,7 +291,8 @@ class Tune1ObjectSaver(object):
                 pathlib.Path(checkpoint_dir).mkdir(parents=True, exist_ok=True)
 
             # Save model to checkpoint
-            self.model.save_self(f"{checkpoint_dir}/model.dry")
+            save_model_checkpoint(
+                self.model, checkpoint_dir, self.checkpointer)
             self.train_state.save(f"{checkpoint_dir}/train_state.pkl")
             with open(f"{checkpoint_dir}/ctx_reqs.pkl", 'wb') as f:
                 f.write(pickle.dumps(self.ctx_reqs))
@@ -252,10 +315,17 @@ class Tune1Trainer(object):
             self,
             name=None,
             prep_method=None,
-            metrics={}):
+            metrics={},
+            incremental_checkpoint_dir=None,
+            max_deltas=None):
         self._name = name
         self.prep_method = prep_method
         self.metrics = metrics
+        # When set, models are checkpointed incrementally to files in
+        # this directory, which checkpoints link to. It should be on the
+        # same filesystem as the checkpoints, or files are copied.
+        self.incremental_checkpoint_dir = incremental_checkpoint_dir
+        self.max_deltas = max_deltas
 
     def __call__(self, config, checkpoint_dir=None):
         from ray import tune
@@ -273,9 +343,7 @@ class Tune1Trainer(object):
                 os.path.join(checkpoint_dir, "train_state.pkl"))
 
             # Load object from checkpoint
-            model = dryml.load_object(
-                os.path.join(checkpoint_dir, "model.dry"),
-                repo=repo)
+            model = load_model_checkpoint(checkpoint_dir, repo=repo)
 
             # Retrieve requested context requirements
             ctx_filepath = os.path.join(checkpoint_dir, "ctx_reqs.pkl")
@@ -321,7 +389,11 @@ class Tune1Trainer(object):
             repo=repo,
             test_ds=test_ds,
             ctx_reqs=ctx_reqs,
-            metrics=self.metrics,)
+            metrics=self.metrics,
+            checkpoint_file=trial_checkpoint_file(
+                self.incremental_checkpoint_dir, tune.get_trial_id(),
+                model),
+            max_deltas=self.max_deltas)
         callbacks = [obj_saver]
 
         # Prepare model for training
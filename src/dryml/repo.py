@@ -1,8 +1,16 @@
 import os
 import traceback
+import concurrent.futures
 from dryml.object import Object, ObjectFactory, ObjectFile, \
-    ObjectDef, change_object_cls, load_object, get_contained_objects
+    ObjectDef, change_object_cls, get_contained_objects, \
+    file_resolve
 from dryml.config import MissingIdError
+from dryml.blob_store import BlobStore
+from dryml.compression import CompressionPolicy, CompressionType
+from dryml.save_cache import SaveCache
+from dryml.background_save import background_saver
+from dryml.checkpoint import Checkpointer, load_checkpoint, remove_deltas
+from dryml.repo_index import RepoIndex, read_definition
 from dryml.selector import Selector
 from dryml.utils import get_current_cls
 from typing import Optional, Callable, Union, Mapping
@@ -13,6 +21,60 @@ from pprint import pprint
 RepoKey = Union[Object, ObjectDef, dict, ObjectFile, Selector, str]
 
 
+def content_key(obj: Object):
+    """
+    Get a key made of the generations of an object and its contained
+    objects, which changes when any of them is marked modified. Objects
+    in compute mode change without being marked, so None is returned if
+    any of them is.
+    """
+    if obj.__dry_compute_mode__:
+        return None
+    sub_keys = []
+    for sub_obj in obj.__dry_obj_container_list__:
+        sub_key = content_key(sub_obj)
+        if sub_key is None:
+            return None
+        sub_keys.append(sub_key)
+    return (obj.dry_generation, tuple(sub_keys))
+
+
+def make_executor(num_workers: int, executor: str = 'thread'):
+    "Create a bounded pool of workers of the given kind"
+    if executor == 'thread':
+        return concurrent.futures.ThreadPoolExecutor(max_workers=num_workers)
+    elif executor == 'process':
+        return concurrent.futures.ProcessPoolExecutor(max_workers=num_workers)
+    else:
+        raise ValueError(
+            f"Unsupported executor {executor}. Use 'thread' or 'process'.")
+
+
+def map_capturing(func, items, num_workers: int = 1,
+                  executor: str = 'thread'):
+    """
+    Apply func to each item, possibly in parallel. Returns a list of
+    (result, exception) pairs in the order of items, so callers can
+    report errors deterministically.
+    """
+    if type(num_workers) is not int or num_workers < 1:
+        raise ValueError(
+            f"num_workers must be a positive integer, got {num_workers}")
+
+    def capture(future_or_func, *args):
+        try:
+            return (future_or_func(*args), None)
+        except Exception as e:
+            return (None, e)
+
+    if num_workers == 1 or len(items) <= 1:
+        return [capture(func, item) for item in items]
+
+    with make_executor(num_workers, executor=executor) as pool:
+        futures = [pool.submit(func, item) for item in items]
+        return [capture(f.result) for f in futures]
+
+
 class RepoContainer(object):
     @staticmethod
     def from_filepath(filename: str, directory: Optional[str] = None):
@@ -37,6 +99,15 @@ class RepoContainer(object):
         self._directory = directory
         self._filename = None
         self._obj = None
+        self._use_blob_store = False
+        self._index = None
+        # Cache of the on-disk definition, valid while the file's
+        # (mtime, size) signature matches.
+        self._def_cache = None
+        # What the file held when last loaded or saved
+        self._saved_state = None
+        # Writes incremental saves of the object
+        self._checkpointer = None
 
     def __str__(self):
         if self._obj is None:
@@ -77,18 +148,19 @@ class RepoContainer(object):
             # Object is already loaded
             return True
 
-        # Get full filepath of file
-        filepath = self.filepath
-
         # Load object at filepath
         try:
-            self._obj = load_object(filepath, update=update, reload=reload)
+            self._set_loaded_obj(self._load_obj(update=update, reload=reload))
             return True
         except Exception as e:
             print("There was an issue loading an object!")
             print(e)
             return False
 
+    def _load_obj(self, update: bool = True, reload: bool = False):
+        "Load the object from the file without keeping it"
+        return load_checkpoint(self.filepath, update=update, reload=reload)
+
     @property
     def obj(self):
         if self._obj is None:
@@ -97,7 +169,16 @@ class RepoContainer(object):
         return self._obj
 
     def set_obj(self, obj: Object):
+        if obj is self._obj:
+            return
         self._obj = obj
+        self._saved_state = None
+        self._checkpointer = None
+
+    def _set_loaded_obj(self, obj: Object):
+        "Set an object just loaded from the file"
+        self.set_obj(obj)
+        self._set_saved_state(content_key(obj))
 
     def get_obj(self, load=False):
         if load:
@@ -107,17 +188,28 @@ class RepoContainer(object):
 
     def save(self, directory: Optional[str] = None,
              fail_without_directory: bool = True,
-             save_cache=None):
+             save_cache=None,
+             compression: Union[CompressionPolicy, CompressionType,
+                                None] = None,
+             skip_unchanged: bool = False,
+             incremental: bool = False,
+             num_workers: int = 1):
+        """
+        Save the object if it's loaded.
+
+        skip_unchanged: Don't write the file if neither the object nor its
+            contained objects were marked modified since the object was
+            loaded from or last saved to it. See Object.mark_modified.
+            Changes made without marking the objects aren't saved.
+            Incremental saves also skip serializing unchanged objects.
+
+        incremental: Once the file has been written by this container,
+            only write deltas holding changed content. See Checkpointer.
+        num_workers: Number of threads serializing contained objects.
+        """
         if self._obj is not None:
-            # Get object filepath
-            filepath = self.filepath
-            # Split filepath
-            orig_dir, filename = os.path.split(filepath)
-            # Correct directory if asked
-            if directory is not None:
-                new_dir = directory
-            else:
-                new_dir = orig_dir
+            new_dir = self.save_directory(directory)
+            filename = os.path.split(self.filepath)[1]
 
             # If we don't want to have no directory, fail here.
             if fail_without_directory and new_dir == '':
@@ -127,7 +219,93 @@ class RepoContainer(object):
 
             # Build final filepath
             filepath = os.path.join(new_dir, filename)
-            self._obj.save_self(filepath)
+            if save_cache is not None:
+                compression = save_cache.compression
+            compression = CompressionPolicy.build(compression)
+            if skip_unchanged and self.is_unchanged(filepath, compression):
+                return
+
+            # Key the content before saving, so changes made while
+            # saving cause a save next time.
+            key = content_key(self._obj)
+            is_own_file = self._filename is not None and \
+                os.path.abspath(filepath) == os.path.abspath(self.filepath)
+            if incremental and is_own_file:
+                self._save_checkpoint(
+                    new_dir, compression, skip_unchanged=skip_unchanged)
+            elif save_cache is not None:
+                # The save cache determines the blob store and compression
+                self._obj.save_self(filepath, save_cache=save_cache,
+                                    num_workers=num_workers)
+            else:
+                blob_store = None
+                if self._use_blob_store:
+                    blob_store = BlobStore.for_directory(new_dir)
+                self._obj.save_self(filepath, blob_store=blob_store,
+                                    compression=compression,
+                                    num_workers=num_workers)
+
+            # The file now holds this object's definition
+            if is_own_file:
+                if not incremental:
+                    # Deltas of the replaced file no longer apply
+                    remove_deltas(filepath)
+                self._set_def_cache(self._obj.definition())
+                self._set_saved_state(key, compression)
+
+            # Keep the index up to date with the new file
+            if self._index is not None and new_dir != '' and \
+                    os.path.samefile(new_dir, self._index.directory):
+                self._index.update(filename, self._obj.definition())
+
+    def _save_checkpoint(self, directory: str, compression=None,
+                         skip_unchanged: bool = False):
+        if self._checkpointer is None or \
+                self._checkpointer.compression != compression or \
+                self._checkpointer.skip_unchanged != skip_unchanged:
+            blob_store = None
+            if self._use_blob_store:
+                blob_store = BlobStore.for_directory(directory)
+            self._checkpointer = Checkpointer(
+                self._obj, self.filepath, compression=compression,
+                blob_store=blob_store, skip_unchanged=skip_unchanged)
+        self._checkpointer.save()
+
+    def _set_saved_state(self, key, compression=None):
+        "Record the content of the object the file holds"
+        self._saved_state = {
+            'sig': self._file_signature(),
+            'key': key,
+            'compression': compression,
+            'use_blob_store': self._use_blob_store,
+        }
+
+    def is_unchanged(self, filepath: str, compression=None) -> bool:
+        """
+        Whether the file at filepath already holds the object's current
+        content, saved with the given compression.
+        """
+        state = self._saved_state
+        if state is None or self._obj is None:
+            return False
+        if os.path.abspath(filepath) != os.path.abspath(self.filepath):
+            return False
+        if state['compression'] != compression or \
+                state['use_blob_store'] != self._use_blob_store:
+            return False
+        key = content_key(self._obj)
+        if key is None or key != state['key']:
+            return False
+        try:
+            return self._file_signature() == state['sig']
+        except FileNotFoundError:
+            return False
+
+    def save_directory(self, directory: Optional[str] = None) -> str:
+        "Get the directory a save with the given directory writes to"
+        if directory is not None:
+            return directory
+        return os.path.split(self.filepath)[0]
 
     def unload(self):
         if self._obj is not None:
@@ -138,12 +316,27 @@ class RepoContainer(object):
         # Delete on-disk file if it exists
         if os.path.exists(self.filepath):
             os.remove(self.filepath)
+        remove_deltas(self.filepath)
+        self._def_cache = None
+        self._saved_state = None
+        if self._index is not None:
+            self._index.remove(self._filename)
 
     def set_directory(self, directory):
         self._directory = directory
+        self._def_cache = None
+        self._saved_state = None
 
     def set_filename(self, filename):
         self._filename = filename
+        self._def_cache = None
+        self._saved_state = None
+
+    def set_use_blob_store(self, use_blob_store: bool):
+        self._use_blob_store = use_blob_store
+
+    def set_index(self, index: Optional[RepoIndex]):
+        self._index = index
 
     def get_contained_objects(self):
         if self._obj is None:
@@ -151,24 +344,100 @@ class RepoContainer(object):
 
         return get_contained_objects(self._obj)
 
+    def _file_signature(self):
+        st = os.stat(file_resolve(self.filepath))
+        return (st.st_mtime_ns, st.st_size)
+
+    def _set_def_cache(self, obj_def: ObjectDef,
+                       signature: Optional[tuple] = None):
+        if signature is None:
+            signature = self._file_signature()
+        self._def_cache = {
+            'sig': signature,
+            'def': obj_def,
+            'cat_id': None,
+        }
+
+    def _cached_def_entry(self):
+        "Get the cache entry for the file's definition, refreshing if stale"
+        sig = self._file_signature()
+        if self._def_cache is None or self._def_cache['sig'] != sig:
+            if self._index is not None:
+                # The index only reads the file if it's changed
+                obj_def = self._index.definition(self._filename)
+            else:
+                # We need to load the file from disk
+                with ObjectFile(self.filepath) as f:
+                    obj_def = f.definition()
+            self._def_cache = {
+                'sig': sig,
+                'def': obj_def,
+                'cat_id': None,
+            }
+        return self._def_cache
+
     def definition(self):
         if self._obj is None:
-            # We need to load the file from disk
-            with ObjectFile(self.filepath) as f:
-                return f.definition()
+            return self._cached_def_entry()['def']
         else:
             return self._obj.definition()
 
+    @property
+    def dry_id(self):
+        # Unloaded containers read it from the cached definition, which
+        # follows replacements of the file.
+        return self.definition().dry_id
+
+    @property
+    def category_id(self):
+        if self._obj is None:
+            entry = self._cached_def_entry()
+            if entry['cat_id'] is None and self._index is not None:
+                # The index holds the category id of up to date files
+                entry['cat_id'] = self._index.category_id(self._filename)
+            if entry['cat_id'] is None:
+                entry['cat_id'] = entry['def'].get_cat_def().get_category_id()
+            return entry['cat_id']
+        else:
+            return self._obj.definition().get_cat_def().get_category_id()
+
 
 # This type will act as a fascade for the various Object* types.
 class Repo(object):
     def __init__(self, directory: Optional[str] = None, create: bool = False,
-                 load_objects: bool = True, **kwargs):
+                 load_objects: bool = True, use_blob_store: bool = False,
+                 use_index: bool = False, num_workers: int = 1,
+                 skip_unchanged: bool = False,
+                 **kwargs):
+        """
+        use_blob_store: Save contained objects and compute data once into
+            a content addressed store in the repo directory's 'blobs'
+            subdirectory. Saved .dry files then only reference them.
+        use_index: Keep a persistent index of object definitions in the
+            repo directory, so only new or changed files are read when
+            scanning it.
+        num_workers: Default number of workers used to read files when
+            scanning the directory and loading objects, and threads used
+            to serialize contained objects when saving.
+        skip_unchanged: Only write the files of objects marked modified
+            since they were loaded or saved. Objects changed without being
+            marked aren't saved. See Object.mark_modified.
+        """
         super().__init__(**kwargs)
 
         # A dictionary of objects
         self.obj_dict = {}
 
+        self.num_workers = num_workers
+        self.skip_unchanged = skip_unchanged
+
+        # Futures of saves running in the background
+        self._pending_saves = []
+
+        self.use_blob_store = use_blob_store
+        self.use_index = use_index
+        self.index = None
+
         self._save_objs_on_deletion = False
 
         if directory is not None:
@@ -200,6 +469,10 @@ class Repo(object):
             if create:
                 os.makedirs(directory)
         self.directory = directory
+        if self.use_index:
+            if self.index is not None:
+                self.index.close()
+            self.index = RepoIndex(directory)
         if load_objects:
             self.load_objects_from_directory()
 
@@ -207,16 +480,28 @@ class Repo(object):
         return len(self.obj_dict)
 
     def add_obj_cont(self, cont: RepoContainer):
-        obj_id = cont.definition().dry_id
+        if self.index is not None and cont._directory is not None and \
+                os.path.samefile(cont._directory, self.index.directory):
+            cont.set_index(self.index)
+        obj_id = cont.dry_id
         if obj_id in self.obj_dict:
             raise ValueError(
                 f"Object {obj_id} already exists in the repo!")
+        cont.set_use_blob_store(self.use_blob_store)
         self.obj_dict[obj_id] = cont
 
     def load_objects_from_directory(self, directory: Optional[str] = None,
                                     selector: Optional[Callable] = None,
-                                    verbose: bool = False):
-        "Method to refresh the internal dictionary of objects."
+                                    verbose: bool = False,
+                                    num_workers: Optional[int] = None,
+                                    executor: str = 'thread'):
+        """
+        Method to refresh the internal dictionary of objects.
+
+        num_workers: Number of workers reading file definitions. Defaults
+            to the repo's num_workers.
+        executor: Kind of worker, 'thread' or 'process'.
+        """
         # Handle directory
         if directory is None:
             if self.directory is None:
@@ -224,20 +509,76 @@ class Repo(object):
                     "No default directory selected for this repo!")
             directory = self.directory
 
-        files = os.listdir(directory)
+        if num_workers is None:
+            num_workers = self.num_workers
+
+        # Sort so files are always considered in the same order
+        files = sorted(os.listdir(directory))
+
+        # Use the index if it covers this directory
+        index = None
+        if self.index is not None and \
+                os.path.samefile(directory, self.index.directory):
+            index = self.index
+
+        # Skip directories, such as the blob store, the index and its
+        # journal, and temporary files of saves in progress.
+        files = list(filter(
+            lambda f: not f.startswith(RepoIndex.index_filename) and
+            not (f.startswith('.') and f.endswith('.tmp')) and
+            not os.path.isdir(os.path.join(directory, f)),
+            files))
+
+        # Find definitions the index already holds. The index is only
+        # used from this thread.
+        obj_defs = {}
+        indexed_files = files
+        if index is not None:
+            if isinstance(selector, Selector) and type(selector.cls) is str:
+                # Skip files the index knows hold other classes, without
+                # restoring their definitions.
+                other_cls = set(index.filenames()).difference(
+                    index.filenames(cls_str=selector.cls))
+                files = list(filter(lambda f: f not in other_cls, files))
+            for filename in files:
+                obj_def = index.lookup(filename)
+                if obj_def is not None:
+                    obj_defs[filename] = obj_def
+
+        # Read the remaining definitions from disk in parallel
+        to_read = list(filter(lambda f: f not in obj_defs, files))
+        read_results = map_capturing(
+            read_definition,
+            [os.path.join(directory, f) for f in to_read],
+            num_workers=num_workers, executor=executor)
+        read_results = dict(zip(to_read, read_results))
 
         num_loaded = 0
         for filename in files:
+            # Load container object
+            obj_cont = RepoContainer.from_filepath(
+                filename, directory=directory
+            )
             try:
-                # Load container object
-                obj_cont = RepoContainer.from_filepath(
-                    filename, directory=directory
-                )
+                if filename in read_results:
+                    result, error = read_results[filename]
+                    if error is not None:
+                        raise error
+                    obj_def, signature = result
+                    if index is not None:
+                        # Refresh the entry without committing each time
+                        index.update(filename, obj_def, commit=False,
+                                     signature=signature)
+                    obj_cont._set_def_cache(obj_def, signature=signature)
+                else:
+                    obj_cont._set_def_cache(obj_defs[filename])
+                if index is not None:
+                    obj_cont.set_index(index)
                 # Run selector
                 if selector is not None:
                     if not selector(obj_cont.definition()):
                         continue
-                if obj_cont.definition().dry_id not in self.obj_dict:
+                if obj_cont.dry_id not in self.obj_dict:
                     # Add the object
                     self.add_obj_cont(obj_cont)
                     num_loaded += 1
@@ -245,7 +586,13 @@ class Repo(object):
                 print(f"WARNING! Malformed file found! {obj_cont.filepath} "
                       f"skipping load. Error was: {e}")
                 if verbose:
-                    print(traceback.format_exc())
+                    print("".join(traceback.format_exception(
+                        type(e), e, e.__traceback__)))
+
+        if index is not None:
+            # Drop entries for files which no longer exist
+            index.prune(indexed_files)
+
         if verbose:
             print(f"Loaded {num_loaded} objects")
 
@@ -280,6 +627,23 @@ class Repo(object):
             obj = obj_factory(repo=self)
             self.add_object(obj)
 
+    def load_containers(self, containers, update: bool = True,
+                        num_workers: Optional[int] = None):
+        """
+        Load the objects of unloaded containers using a pool of threads.
+        Containers which fail to load are left unloaded, so the failure
+        is reported when they're next loaded.
+        """
+        if num_workers is None:
+            num_workers = self.num_workers
+        unloaded = list(filter(lambda c: not c.is_loaded(), containers))
+        results = map_capturing(
+            lambda c: c._load_obj(update=update),
+            unloaded, num_workers=num_workers)
+        for obj_cont, (obj, error) in zip(unloaded, results):
+            if error is None:
+                obj_cont._set_loaded_obj(obj)
+
     def make_container_handler(self,
                                load_objects: bool = True,
                                open_container: bool = True,
@@ -380,7 +744,8 @@ class Repo(object):
             update: bool = True,
             open_container: bool = True,
             verbose: bool = True,
-            build_missing_def=False):
+            build_missing_def=False,
+            num_workers: Optional[int] = None):
 
         # First, handle all cases where the selector refers to a specific
         # object
@@ -454,7 +819,8 @@ class Repo(object):
                         only_loaded=only_loaded,
                         update=update,
                         open_container=open_container,
-                        verbose=verbose)
+                        verbose=verbose,
+                        num_workers=num_workers)
                 except KeyError:
                     # Skip element
                     continue
@@ -492,6 +858,13 @@ class Repo(object):
                 only_loaded=only_loaded)
         obj_list = list(filter(filter_func, self.obj_dict.values()))
 
+        if num_workers is None:
+            num_workers = self.num_workers
+        if load_objects and num_workers > 1:
+            # Load in parallel first, the handler then only reports errors
+            self.load_containers(
+                obj_list, update=update, num_workers=num_workers)
+
         results = list(map(container_handler, obj_list))
         if len(results) == 0:
             if isinstance(selector, ObjectDef) and build_missing_def:
@@ -577,7 +950,11 @@ class Repo(object):
              sel_args=None, sel_kwargs=None,
              directory: Optional[str] = None,
              recursive=True,
-             error_on_none=False):
+             error_on_none=False,
+             compression: Union[CompressionPolicy, CompressionType,
+                                None] = None,
+             force: bool = False,
+             background: bool = False):
 
         """
         Saves the object or objects matching the input selector to disk.
@@ -586,15 +963,94 @@ class Repo(object):
 
         error_on_none: Whether to throw the KeyError, when no object is in
             the repo matching the key.
+        compression: Compression policy of the saved files. See save_object.
+        force: Write objects which weren't marked modified, even if the
+            repo skips unchanged objects.
+        background: Capture the compute data of the selected objects, then
+            write their files on a background thread. Returns a future.
+            See save_object_async. Wait for it with flush.
         """
 
-        save_cache = set()
+        # If we haven't added the object to the repo yet, add it now.
+        if issubclass(type(selector), Object):
+            if selector not in self:
+                self.add_object(selector)
+
+        # Gather the objects to save now, so the repo can change while
+        # they're saved in the background.
+        selected = []
+        try:
+            self.apply(
+                selected.append,
+                selector=selector, sel_args=sel_args, sel_kwargs=sel_kwargs,
+                open_container=False, only_loaded=True, load_objects=False)
+        except KeyError as e:
+            if error_on_none:
+                raise e
+
+        if not background:
+            self.flush()
+            self._save_selected(
+                selected, directory=directory, recursive=recursive,
+                compression=compression, force=force)
+            return None
+
+        snapshot = SaveCache()
+        for obj_or_cont in selected:
+            if isinstance(obj_or_cont, Object):
+                snapshot.snapshot_compute(obj_or_cont)
+            elif obj_or_cont.is_loaded():
+                snapshot.snapshot_compute(obj_or_cont.obj)
+        future = background_saver.submit(
+            self._save_selected, selected, directory=directory,
+            recursive=recursive, compression=compression, force=force,
+            snapshot=snapshot)
+        self._pending_saves = [
+            f for f in self._pending_saves if not f.done()]
+        self._pending_saves.append(future)
+        return future
+
+    def flush(self):
+        """
+        Wait for the repo's background saves to complete. Raises the
+        error of the first failed save, if any.
+        """
+        pending_saves = self._pending_saves
+        self._pending_saves = []
+        for future in pending_saves:
+            future.result()
+
+    def _save_selected(self, selected: list,
+                       directory: Optional[str] = None,
+                       recursive: bool = True,
+                       compression: Union[CompressionPolicy, CompressionType,
+                                          None] = None,
+                       force: bool = False,
+                       snapshot: Optional[SaveCache] = None):
+        saved_objs = set()
+
+        # Each object is serialized once per save. Files sharing a blob
+        # store share a save cache.
+        save_caches = {}
+
+        def get_save_cache(directory):
+            cache_key = None
+            if self.use_blob_store:
+                cache_key = os.path.realpath(directory)
+            save_cache = save_caches.get(cache_key, None)
+            if save_cache is None:
+                save_cache = self.make_save_cache(directory, compression)
+                if snapshot is not None:
+                    # Write the compute data captured when the save started
+                    save_cache.use_snapshots(snapshot)
+                save_caches[cache_key] = save_cache
+            return save_cache
 
         def save_func(obj_or_cont):
             if type(obj_or_cont) is Object:
                 # we have a plain dry object
 
-                if obj_or_cont in save_cache:
+                if obj_or_cont in saved_objs:
                     # don't need to save, it's already done.
                     return
 
@@ -611,9 +1067,11 @@ class Repo(object):
                 # Save
                 save_path = os.path.join(
                     directory, f"{obj_or_cont.dry_id}.dry")
-                obj_or_cont.save_self(save_path)
+                obj_or_cont.save_self(
+                    save_path,
+                    save_cache=get_save_cache(directory))
 
-                save_cache.add(obj_or_cont)
+                saved_objs.add(obj_or_cont)
 
             else:
                 # We have an object container.
@@ -621,7 +1079,7 @@ class Repo(object):
                     raise RuntimeError(
                         "Can only save currently loaded Object")
 
-                if obj_or_cont.obj in save_cache:
+                if obj_or_cont.obj in saved_objs:
                     # don't need to save, it's already done.
                     return
 
@@ -634,45 +1092,61 @@ class Repo(object):
                             sub_obj_cont = self.get(obj, open_container=False)
                             save_func(sub_obj_cont)
                         else:
-                            obj.save_self(os.path.join(
-                                directory, f"{obj.dry_id}.dry"))
+                            obj.save_self(
+                                os.path.join(directory, f"{obj.dry_id}.dry"),
+                                save_cache=get_save_cache(directory))
 
                 # Save object
-                obj_or_cont.save(directory=directory, save_cache=save_cache)
-                save_cache.add(obj_or_cont.obj)
-
-        # If we haven't added the object to the repo yet, add it now.
-        if issubclass(type(selector), Object):
-            if selector not in self:
-                self.add_object(selector)
-
-        try:
-            self.apply(
-                save_func,
-                selector=selector, sel_args=sel_args, sel_kwargs=sel_kwargs,
-                open_container=False, only_loaded=True, load_objects=False)
-        except KeyError as e:
-            if error_on_none:
-                raise e
+                obj_or_cont.save(
+                    directory=directory,
+                    save_cache=get_save_cache(
+                        obj_or_cont.save_directory(directory)),
+                    skip_unchanged=self.skip_unchanged and not force,
+                    num_workers=self.num_workers)
+                saved_objs.add(obj_or_cont.obj)
+
+        for obj_or_cont in selected:
+            save_func(obj_or_cont)
+
+    def make_save_cache(self, directory: str,
+                        compression: Union[CompressionPolicy,
+                                           CompressionType, None] = None
+                        ) -> SaveCache:
+        "Create a cache for a save of files in a directory"
+        blob_store = None
+        if self.use_blob_store:
+            blob_store = BlobStore.for_directory(directory)
+        return SaveCache(
+            blob_store=blob_store,
+            compression=CompressionPolicy.build(compression))
 
     def save_by_id(self,
-                   obj_id, directory: Optional[str] = None):
+                   obj_id, directory: Optional[str] = None,
+                   incremental: bool = False):
         if directory is None:
             directory = self.directory
-        self.obj_dict[obj_id].save(directory=directory)
+        self.flush()
+        obj_cont = self.obj_dict[obj_id]
+        obj_cont.save(
+            directory=directory,
+            save_cache=self.make_save_cache(
+                obj_cont.save_directory(directory)),
+            skip_unchanged=self.skip_unchanged,
+            incremental=incremental)
 
     def save_and_cache(
             self,
             selector: Optional[Callable] = None,
             sel_args=None, sel_kwargs=None):
         "Save and then delete objects. Replace their entries with strings"
+        self.flush()
 
         def save_func(obj_cont):
             if not obj_cont.is_loaded():
                 raise RuntimeError("Can only save currently loaded Object")
 
             # Save object
-            obj_cont.save()
+            obj_cont.save(skip_unchanged=self.skip_unchanged)
             obj_cont.unload()
 
         self.apply(
@@ -681,10 +1155,14 @@ class Repo(object):
             open_container=False, only_loaded=True, load_objects=False)
 
     def update(self,
-               obj: Object):
+               obj: Object,
+               incremental: bool = False):
         """
         Update existing object entry with new object.
         if object doesn't exist, create entry for it.
+
+        incremental: Write deltas holding only changed content after the
+            object's first save. See Checkpointer.
         """
 
         obj_id = obj.definition().dry_id
@@ -697,11 +1175,13 @@ class Repo(object):
             self.obj_dict[obj_id].set_obj(obj)
 
         # Save object to disk.
-        self.save_by_id(obj_id)
+        self.save_by_id(obj_id, incremental=incremental)
 
     def unload(self,
                selector: Optional[Callable] = None,
                sel_args=None, sel_kwargs=None):
+        # Background saves may still be reading the objects
+        self.flush()
 
         def unload_func(obj_cont):
             if obj_cont.is_loaded():
@@ -718,6 +1198,7 @@ class Repo(object):
             sel_args=None, sel_kwargs=None,
             only_loaded: bool = True):
         "Unload and delete from disk selected models"
+        self.flush()
 
         # Get all selected objects
         obj_containers = self.get(
@@ -726,7 +1207,7 @@ class Repo(object):
 
         def del_cont(obj_cont):
             # Delete object from repo object tracker
-            obj_id = obj_cont.definition().dry_id
+            obj_id = obj_cont.dry_id
             del self.obj_dict[obj_id]
 
             # Delete object from disk
@@ -762,25 +1243,24 @@ class Repo(object):
                 # Skip unloaded objects
                 if not obj_cont.is_loaded():
                     continue
-            obj_def = obj_cont.definition()
-            obj_cat_def = obj_def.get_cat_def()
-            cat_id = obj_cat_def.get_category_id()
+            cat_id = obj_cont.category_id
+            if cat_id not in results:
+                # Only build the category definition for new categories
+                obj_cat_def = obj_cont.definition().get_cat_def()
+                if only_loaded:
+                    results[cat_id] = {'def': obj_cat_def, 'num': 0}
+                else:
+                    results[cat_id] = {
+                        'def': obj_cat_def, 'loaded': 0, 'unloaded': 0}
 
+            entry = results[cat_id]
             if only_loaded:
-                entry = results.get(
-                    cat_id,
-                    {'def': obj_cat_def, 'num': 0})
                 entry['num'] += 1
-                results[cat_id] = entry
             else:
-                entry = results.get(
-                    cat_id,
-                    {'def': obj_cat_def, 'loaded': 0, 'unloaded': 0})
                 if obj_cont.is_loaded():
                     entry['loaded'] += 1
                 else:
                     entry['unloaded'] += 1
-                results[cat_id] = entry
 
         for cat_id in results:
             entry = results[cat_id]
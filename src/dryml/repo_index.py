@@ -0,0 +1,190 @@
+import os
+import pickle
+import sqlite3
+import threading
+from typing import Optional, Iterable, Tuple, List
+from dryml.object import ObjectFile, ObjectDef, file_resolve
+from dryml.utils import pickler, get_class_str
+
+
+def file_signature(filepath: str) -> Tuple[int, int]:
+    "The (mtime_ns, size) signature used to detect changed files"
+    st = os.stat(filepath)
+    return (st.st_mtime_ns, st.st_size)
+
+
+def read_definition(filepath: str) -> Tuple[ObjectDef, Tuple[int, int]]:
+    """
+    Read the definition of a saved file along with its signature. Kept
+    at module level so it can run in a worker process.
+    """
+    signature = file_signature(file_resolve(filepath))
+    with ObjectFile(filepath) as f:
+        return f.definition(), signature
+
+
+class RepoIndex(object):
+    """
+    A persistent index of the object definitions saved in a directory.
+
+    Entries are keyed on filename, and are only trusted while the file's
+    modification time and size match those recorded, so only new or
+    changed files have to be opened and parsed. The index may be used
+    from several threads, such as by background saves.
+    """
+
+    index_filename = '.dryml_index.sqlite'
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.index_path = os.path.join(directory, RepoIndex.index_filename)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(
+            self.index_path, timeout=30., check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS definitions ("
+            "filename TEXT PRIMARY KEY, "
+            "mtime_ns INTEGER NOT NULL, "
+            "size INTEGER NOT NULL, "
+            "dry_id TEXT NOT NULL, "
+            "cat_id TEXT NOT NULL, "
+            "cls_str TEXT NOT NULL, "
+            "definition BLOB NOT NULL)")
+        self._conn.commit()
+
+    def __del__(self):
+        self.close()
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def commit(self):
+        with self._lock:
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            cur = self._conn.execute("SELECT COUNT(*) FROM definitions")
+            return cur.fetchone()[0]
+
+    def _filepath(self, filename: str) -> str:
+        return file_resolve(os.path.join(self.directory, filename))
+
+    def _is_fresh(self, filename: str, mtime_ns: int, size: int) -> bool:
+        "Whether an entry's signature matches the file"
+        try:
+            return file_signature(self._filepath(filename)) == \
+                (mtime_ns, size)
+        except FileNotFoundError:
+            return False
+
+    def _fresh_entry(self, filename: str, column: str):
+        "Get a column of a file's entry, if the entry is up to date"
+        with self._lock:
+            cur = self._conn.execute(
+                f"SELECT {column}, mtime_ns, size FROM definitions "
+                "WHERE filename = ?", (filename,))
+            row = cur.fetchone()
+        if row is None or not self._is_fresh(filename, row[1], row[2]):
+            return None
+        return row[0]
+
+    def lookup(self, filename: str) -> Optional[ObjectDef]:
+        "Get the indexed definition of a file, if it's up to date"
+        blob = self._fresh_entry(filename, 'definition')
+        if blob is None:
+            return None
+
+        try:
+            return pickle.loads(blob)
+        except Exception:
+            # The stored definition can't be restored, for instance
+            # because its class moved. Treat it as stale.
+            return None
+
+    def category_id(self, filename: str) -> Optional[str]:
+        "Get the indexed category id of a file, if it's up to date"
+        return self._fresh_entry(filename, 'cat_id')
+
+    def filenames(self, cat_id: Optional[str] = None,
+                  cls_str: Optional[str] = None) -> List[str]:
+        """
+        Get the files with up to date entries, optionally only those of
+        the given category id or class string, without restoring their
+        definitions.
+        """
+        query = "SELECT filename, mtime_ns, size FROM definitions"
+        conditions = []
+        params = []
+        if cat_id is not None:
+            conditions.append("cat_id = ?")
+            params.append(cat_id)
+        if cls_str is not None:
+            conditions.append("cls_str = ?")
+            params.append(cls_str)
+        if len(conditions) > 0:
+            query += " WHERE " + " AND ".join(conditions)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [row[0] for row in rows if self._is_fresh(*row)]
+
+    def update(self, filename: str, obj_def: Optional[ObjectDef] = None,
+               commit: bool = True,
+               signature: Optional[Tuple[int, int]] = None) -> ObjectDef:
+        """
+        Record the definition of a file. If no definition is given,
+        it's read from the file.
+
+        signature: The (mtime_ns, size) of the file taken before its
+            definition was read. Taken here if not given.
+        """
+        filepath = self._filepath(filename)
+        # Stat before reading so a concurrent write leaves the entry stale.
+        if signature is None:
+            signature = file_signature(filepath)
+        if obj_def is None:
+            with ObjectFile(filepath) as f:
+                obj_def = f.definition()
+
+        entry = (filename, signature[0], signature[1],
+                 obj_def.dry_id,
+                 obj_def.get_cat_def().get_category_id(),
+                 get_class_str(obj_def.cls),
+                 pickler(obj_def))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO definitions "
+                "(filename, mtime_ns, size, dry_id, cat_id, cls_str, "
+                "definition) VALUES (?, ?, ?, ?, ?, ?, ?)", entry)
+            if commit:
+                self.commit()
+
+        return obj_def
+
+    def definition(self, filename: str, commit: bool = True) -> ObjectDef:
+        "Get the definition of a file, refreshing the index if needed"
+        obj_def = self.lookup(filename)
+        if obj_def is None:
+            obj_def = self.update(filename, commit=commit)
+        return obj_def
+
+    def remove(self, filename: str, commit: bool = True):
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM definitions WHERE filename = ?", (filename,))
+            if commit:
+                self.commit()
+
+    def prune(self, filenames: Iterable[str], commit: bool = True):
+        "Remove entries for files not in the given collection"
+        keep = set(filenames)
+        with self._lock:
+            cur = self._conn.execute("SELECT filename FROM definitions")
+            stale = [
+                (row[0],) for row in cur.fetchall() if row[0] not in keep]
+            self._conn.executemany(
+                "DELETE FROM definitions WHERE filename = ?", stale)
+            if commit:
+                self.commit()
@@ -1,7 +1,34 @@
+import threading
+from dryml.file_intermediary import FileSegment
+
+
 class SaveCache(object):
-    def __init__(self):
+    """
+    Caches the saved content of objects during a save, so each object is
+    only serialized once. Saved content is keyed on id(obj), so a cache
+    must only be used while the objects it saved are alive. Objects
+    sharing a dry_id, such as copies loaded from different files, may
+    hold different content.
+    """
+
+    def __init__(self, blob_store=None, compression=None):
+        # id(obj) -> saved file
         self.save_object_cache = {}
         self.save_compute_cache = set()
+        # When set, payloads are written to this store and referenced.
+        self.blob_store = blob_store
+        # Compression policy of the written files. Cached files are
+        # reused as is, so it's fixed for the cache's lifetime.
+        self.compression = compression
+        # Pickled class definitions, and their blob store digests, so
+        # each class is only pickled once.
+        self.class_def_cache = {}
+        self.class_def_digests = {}
+        # id(obj) -> compute data captured by snapshot_compute
+        self.compute_snapshots = {}
+        # dry_id -> lock held while the object is saved
+        self._object_locks = {}
+        self._locks_lock = threading.Lock()
 
     @property
     def obj_cache(self):
@@ -11,11 +38,68 @@ class SaveCache(object):
     def compute_cache(self):
         return self.save_compute_cache
 
+    def object_lock(self, obj) -> threading.RLock:
+        "Get the lock serializing saves of an object using this cache"
+        with self._locks_lock:
+            lock = self._object_locks.get(obj.dry_id, None)
+            if lock is None:
+                lock = threading.RLock()
+                self._object_locks[obj.dry_id] = lock
+            return lock
+
+    def snapshot_compute(self, obj):
+        """
+        Capture the compute data of an object and its contained objects
+        now. Saves using this cache write the captured data, even if the
+        objects' compute state has changed since.
+        """
+        if id(obj) in self.compute_snapshots:
+            return
+        if obj.__dry_compute_mode__:
+            if not obj.save_compute(save_cache=self):
+                raise RuntimeError(
+                    f"Error saving compute data of {obj.dry_id}")
+        self.save_compute_cache.add(id(obj))
+        self.compute_snapshots[id(obj)] = obj.__dry_compute_data__
+        for sub_obj in obj.__dry_obj_container_list__:
+            self.snapshot_compute(sub_obj)
+
+    def use_snapshots(self, snapshot_cache: 'SaveCache'):
+        "Write the compute data captured by another cache"
+        self.compute_snapshots.update(snapshot_cache.compute_snapshots)
+        self.save_compute_cache.update(snapshot_cache.compute_snapshots)
+
+    def get_object(self, obj):
+        "Get the saved content of an object, if it's still readable"
+        saved_file = self.save_object_cache.get(id(obj), None)
+        if saved_file is None:
+            return None
+        if isinstance(saved_file, FileSegment) and \
+                not saved_file.is_valid():
+            # The file holding the content changed on disk
+            del self.save_object_cache[id(obj)]
+            saved_file.close()
+            return None
+        return saved_file
+
+    def discard_object(self, obj):
+        saved_file = self.save_object_cache.pop(id(obj), None)
+        if saved_file is not None:
+            saved_file.close()
+
+    def set_object(self, obj, saved_file):
+        old_file = self.save_object_cache.get(id(obj), None)
+        if old_file is not None and old_file is not saved_file:
+            old_file.close()
+        self.save_object_cache[id(obj)] = saved_file
+
     def __del__(self):
         # Close int_files in save_cache
-        for key in self.save_object_cache:
-            self.save_object_cache[key].close()
+        for saved_file in self.save_object_cache.values():
+            saved_file.close()
 
     def __repr__(self):
         return f"object_cache: {self.save_object_cache} " \
-           f"compute_cache: {self.save_compute_cache}"
+           f"compute_cache: {self.save_compute_cache} " \
+           f"blob_store: {self.blob_store} " \
+           f"compression: {self.compression}"
@@ -39,8 +39,17 @@ def is_supported_listlike(val):
     return is_in_typelist(val, supported_listlike_types)
 
 
-def map_listlike(func, val):
+def plain_type(val) -> Type:
+    """
+    Get the type of a value, or the plain container type extended by a
+    tracked container of a definition.
+    """
     the_type = type(val)
+    return getattr(the_type, '__dry_plain_type__', None) or the_type
+
+
+def map_listlike(func, val):
+    the_type = plain_type(val)
     return the_type(map(func, val))
 
 
@@ -53,7 +62,7 @@ def is_supported_dictlike(val):
 
 
 def map_dictlike(func, val):
-    the_type = type(val)
+    the_type = plain_type(val)
     return the_type({
         k: func(val[k]) for k in val})
 
@@ -267,6 +276,37 @@ def count(get_result):
     return len(get_result)
 
 
+# Timestamp given to members of zipfiles we write. Using a fixed time
+# means identical content always produces identical bytes.
+zip_member_date_time = (1980, 1, 1, 0, 0, 0)
+
+
+class ReproducibleZipFile(zipfile.ZipFile):
+    """
+    A ZipFile which stamps written members with a fixed date and time.
+
+    compression_policy: Chooses the compression of each written member.
+        Without one, the zipfile's compression is used.
+    """
+
+    def __init__(self, *args, compression_policy=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.compression_policy = compression_policy
+
+    def open(self, name, mode='r', pwd=None, *, force_zip64=False):
+        if mode == 'w' and isinstance(name, str):
+            zinfo = zipfile.ZipInfo(name, date_time=zip_member_date_time)
+            if self.compression_policy is not None:
+                zinfo.compress_type, zinfo._compresslevel = \
+                    self.compression_policy.compression(name)
+            else:
+                zinfo.compress_type = self.compression
+                zinfo._compresslevel = self.compresslevel
+            name = zinfo
+        return super().open(
+            name, mode=mode, pwd=pwd, force_zip64=force_zip64)
+
+
 def show_contained_objects(save_file: Union[str, IO[bytes]]):
     if type(save_file) is str or IO[bytes]:
         zf = zipfile.ZipFile(save_file, mode='r')
@@ -296,7 +336,7 @@ def show_contained_objects_md5(save_file: Union[str, IO[bytes]]):
 
 def equal_recursive(obj1, obj2, path="", check_class=True, verbose=False):
     if check_class:
-        if type(obj1) != type(obj2):
+        if plain_type(obj1) != plain_type(obj2):
             if verbose:
                 print(f"Class mismatch at {path}")
             return False
@@ -356,7 +396,7 @@ def equal_recursive(obj1, obj2, path="", check_class=True, verbose=False):
 
 def diff_recursive(obj1, obj2, path="", check_class=False):
     if check_class:
-        if type(obj1) != type(obj2):
+        if plain_type(obj1) != plain_type(obj2):
             print(f"Class mismatch at {path}")
 
     if is_dictlike(obj1) and is_dictlike(obj2):
@@ -390,9 +430,11 @@ def diff_recursive(obj1, obj2, path="", check_class=False):
 file_blocklist = [
    'meta_data.pkl',
    'cls_def.dill',
+   'cls_def.ref',
    'dry_args.pkl',
    'dry_kwargs.pkl',
    'dry_mut.pkl',
+   'manifest.pkl',
 ]
 
 
@@ -1,6 +1,6 @@
 from fixtures import create_name, create_temp_file, \
     create_temp_named_file, create_temp_dir, ray_server, \
-    get_ray
+    get_ray, count_calls
 
 __all__ = [
     create_name,
@@ -9,4 +9,5 @@ __all__ = [
     create_temp_named_file,
     ray_server,
     get_ray,
+    count_calls,
 ]
@@ -2,6 +2,7 @@ import pytest
 import tempfile
 import uuid
 import os
+import shutil
 
 
 @pytest.fixture
@@ -13,6 +14,8 @@ def create_name():
         os.remove(fullpath)
     if os.path.exists(tempf):
         os.remove(tempf)
+    # Checkpoint deltas are kept next to the file
+    shutil.rmtree(f"{fullpath}.deltas", ignore_errors=True)
 
 
 @pytest.fixture
@@ -56,3 +59,27 @@ def ray_server(request):
         request.addfinalizer(shutdown_ray)
     except ImportError:
         pass
+
+
+class CallCounter(object):
+    def __init__(self):
+        self.num_calls = 0
+
+
+@pytest.fixture
+def count_calls(monkeypatch):
+    """
+    Replace an attribute for the test with a wrapper counting its calls.
+    Returns a CallCounter.
+    """
+    def _count_calls(target, name):
+        counter = CallCounter()
+        orig_func = getattr(target, name)
+
+        def counting_func(*args, **kwargs):
+            counter.num_calls += 1
+            return orig_func(*args, **kwargs)
+
+        monkeypatch.setattr(target, name, counting_func)
+        return counter
+    return _count_calls
@@ -1,4 +1,5 @@
 import dryml
+import dryml.arrays
 import zipfile
 import pickle
 
@@ -176,3 +177,21 @@ class TestClassF1(dryml.Object):
 class TestClassG1(dryml.Object):
     def __init__(self, val):
         pass
+
+
+class TestArrayState(dryml.Object):
+    def __init__(self):
+        self.table = None
+
+    def save_object_imp(self, file: zipfile.ZipFile) -> bool:
+        data = dryml.arrays.dump_with_arrays(
+            {'table': self.table}, file, 'arrays/')
+        with file.open('state.pkl', 'w') as f:
+            f.write(data)
+        return True
+
+    def load_object_imp(self, file: zipfile.ZipFile) -> bool:
+        with file.open('state.pkl', 'r') as f:
+            state = dryml.arrays.load_with_arrays(f.read(), file)
+        self.table = state['table']
+        return True
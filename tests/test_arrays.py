@@ -0,0 +1,99 @@
+import dryml
+import dryml.arrays
+import objects
+import io
+import zipfile
+import numpy as np
+import pytest
+
+
+def test_array_members_1(create_name):
+    """
+    Large arrays are stored as .npy members and mapped when loaded.
+    """
+    obj = objects.TestArrayState()
+    obj.table = np.arange(100000, dtype=np.float64).reshape(1000, 100)
+    outer_obj = objects.TestClassC(obj)
+    assert outer_obj.save_self(create_name)
+
+    new_obj = dryml.load_object(create_name)
+    table = new_obj.A.table
+    assert type(table) is np.ndarray
+    assert np.array_equal(table, obj.table)
+    # Mapped in place, not copied
+    assert not table.flags.owndata
+    assert not table.flags.writeable
+
+    # Mapped arrays are saved like any other
+    new_obj.save_self(create_name)
+    assert np.array_equal(dryml.load_object(create_name).A.table, obj.table)
+
+
+def test_array_members_2():
+    """
+    Arrays are copied when they can't be mapped, and small arrays are
+    left in the pickle stream.
+    """
+    obj = objects.TestArrayState()
+    obj.table = np.asfortranarray(
+        np.arange(20000, dtype=np.int32).reshape(200, 100))
+    buffer = io.BytesIO()
+    assert obj.save_self(buffer)
+    buffer.seek(0)
+    with zipfile.ZipFile(buffer) as zf:
+        assert 'arrays/0.npy' in zf.namelist()
+
+    buffer.seek(0)
+    new_obj = dryml.load_object(buffer)
+    assert new_obj.table.flags.writeable
+    assert new_obj.table.flags.f_contiguous
+    assert np.array_equal(new_obj.table, obj.table)
+
+    obj.table = np.arange(10)
+    buffer = io.BytesIO()
+    assert obj.save_self(buffer)
+    buffer.seek(0)
+    with zipfile.ZipFile(buffer) as zf:
+        assert 'arrays/0.npy' not in zf.namelist()
+
+
+def test_array_members_3(create_name):
+    """
+    Compressed arrays are loaded by copying them.
+    """
+    obj = objects.TestArrayState()
+    obj.table = np.zeros((500, 500), dtype=np.float32)
+    assert obj.save_self(
+        create_name, compression=dryml.CompressionPolicy(array='deflated'))
+
+    new_obj = dryml.load_object(create_name)
+    assert new_obj.table.flags.writeable
+    assert np.array_equal(new_obj.table, obj.table)
+
+
+def test_array_members_4(create_name):
+    """
+    The fitted arrays of sklearn models are mapped when loaded.
+    """
+    pytest.importorskip('sklearn')
+    import sklearn.neighbors
+    import dryml.models.sklearn
+
+    X = np.random.random((10000, 4))
+    y = X.sum(axis=1)
+    model = dryml.models.sklearn.RegressionModel(
+        sklearn.neighbors.KNeighborsRegressor, algorithm='ball_tree')
+    with dryml.context.ContextManager({'default': {}}):
+        model.compute_activate()
+        model.mdl.fit(X, y)
+        expected = model(X[:10])
+        model.save_compute()
+    assert model.save_self(create_name)
+
+    new_model = dryml.load_object(create_name)
+    with dryml.context.ContextManager({'default': {}}):
+        new_model.compute_activate()
+        fit_X = new_model.mdl._fit_X
+        assert not fit_X.flags.owndata
+        assert not fit_X.flags.writeable
+        assert np.allclose(new_model(X[:10]), expected)
@@ -0,0 +1,176 @@
+import dryml
+import objects
+import os
+from dryml.checkpoint import Checkpointer, load_checkpoint, \
+    compact_checkpoint, list_deltas, current_deltas, delta_directory
+
+
+def test_checkpoint_deltas_1(create_name):
+    """
+    Checkpoints after the first only write changed object content.
+    """
+    inner_obj = objects.TestClassC2(0)
+    other_obj = objects.TestClassC2(1)
+    obj = objects.TestClassC(inner_obj, B=other_obj)
+
+    checkpointer = Checkpointer(obj, create_name)
+    assert checkpointer.save() == 1
+    filepath = checkpointer.filepath
+    base_ino = os.stat(filepath).st_ino
+    assert len(list_deltas(filepath)) == 0
+
+    inner_obj.set_val(5)
+    assert checkpointer.save() == 2
+    deltas = current_deltas(filepath)
+    assert list(deltas.keys()) == [2]
+    assert deltas[2][1]['objects'] == [inner_obj.dry_id]
+
+    # Nothing changed, nothing is written
+    assert checkpointer.save() == 2
+    assert len(list_deltas(filepath)) == 1
+
+    other_obj.set_val(7)
+    inner_obj.set_val(6)
+    assert checkpointer.save() == 3
+    assert os.stat(filepath).st_ino == base_ino
+
+    obj2 = load_checkpoint(filepath)
+    assert obj2.definition() == obj.definition()
+    assert obj2.A.data == 6
+    assert obj2.B.data == 7
+
+    # Changes made in place are written
+    inner_obj.set_val([6])
+    assert checkpointer.save() == 4
+    inner_obj.data.append(7)
+    assert checkpointer.save() == 5
+    assert load_checkpoint(filepath).A.data == [6, 7]
+    inner_obj.set_val(6)
+    assert checkpointer.save() == 6
+
+    # Earlier checkpoints can be restored
+    obj3 = load_checkpoint(filepath, seq=2)
+    assert obj3.A.data == 5
+    assert obj3.B.data == 0
+
+    # Compaction folds the deltas into the base
+    compact_checkpoint(filepath)
+    assert not os.path.exists(delta_directory(filepath))
+    obj4 = dryml.load_object(filepath)
+    assert obj4.A.data == 6
+    assert obj4.B.data == 7
+
+    # The checkpointer notices its base was replaced
+    inner_obj.set_val(8)
+    checkpointer.save()
+    assert len(list_deltas(filepath)) == 0
+    assert dryml.load_object(filepath).A.data == 8
+
+
+def test_checkpoint_deltas_2(create_name):
+    """
+    Compute data is checkpointed when it changes, and deltas are
+    replaced by full saves after max_deltas.
+    """
+    obj = objects.TestClassE()
+    outer_obj = objects.TestClassC(obj)
+
+    checkpointer = Checkpointer(outer_obj, create_name, max_deltas=2)
+    filepath = checkpointer.filepath
+    with dryml.context.ContextManager({'default': {}}):
+        obj.compute_activate()
+        obj.set_val(1)
+        checkpointer.save()
+
+        obj.set_val(2)
+        checkpointer.save()
+        assert len(list_deltas(filepath)) == 1
+
+        # Compute content is compared, so unchanged content isn't written
+        checkpointer.save()
+        assert len(list_deltas(filepath)) == 1
+
+        obj.set_val(3)
+        checkpointer.save()
+        assert len(list_deltas(filepath)) == 2
+
+        obj2 = load_checkpoint(filepath)
+        obj2.A.compute_activate()
+        assert obj2.A.data == 3
+
+        obj.set_val(4)
+        checkpointer.save()
+        assert len(list_deltas(filepath)) == 0
+
+        obj3 = load_checkpoint(filepath)
+        obj3.A.compute_activate()
+        assert obj3.A.data == 4
+
+
+def test_checkpoint_skip_unchanged_1(create_name, count_calls):
+    """
+    Checkpointers skipping unchanged objects only serialize objects
+    marked modified since they were written.
+    """
+    inner_obj = objects.TestClassC2(0)
+    other_obj = objects.TestClassC2(1)
+    obj = objects.TestClassC(inner_obj, B=other_obj)
+
+    checkpointer = Checkpointer(obj, create_name, skip_unchanged=True)
+    assert checkpointer.save() == 1
+    filepath = checkpointer.filepath
+
+    serialized = count_calls(checkpointer, '_serialize_content')
+    inner_obj.data = [5]
+    inner_obj.mark_modified()
+    assert checkpointer.save() == 2
+    assert serialized.num_calls == 1
+    assert current_deltas(filepath)[2][1]['objects'] == [inner_obj.dry_id]
+
+    # Nothing was marked, nothing is serialized
+    assert checkpointer.save() == 2
+    assert serialized.num_calls == 1
+
+    # Marked objects whose content didn't change aren't written
+    inner_obj.mark_modified()
+    assert checkpointer.save() == 2
+    assert serialized.num_calls == 2
+
+    inner_obj.data.append(6)
+    inner_obj.mark_modified()
+    assert checkpointer.save() == 3
+    assert load_checkpoint(filepath).A.data == [5, 6]
+
+
+def test_checkpoint_export_1(create_temp_dir):
+    """
+    Exported checkpoints stay loadable after the checkpoint's base is
+    replaced, by a full save or by a new checkpointer.
+    """
+    from dryml.ray.tune import save_model_checkpoint, \
+        load_model_checkpoint, trial_checkpoint_file
+
+    inner_obj = objects.TestClassC2(0)
+    obj = objects.TestClassC(inner_obj)
+
+    filepath = trial_checkpoint_file(
+        os.path.join(create_temp_dir, 'incremental'), 'trial_1', obj)
+    checkpointer = Checkpointer(obj, filepath, max_deltas=1)
+
+    checkpoint_dirs = []
+    for i in range(4):
+        inner_obj.set_val(i)
+        checkpoint_dir = os.path.join(create_temp_dir, f"checkpoint_{i}")
+        os.mkdir(checkpoint_dir)
+        save_model_checkpoint(obj, checkpoint_dir, checkpointer)
+        checkpoint_dirs.append(checkpoint_dir)
+
+    # A restored trial starts a new base
+    inner_obj.set_val(4)
+    Checkpointer(obj, filepath).save()
+    assert len(list_deltas(filepath)) == 0
+
+    for i, checkpoint_dir in enumerate(checkpoint_dirs):
+        loaded_obj = load_model_checkpoint(checkpoint_dir)
+        assert loaded_obj.definition() == obj.definition()
+        assert loaded_obj.A.data == i
@@ -345,3 +345,46 @@ def test_dry_dict_3(create_temp_dir):
     assert dict_2 is not loaded_dict
     assert dict_2['b'] is loaded_dict['b']
     assert dict_2[2.0] is loaded_dict[2.0]
+
+
+def test_collection_definition_cache_1(count_calls, monkeypatch):
+    """
+    Collection definitions are kept until the collection or one of its
+    elements changes.
+    """
+    obj1 = objects.HelloInt(msg=5)
+    obj2 = objects.HelloStr(msg='a test')
+    inner_list = List(obj1)
+    inner_dict = Dict({'a': obj2})
+    outer = Tuple(inner_list, inner_dict)
+
+    outer_def = outer.definition()
+    assert outer.definition() is outer_def
+    assert inner_list.definition() is outer_def.args[0]
+    outer_id = outer_def.get_individual_id()
+
+    # Modifying a nested collection updates its containers
+    inner_list.append(obj2)
+    assert inner_list.definition().args == \
+        (obj1.definition(), obj2.definition())
+    new_outer_def = outer.definition()
+    assert new_outer_def is not outer_def
+    assert new_outer_def.args[0] is inner_list.definition()
+    assert new_outer_def.get_individual_id() != outer_id
+    assert new_outer_def.args[1] is inner_dict.definition()
+
+    # Unrelated modifications keep the definition, without checking the
+    # definitions of the elements
+    inner_defs = count_calls(inner_list, 'definition')
+    other_list = List(obj1)
+    other_list.pop()
+    assert outer.definition() is new_outer_def
+    assert inner_defs.num_calls == 0
+    monkeypatch.undo()
+
+    inner_dict['b'] = obj1
+    inner_dict.pop('a')
+    assert outer.definition().args[1].args[0] == {'b': obj1.definition()}
+
+    inner_list.clear()
+    assert outer.definition().args[0].args == ()
@@ -1,6 +1,7 @@
 import dryml
 import objects
 import copy
+import numpy as np
 
 
 def test_def_1():
@@ -191,3 +192,114 @@ def test_def_8():
     assert trainable_obj_built['train_fn']['optimizer'][0] == opt_obj[0]
     assert trainable_obj_built['train_fn']['epochs'] == train_fn_obj['epochs']
     assert trainable_obj_built['train_fn']['loss'].A == loss_obj.A
+
+
+def test_def_hash_1():
+    """
+    Definition hashes are structural, and change when a definition, or
+    one nested within it, is modified.
+    """
+    obj = objects.TestClassC(
+        objects.TestClassC2(10),
+        B={'b': 1, 'a': [1.5, objects.TestClassC2(20)]})
+    obj_def = obj.definition()
+
+    ind_id = obj_def.get_individual_id()
+    cat_id = obj_def.get_cat_def().get_category_id()
+    assert ind_id == obj_def.get_individual_id()
+    assert hash(obj_def) == hash(ind_id)
+
+    # Dictionary order doesn't matter, types do
+    def_a = dryml.ObjectDef(objects.TestClassC2, {'x': 1, 'y': 2})
+    def_b = dryml.ObjectDef(objects.TestClassC2, {'y': 2, 'x': 1})
+    def_c = dryml.ObjectDef(objects.TestClassC2, {'x': 1.0, 'y': 2})
+    assert def_a.get_category_id() == def_b.get_category_id()
+    assert def_a.get_category_id() != def_c.get_category_id()
+
+    # Equal definitions of new objects share categories
+    obj2 = objects.TestClassC(
+        objects.TestClassC2(10),
+        B={'a': [1.5, objects.TestClassC2(20)], 'b': 1})
+    assert obj2.definition().get_cat_def().get_category_id() == cat_id
+    assert obj2.definition().get_individual_id() != ind_id
+
+    # Modifying a nested definition changes the hash of its container
+    inner_def = obj_def.args[0]
+    inner_def['dry_mut'] = True
+    inner_def['dry_args'] = (11,)
+    new_id = obj_def.get_individual_id()
+    assert new_id != ind_id
+    obj_def.kwargs['B']['a'][1].kwargs['extra'] = 1
+    assert obj_def.get_individual_id() != new_id
+
+    # Memoized values aren't pickled
+    obj_def2 = copy.deepcopy(obj_def)
+    assert '_memo' not in obj_def2.__dict__
+    assert obj_def2.get_individual_id() == obj_def.get_individual_id()
+
+
+def test_def_hash_2():
+    """
+    Hashes stay consistent with equality when values nested within a
+    definition are modified in place.
+    """
+    obj_def = dryml.ObjectDef(
+        objects.TestClassC2, 1, b={'c': 1}, dry_id='a')
+    cat_id = obj_def.get_category_id()
+    obj_def.kwargs['b']['c'] = 2
+    new_def = dryml.ObjectDef(
+        objects.TestClassC2, 1, b={'c': 2}, dry_id='a')
+    assert obj_def == new_def
+    assert obj_def.get_category_id() == new_def.get_category_id()
+    assert obj_def.get_category_id() != cat_id
+    assert hash(obj_def) == hash(new_def)
+
+    # Definitions of immutable values are memoized, and drop their memos
+    # when a nested definition is modified.
+    inner_def = dryml.ObjectDef(objects.TestClassC2, 1, dry_id='b')
+    outer_def = dryml.ObjectDef(
+        objects.TestClassC, (inner_def, 'x'), dry_id='c')
+    ind_id = outer_def.get_individual_id()
+    assert outer_def._get_memo() is not None
+    inner_def.kwargs['B'] = 2
+    assert outer_def.get_individual_id() != ind_id
+    assert outer_def.get_individual_id() == dryml.ObjectDef(
+        objects.TestClassC,
+        (dryml.ObjectDef(objects.TestClassC2, 1, B=2, dry_id='b'), 'x'),
+        dry_id='c').get_individual_id()
+    # Lists and dicts nested in definitions are tracked once memoized,
+    # arrays aren't memoized
+    inner_def.kwargs['B'] = [2]
+    ind_id = outer_def.get_individual_id()
+    assert outer_def._get_memo() is not None
+    inner_def.kwargs['B'].append({'c': 3})
+    assert outer_def.get_individual_id() != ind_id
+    ind_id = outer_def.get_individual_id()
+    inner_def.kwargs['B'][1]['c'] = 4
+    assert outer_def.get_individual_id() != ind_id
+    assert inner_def == dryml.ObjectDef(
+        objects.TestClassC2, 1, B=[2, {'c': 4}], dry_id='b')
+    inner_def.kwargs['B'] = np.zeros(2)
+    assert outer_def._get_memo() is None
+
+
+def test_def_hash_3(count_calls):
+    """
+    Hashes of object definitions are memoized.
+    """
+    obj = objects.TestClassC(
+        objects.TestClassC2(3), B={'a': [1, objects.TestClassC2(4)]})
+    obj_def = obj.definition()
+    ind_id = obj_def.get_individual_id()
+    cat_id = obj_def.get_category_id()
+
+    hashes = count_calls(dryml.config, 'hash_def_val')
+    assert obj_def.get_individual_id() == ind_id
+    assert obj_def.get_category_id() == cat_id
+    assert hash(obj_def) == hash(ind_id)
+    assert hashes.num_calls == 0
+
+    # Tracked metadata still changes the hash
+    obj_def.kwargs['dry_metadata']['description'] = 'changed'
+    assert obj_def.get_individual_id() != ind_id
+    assert obj_def.get_category_id() == cat_id
@@ -95,6 +95,50 @@ def test_data_util_slicer_4():
     assert np.all(data_slice2['key2'] == data3[slice2])
 
 
+def test_data_util_renester_1():
+    data = (1, {'key1': (2, 3), 'key2': 4}, (5, (6,)))
+
+    flat_data = util.nested_flatten(data)
+    assert flat_data == [1, 2, 3, 4, 5, 6]
+
+    renester = util.nested_renester(data)
+    assert renester(flat_data) == data
+    assert renester(list(range(10, 16))) == \
+        (10, {'key1': (11, 12), 'key2': 13}, (14, (15,)))
+    assert util.renest_flat(data, flat_data) == data
+
+    assert util.nested_renester(7)([8]) == 8
+
+
+def test_data_util_batcher_1():
+    data_x = np.random.random((10, 3)).astype(np.float32)
+    data_y = np.arange(10)
+    elements = [(x, {'y': y}) for x, y in zip(data_x, data_y)]
+
+    for drop_remainder in [True, False]:
+        batches = list(util.nested_batcher(
+            lambda: elements, 4, util.stack_arrays,
+            drop_remainder=drop_remainder))
+
+        assert len(batches) == (2 if drop_remainder else 3)
+        for i, batch in enumerate(batches):
+            assert batch[0].dtype == np.float32
+            assert np.all(batch[0] == data_x[i*4:(i+1)*4])
+            assert np.all(batch[1]['y'] == data_y[i*4:(i+1)*4])
+
+    # Leaves are promoted to a common dtype like np.stack
+    leaves = (np.zeros(2, dtype=np.int64), np.full(2, 2.5))
+    assert util.stack_arrays(leaves).dtype == np.float64
+    assert np.all(util.stack_arrays(leaves) == np.stack(leaves))
+
+    with pytest.raises(ValueError):
+        util.stack_arrays((np.zeros(2), np.zeros(3)))
+
+    with pytest.raises(ValueError):
+        list(util.nested_batcher(
+            lambda: [(1, 2), (1, 2, 3)], 2, util.stack_arrays))
+
+
 def test_numpy_dataset_1():
     batch_size = 10
 
@@ -414,6 +458,332 @@ def test_numpy_dataset_18():
     assert np.all(el_a[1] == el_b[1])
 
 
+def test_numpy_dataset_19():
+    """
+    Test rebatching, take, skip and indexing of array backed datasets
+    """
+    data_x = np.random.random((50, 4))
+    data_y = np.random.random((50, 1))
+
+    dataset = NumpyDataset((data_x, data_y), supervised=True)
+
+    batches = dataset.batch(batch_size=16).collect()
+    assert len(batches) == 3
+    assert len(dataset.batch(batch_size=16)) == 3
+    for i, (x, y) in enumerate(batches):
+        # Batches are views of the original arrays
+        assert np.shares_memory(x, data_x)
+        assert np.all(x == data_x[i*16:(i+1)*16])
+        assert np.all(y == data_y[i*16:(i+1)*16])
+
+    batches = dataset.batch(batch_size=16, drop_remainder=False) \
+                     .batch(batch_size=20, drop_remainder=False).collect()
+    assert [len(x) for x, _ in batches] == [20, 20, 10]
+    assert np.all(batches[2][0] == data_x[40:])
+
+    batches = dataset.batch(batch_size=10).skip(1).take(2).collect()
+    assert len(batches) == 2
+    assert np.all(batches[0][0] == data_x[10:20])
+    assert np.all(batches[1][0] == data_x[20:30])
+
+    rows = dataset.unbatch().skip(45).collect()
+    assert len(rows) == 5
+    assert len(dataset.unbatch().skip(45)) == 5
+    assert np.all(rows[0][0] == data_x[45])
+
+    indexed = dataset.as_indexed(start=5).batch(batch_size=10).take(2)
+    batches = indexed.collect()
+    assert indexed.indexed
+    assert np.all(batches[1][0] == np.arange(15, 25))
+    assert np.all(batches[1][1][0] == data_x[10:20])
+
+    rows = dataset.unbatch().as_indexed().collect()
+    assert rows[3][0] == 3
+    assert np.all(rows[3][1][1] == data_y[3])
+
+
+def test_numpy_dataset_20():
+    """
+    Test buffered shuffling
+    """
+    data = np.arange(100)
+    dataset = NumpyDataset(list(data))
+
+    shuffled = dataset.shuffle(10, seed=1).collect()
+    assert sorted(shuffled) == list(data)
+    assert shuffled != list(data)
+    assert shuffled == dataset.shuffle(10, seed=1).collect()
+
+    # Every element of the buffer can be drawn, including the last.
+    first_elements = set()
+    for seed in range(50):
+        first_elements.add(
+            NumpyDataset([0, 1]).shuffle(2, seed=seed).collect()[0])
+    assert first_elements == {0, 1}
+
+    shuffled = dataset.shuffle(None, seed=1).collect()
+    assert sorted(shuffled) == list(data)
+
+
+def test_numpy_dataset_21():
+    """
+    Test shuffling array backed datasets by permuting them
+    """
+    data_x = np.arange(100)
+    data_y = np.arange(100)*2
+
+    dataset = NumpyDataset((data_x, data_y), supervised=True) \
+        .shuffle(None, seed=3)
+    assert len(dataset) == 100
+
+    batches = dataset.batch(batch_size=32).collect()
+    assert len(batches) == 3
+    for x, y in batches:
+        assert np.all(y == x*2)
+    x = np.concatenate([x for x, _ in batches])
+    assert len(set(x)) == 96
+    assert not np.all(x == data_x[:96])
+
+    rows = dataset.collect()
+    assert sorted(x for x, _ in rows) == list(data_x)
+    assert [x for x, _ in rows][:96] == list(
+        np.concatenate([x for x, _ in batches]))
+
+    # take and skip follow the shuffled order
+    x_skip = np.concatenate(
+        [x for x, _ in dataset.batch(batch_size=10).skip(2).take(3)])
+    assert np.all(x_skip == [x for x, _ in rows][20:50])
+
+    # Shuffles are repeated with a seed, and differ without one
+    assert np.all(dataset.batch(batch_size=100).peek()[0] ==
+                  dataset.batch(batch_size=100).peek()[0])
+    unseeded = NumpyDataset(data_x).shuffle(1000).batch(batch_size=100)
+    assert not np.all(unseeded.peek() == unseeded.peek())
+
+
+def test_shuffle_size_1():
+    def batch_gen():
+        return iter([np.array([2*i, 2*i+1]) for i in range(3)])
+
+    # Shuffling unbatches, so the number of batches isn't kept
+    dataset = NumpyDataset(batch_gen, batch_size=2, size=3)
+    shuffled = dataset.shuffle(4, seed=0)
+    assert np.isnan(shuffled.size)
+    assert sorted(shuffled.collect()) == list(range(6))
+
+    rows = NumpyDataset(lambda: iter(range(5)), size=5).shuffle(2, seed=0)
+    assert rows.size == 5
+
+
+def test_shuffle_size_torch_1():
+    torch = pytest.importorskip('torch')
+    from dryml.data.torch import TorchDataset, TorchIterableDatasetWrapper
+
+    torch_ds = TorchIterableDatasetWrapper(
+        lambda: iter([torch.tensor([2*i, 2*i+1]) for i in range(3)]))
+    dataset = TorchDataset(torch_ds, batch_size=2, size=3)
+    shuffled = dataset.shuffle(4, seed=0)
+    assert np.isnan(shuffled.size)
+    assert sorted(int(el) for el in shuffled) == list(range(6))
+
+
+def test_random_access_dataset_1():
+    data_x = np.random.random((50, 4))
+    data_y = np.random.random((50, 1))
+
+    dataset = NumpyDataset((data_x, data_y), supervised=True).unbatch()
+    assert type(dataset) is dryml.data.RandomAccessDataset
+    assert len(dataset) == 50
+    assert dataset.count() == 50
+
+    x, y = dataset[3]
+    assert np.all(x == data_x[3])
+    assert np.all(y == data_y[3])
+    assert np.all(dataset[-1][0] == data_x[-1])
+    with pytest.raises(IndexError):
+        dataset[50]
+
+    sub_dataset = dataset[10:20]
+    assert len(sub_dataset) == 10
+    assert np.all(sub_dataset[0][0] == data_x[10])
+    assert np.all(dataset.skip(45)[0][0] == data_x[45])
+    assert len(dataset.skip(45).take(2)) == 2
+
+    gathered = dataset[np.array([5, 1, 5])]
+    assert len(gathered) == 3
+    assert np.all(gathered[2][1] == data_y[5])
+    assert np.all(gathered.batch(batch_size=3).peek()[0] == data_x[[5, 1, 5]])
+
+    batched = dataset.batch(batch_size=16, drop_remainder=False)
+    assert len(batched) == 4
+    assert np.all(batched[1][0] == data_x[16:32])
+    assert np.all(batched[3][0] == data_x[48:])
+    assert len(batched[1:3]) == 2
+    assert np.all(batched[1:3][0][0] == data_x[16:32])
+
+
+def test_random_access_dataset_2():
+    data = np.arange(100)
+    dataset = dryml.data.RandomAccessDataset(data)
+
+    permuted = dataset.permute(seed=2)
+    assert len(permuted) == 100
+    rows = permuted.collect()
+    assert sorted(rows) == list(data)
+    assert rows != list(data)
+    assert [permuted[i] for i in range(100)] == rows
+    assert permuted.collect() == rows
+
+    train, test = permuted.split(0.8)
+    assert len(train) == 80
+    assert len(test) == 20
+    assert train.collect() + test.collect() == rows
+
+    indexed = permuted.as_indexed().batch(batch_size=10)
+    idx, batch = indexed[2]
+    assert np.all(idx == np.arange(20, 30))
+    assert np.all(batch == rows[20:30])
+
+    with pytest.raises(TypeError):
+        dryml.data.RandomAccessDataset([1, 2, 3])
+    with pytest.raises(TypeError):
+        dataset.shuffle(None).random_access()
+
+
+def test_random_access_dataset_torch_1():
+    torch = pytest.importorskip('torch')
+    from dryml.data.torch import TorchMapDatasetWrapper
+
+    data_x = np.random.random((50, 4))
+    data_y = np.random.random((50, 1))
+    dataset = dryml.data.RandomAccessDataset(
+        (data_x, data_y), supervised=True)
+
+    torch_dataset = dataset.torch()
+    assert len(torch_dataset) == 50
+    rows = list(torch_dataset)
+    assert len(rows) == 50
+    for (x, y), (torch_x, torch_y) in zip(dataset, rows):
+        assert torch_eq(torch_x, torch.tensor(x))
+        assert torch_eq(torch_y, torch.tensor(y))
+
+    batched = dataset.batch(batch_size=16, drop_remainder=False).torch()
+    assert len(batched) == 4
+    batches = list(batched)
+    assert len(batches) == 4
+    assert torch_eq(batches[1][0], torch.tensor(data_x[16:32]))
+    assert torch_eq(batches[3][1], torch.tensor(data_y[48:]))
+
+    # The wrapped dataset is map style, so torch can sample it
+    map_ds = torch_dataset.data()
+    assert type(map_ds) is TorchMapDatasetWrapper
+    assert len(map_ds) == 50
+    assert torch_eq(map_ds[7][0], torch.tensor(data_x[7]))
+    loader = torch.utils.data.DataLoader(
+        map_ds, batch_size=2, sampler=[5, 1, 7, 3])
+    loaded = list(loader)
+    assert len(loaded) == 2
+    assert torch_eq(loaded[0][0], torch.tensor(data_x[[5, 1]]))
+    assert torch_eq(loaded[1][1], torch.tensor(data_y[[7, 3]]))
+
+
+def test_sharded_array_1():
+    shards = [np.arange(i, i+n).reshape(-1, 1) for i, n in
+              [(0, 4), (4, 3), (7, 5)]]
+    array = dryml.data.ShardedArray(shards)
+    full = np.arange(12).reshape(-1, 1)
+
+    assert array.shape == (12, 1)
+    assert len(array) == 12
+    assert np.all(np.asarray(array) == full)
+    assert np.all(array[5] == full[5])
+    assert np.all(array[-1] == full[-1])
+
+    # Slices within a shard are views
+    assert np.shares_memory(array[4:6], shards[1])
+    assert np.all(np.asarray(array[2:9]) == full[2:9])
+    assert np.all(np.asarray(array[::3]) == full[::3])
+
+    rows = np.array([11, 0, 5, 5])
+    assert np.all(array[rows] == full[rows])
+    assert np.all(np.concatenate(list(array)) == full[:, 0])
+
+    with pytest.raises(IndexError):
+        array[12]
+    with pytest.raises(ValueError):
+        dryml.data.ShardedArray([np.zeros((2, 1)), np.zeros((2, 2))])
+
+
+@pytest.mark.usefixtures("create_temp_dir")
+def test_npy_dataset_1(create_temp_dir):
+    import os
+    x_dir = os.path.join(create_temp_dir, 'x')
+    os.mkdir(x_dir)
+    data_x = np.random.random((100, 3))
+    data_y = np.arange(100)
+    for i, (start, stop) in enumerate([(0, 30), (30, 35), (35, 100)]):
+        np.save(os.path.join(x_dir, f"{i:03d}.npy"), data_x[start:stop])
+    y_file = os.path.join(create_temp_dir, 'y.npy')
+    np.save(y_file, data_y)
+
+    dataset = dryml.data.RandomAccessDataset.from_npy(
+        (x_dir, y_file), supervised=True)
+    assert type(dataset._array_data[0]) is dryml.data.ShardedArray
+    assert type(dataset._array_data[1]) is np.memmap
+    assert len(dataset) == 100
+
+    batches = dataset.batch(batch_size=16).collect()
+    assert len(batches) == 6
+    for i, (x, y) in enumerate(batches):
+        assert type(x) is np.ndarray
+        assert np.all(x == data_x[i*16:(i+1)*16])
+        assert np.all(y == data_y[i*16:(i+1)*16])
+
+    x, y = dataset[33]
+    assert np.all(x == data_x[33])
+    assert y == 33
+
+    indexed = dataset.permute(seed=0).as_indexed().batch(batch_size=10)
+    for idx, (x, y) in indexed:
+        assert np.all(x == data_x[y])
+    idx, _ = indexed[3]
+    assert np.all(idx == np.arange(30, 40))
+
+    rows = dataset.shuffle(None, seed=0).collect()
+    assert sorted(y for _, y in rows) == list(data_y)
+
+    # Sharded arrays aren't read into memory as a single batch
+    with pytest.raises(TypeError):
+        NumpyDataset(dataset._array_data[0])
+    with pytest.raises(TypeError):
+        NumpyDataset(dataset._array_data)
+
+
+@pytest.mark.usefixtures("create_temp_dir")
+def test_npy_dataset_2(create_temp_dir):
+    import os
+    data = np.arange(100)
+    path = os.path.join(create_temp_dir, 'data.npy')
+    np.save(path, data)
+
+    dataset = dryml.data.RandomAccessDataset.from_npy(path)
+
+    shuffled = dataset.shuffle_chunks(10, seed=1)
+    rows = shuffled.collect()
+    assert sorted(rows) == list(data)
+    assert rows != list(data)
+    # Each run of 10 rows comes from a single chunk
+    for i in range(0, 100, 10):
+        assert len(set(r // 10 for r in rows[i:i+10])) == 1
+    assert rows == shuffled.collect()
+
+    batches = shuffled.batch(batch_size=5).collect()
+    assert list(np.concatenate(batches)) == rows
+
+    with pytest.raises(TypeError):
+        NumpyDataset(lambda: iter(data)).shuffle_chunks(10)
+
+
 def test_chain_transforms_9():
     batch_size = 32
     data_block = np.random.random((batch_size, 5))
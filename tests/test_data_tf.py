@@ -1,3 +1,5 @@
+import os
+import tempfile
 import numpy as np
 import pytest
 try:
@@ -325,6 +327,40 @@ def test_numpy_to_tf_dataset_2():
         assert np.all(numpy_data == tf_data.numpy())
 
 
+@ray_wrap
+def test_random_access_to_tf_dataset_1():
+    with dryml.context.ContextManager({'tf': {}}):
+        data_x = np.random.random((50, 4))
+        data_y = np.random.random((50, 1))
+        dataset = dryml.data.RandomAccessDataset(
+            (data_x, data_y), supervised=True)
+
+        tf_dataset = dataset.tf()
+        assert len(tf_dataset) == 50
+        rows = list(tf_dataset)
+        assert len(rows) == 50
+        for (x, y), (tf_x, tf_y) in zip(dataset, rows):
+            assert np.all(x == tf_x.numpy())
+            assert np.all(y == tf_y.numpy())
+
+        batched = dataset.batch(batch_size=16, drop_remainder=False).tf()
+        assert len(batched) == 4
+        batches = list(batched)
+        assert len(batches) == 4
+        assert np.all(batches[1][0].numpy() == data_x[16:32])
+        assert np.all(batches[3][1].numpy() == data_y[48:])
+
+        # Memory mapped arrays are streamed
+        with tempfile.TemporaryDirectory() as directory:
+            x_path = os.path.join(directory, 'x.npy')
+            np.save(x_path, data_x)
+            mapped = dryml.data.RandomAccessDataset.from_npy(
+                x_path, batch_size=16)
+            batches = list(mapped.tf())
+            assert len(batches) == 3
+            assert np.all(batches[2].numpy() == data_x[32:48])
+
+
 @ray_wrap
 def test_chain_transforms_1():
     with dryml.context.ContextManager({'tf': {}}):
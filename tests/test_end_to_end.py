@@ -38,6 +38,40 @@ def test_compute_context_consistency_2():
         assert obj.val == 20
 
 
+@pytest.mark.usefixtures("create_name")
+def test_lazy_compute_load_1(create_name):
+    from dryml.file_intermediary import FileSegment
+
+    obj = objects.TestClassE()
+
+    with dryml.context.ContextManager({'default': {}}):
+        obj.compute_activate()
+        obj.set_val(20)
+        obj.save_compute()
+
+    outer_obj = objects.TestClassC(obj)
+    assert outer_obj.save_self(create_name)
+
+    # Compute data should only be referenced, not copied on load.
+    outer_obj2 = dryml.load_object(create_name)
+    compute_data = outer_obj2.A.__dry_compute_data__
+    assert type(compute_data) is FileSegment
+    assert not compute_data.is_materialized
+
+    # Saving over the source file must preserve the referenced data.
+    assert outer_obj2.save_self(create_name)
+    assert compute_data.is_materialized
+
+    with dryml.context.ContextManager({'default': {}}):
+        outer_obj2.A.compute_activate()
+        assert outer_obj2.A.data == 20
+
+    outer_obj3 = dryml.load_object(create_name)
+    with dryml.context.ContextManager({'default': {}}):
+        outer_obj3.compute_activate()
+        assert outer_obj3.A.data == 20
+
+
 # Model and definition generators
 
 
@@ -1,4 +1,5 @@
-from dryml.file_intermediary import FileIntermediary
+from dryml.file_intermediary import FileIntermediary, FileSegment, \
+    zip_member_segment
 import zipfile
 import pytest
 import pickle
@@ -178,3 +179,82 @@ def test_file_intermediary_6(create_name):
             assert f2.read().decode('utf-8') == test_text
 
     int_file.close()
+
+
+@pytest.mark.usefixtures("create_name")
+def test_file_segment_1(create_name):
+    # Create a zip with a stored member, which itself is a zip.
+    inner_file = FileIntermediary(mem_mode=True)
+    with zipfile.ZipFile(inner_file, mode='w') as z_file:
+        with z_file.open('test.txt', 'w') as f:
+            f.write("TEST".encode('utf-8'))
+
+    with zipfile.ZipFile(create_name, mode='w') as z_file:
+        with z_file.open('inner.zip', 'w') as f:
+            inner_file.write_to_file(f)
+
+    # Open the member in place, and read the inner zip.
+    with zipfile.ZipFile(create_name, mode='r') as z_file:
+        segment = zip_member_segment(z_file, 'inner.zip')
+    assert type(segment) is FileSegment
+    assert segment.size() == inner_file.size()
+    assert not segment.is_empty()
+
+    with zipfile.ZipFile(segment, mode='r') as z_file:
+        with z_file.open('test.txt', 'r') as f:
+            assert f.read().decode('utf-8') == "TEST"
+
+    segment.close()
+
+
+@pytest.mark.usefixtures("create_name")
+def test_file_segment_2(create_name):
+    with open(create_name, 'wb') as f:
+        f.write(b'0123456789')
+
+    segment_1 = FileSegment(create_name, 2, 5)
+    segment_2 = FileSegment(create_name, 2, 5)
+    assert segment_1.read() == b'23456'
+
+    # Segments are written to files by name.
+    segment_2.write_to_file(f"{create_name}.out")
+    with open(f"{create_name}.out", 'rb') as f:
+        assert f.read() == b'23456'
+    os.remove(f"{create_name}.out")
+
+    # Materialize segments before overwriting the file.
+    segment_1.seek(1)
+    FileSegment.materialize_file(create_name)
+    with open(create_name, 'wb') as f:
+        f.write(b'abcdefghij')
+
+    assert segment_1.is_materialized
+    assert segment_1.read() == b'3456'
+    segment_1.seek(0)
+    assert segment_1.read(2) == b'23'
+
+    # A segment created afterwards sees the new content.
+    segment_3 = FileSegment(create_name, 2, 5)
+    assert segment_3.read() == b'cdefg'
+
+    segment_1.close()
+    segment_2.close()
+    segment_3.close()
+
+
+@pytest.mark.usefixtures("create_name")
+def test_file_segment_3(create_name):
+    with open(create_name, 'wb') as f:
+        f.write(b'0123456789')
+
+    segment = FileSegment(create_name, 2, 5)
+
+    # Replace the file without materializing the segment.
+    os.remove(create_name)
+    with open(create_name, 'wb') as f:
+        f.write(b'abcdefghijk')
+
+    with pytest.raises(RuntimeError):
+        segment.read()
+
+    segment.close()
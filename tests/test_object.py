@@ -452,6 +452,30 @@ def test_object_args_passing_7():
     assert type(obj2_cpy.A['A'][0][0]) is type(obj1)
 
 
+def test_object_args_passing_8():
+    """
+    Test collected arguments, and the contained objects found in them
+    """
+    import objects as objs
+
+    obj1 = objs.TestNest(1)
+    obj2 = objs.TestNest2(A=2)
+    obj3 = objs.TestNest(3)
+
+    obj = objs.TestNest3(
+        obj1, [1, 'a', (obj2,)], b={'c': obj3, 'd': None}, dry_id='test')
+
+    assert obj.dry_id == 'test'
+    assert obj.dry_args == (obj1, [1, 'a', (obj2,)])
+    assert obj.dry_kwargs['b'] == {'c': obj3, 'd': None}
+    assert obj.__dry_obj_container_list__ == [obj1, obj2, obj3]
+
+    obj_cpy = obj.definition().build()
+
+    assert obj.definition() == obj_cpy.definition()
+    assert len(obj_cpy.__dry_obj_container_list__) == 3
+
+
 def test_object_config_1():
     import objects as objs
 
@@ -814,3 +838,222 @@ def test_build_crash_1():
     obj2 = test_def_2.build()
 
     assert obj1.dry_id != obj2.dry_id
+
+
+def test_streaming_save_1(create_temp_dir):
+    """
+    Saves stream to a temporary file which replaces the target only once
+    the save succeeds.
+    """
+    import objects
+
+    filepath = os.path.join(create_temp_dir, 'obj.dry')
+
+    obj = objects.TestClassC2(1)
+    obj.set_val(5)
+    assert obj.save_self(filepath)
+    assert os.listdir(create_temp_dir) == ['obj.dry']
+
+    # A failing save leaves the existing file alone.
+    obj.set_val(i for i in range(3))
+    with pytest.raises(Exception):
+        obj.save_self(filepath)
+    assert os.listdir(create_temp_dir) == ['obj.dry']
+    assert dryml.load_object(filepath).data == 5
+
+    # So does a save which reports failure.
+    obj.set_val(6)
+    orig_save_object = obj.save_object
+    obj.save_object = lambda *args, **kwargs: False
+    assert not obj.save_self(filepath)
+    assert os.listdir(create_temp_dir) == ['obj.dry']
+    assert dryml.load_object(filepath).data == 5
+    obj.save_object = orig_save_object
+
+    # Overwriting works, even while an object loaded from the file is alive.
+    loaded_obj = dryml.load_object(filepath)
+    obj.set_val(7)
+    assert obj.save_self(filepath)
+    assert os.listdir(create_temp_dir) == ['obj.dry']
+    assert dryml.load_object(filepath).data == 7
+    assert loaded_obj.data == 5
+
+
+@pytest.mark.parametrize("compression", [
+    'deflated',
+    dryml.CompressionPolicy('deflated', compute='stored', object='stored'),
+    dryml.CompressionPolicy(data=('lzma', None), meta='bzip2'),
+])
+def test_save_compression_1(create_temp_dir, compression):
+    """
+    Members are compressed according to the save's compression policy.
+    """
+    import zipfile
+    import objects
+
+    filepath = os.path.join(create_temp_dir, 'obj.dry')
+
+    inner = objects.TestClassC2(1)
+    inner.set_val([0]*10000)
+    obj = objects.TestClassC(inner)
+    assert obj.save_self(filepath, compression=compression)
+
+    policy = dryml.CompressionPolicy.build(compression)
+    with zipfile.ZipFile(filepath) as zf:
+        for info in zf.infolist():
+            assert info.compress_type == policy.compression(info.filename)[0]
+
+    new_obj = dryml.load_object(filepath)
+    assert new_obj.definition() == obj.definition()
+    assert new_obj.A.data == inner.data
+
+
+def test_save_compression_2():
+    with pytest.raises(ValueError):
+        dryml.CompressionPolicy('zstd')
+    with pytest.raises(ValueError):
+        dryml.CompressionPolicy(weights='deflated')
+    with pytest.raises(ValueError):
+        dryml.CompressionPolicy(('stored', 5))
+
+
+@pytest.mark.parametrize("version", [1, 2])
+def test_save_version_1(create_temp_dir, version):
+    """
+    Both file versions save and load, and version 2 definitions come
+    from the manifest alone.
+    """
+    import zipfile
+    import objects
+
+    filepath = os.path.join(create_temp_dir, 'obj.dry')
+
+    inner = objects.TestClassC2(1)
+    inner.set_val(3)
+    obj = objects.TestClassC(inner, B=objects.HelloStr(msg='test'))
+    assert obj.save_self(filepath, version=version)
+
+    with zipfile.ZipFile(filepath) as zf:
+        assert (dryml.ObjectFile.manifest_name in zf.namelist()) == \
+            (version == 2)
+
+    with dryml.ObjectFile(filepath) as f:
+        orig_open = f.z_file.open
+        opened = []
+
+        def tracking_open(name, *args, **kwargs):
+            opened.append(name)
+            return orig_open(name, *args, **kwargs)
+
+        f.z_file.open = tracking_open
+        assert f.definition() == obj.definition()
+        if version == 2:
+            # Only the manifest needs to be read.
+            assert opened == [dryml.ObjectFile.manifest_name]
+        assert f.file_version() == version
+        assert set(f.contained_object_ids()) == \
+            set([inner.dry_id, obj.B.dry_id])
+
+    new_obj = dryml.load_object(filepath)
+    assert new_obj.definition() == obj.definition()
+    assert new_obj.A.data == 3
+    assert new_obj.B.str_message == 'test'
+
+    # Files stay readable by older releases unless asked otherwise
+    assert obj.save_self(filepath)
+    with dryml.ObjectFile(filepath) as f:
+        assert f.file_version() == 1
+
+
+def test_class_def_cache_1(create_temp_dir, monkeypatch):
+    """
+    Each class is only pickled once per save.
+    """
+    import objects
+    import dryml.object
+
+    num_dumps = [0]
+    orig_dump_class_def = dryml.object.dump_class_def
+
+    def counting_dump_class_def(cls):
+        num_dumps[0] += 1
+        return orig_dump_class_def(cls)
+
+    monkeypatch.setattr(
+        dryml.object, 'dump_class_def', counting_dump_class_def)
+
+    obj = objects.TestClassC(
+        objects.TestClassC(objects.TestClassC2(1)),
+        B=objects.TestClassC(objects.TestClassC2(2)))
+    filepath = os.path.join(create_temp_dir, 'obj.dry')
+    assert obj.save_self(filepath)
+    # TestClassC and TestClassC2
+    assert num_dumps[0] == 2
+
+    new_obj = dryml.load_object(filepath)
+    assert new_obj.definition() == obj.definition()
+
+
+def test_save_async_1(create_name):
+    """
+    Background saves write the compute data captured when they started.
+    """
+    import threading
+    import dryml.background_save
+    import objects
+
+    obj = objects.TestClassE()
+    outer_obj = objects.TestClassC(obj)
+
+    # Hold the background thread until the object has changed again
+    release = threading.Event()
+    dryml.background_save.background_saver.submit(release.wait)
+
+    with dryml.context.ContextManager({'default': {}}):
+        obj.compute_activate()
+        obj.set_val(1)
+        future = outer_obj.save_async(create_name)
+        obj.set_val(2)
+        release.set()
+        assert future.result()
+
+        dryml.wait_for_saves()
+        assert dryml.background_save.background_saver.pending() == 0
+
+        new_obj = dryml.load_object(create_name)
+        new_obj.A.compute_activate()
+        assert new_obj.A.data == 1
+
+
+@pytest.mark.parametrize("use_blob_store", [False, True])
+def test_parallel_save_1(create_temp_dir, use_blob_store):
+    """
+    Contained objects serialized in parallel are assembled in order, so
+    the file is the same as when saved sequentially.
+    """
+    import objects
+
+    shared_obj = objects.TestClassC2(100)
+    inner_objs = [
+        objects.TestClassC(objects.TestClassC2(i), B=shared_obj)
+        for i in range(8)]
+    obj = dryml.Tuple(*inner_objs)
+
+    blob_store = None
+    if use_blob_store:
+        blob_store = dryml.BlobStore.for_directory(create_temp_dir)
+
+    seq_path = os.path.join(create_temp_dir, 'seq.dry')
+    par_path = os.path.join(create_temp_dir, 'par.dry')
+    assert obj.save_self(seq_path, blob_store=blob_store)
+    assert obj.save_self(par_path, blob_store=blob_store, num_workers=4)
+
+    with open(seq_path, 'rb') as f:
+        seq_bytes = f.read()
+    with open(par_path, 'rb') as f:
+        par_bytes = f.read()
+    assert seq_bytes == par_bytes
+
+    new_obj = dryml.load_object(par_path)
+    assert new_obj.definition() == obj.definition()
+    assert [o.A.C for o in new_obj] == list(range(8))
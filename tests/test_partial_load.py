@@ -0,0 +1,117 @@
+import dryml
+import objects
+import pytest
+import sys
+import os
+import types
+import pickle
+import collections
+import dill
+import numpy as np
+from dryml.partial_load import ClassRef, load_definition, \
+    load_sub_object, resolve_path, _loads
+
+
+def test_load_sub_object_1(create_name):
+    """
+    Contained objects load by id or path without their siblings.
+    """
+    deep_obj = objects.TestClassC2(3)
+    deep_obj.set_val(4)
+    inner_obj = objects.TestClassC(deep_obj)
+    other_obj = objects.TestClassC2(1)
+    obj = objects.TestClassC(inner_obj, B=[other_obj, 5])
+    assert obj.save_self(create_name)
+
+    sub_obj = load_sub_object(create_name, dry_id=deep_obj.dry_id)
+    assert sub_obj.definition() == deep_obj.definition()
+    assert sub_obj.data == 4
+
+    sub_obj = load_sub_object(create_name, path='A')
+    assert sub_obj.definition() == inner_obj.definition()
+    assert sub_obj.A.data == 4
+
+    sub_obj = load_sub_object(create_name, path='B.0')
+    assert sub_obj.dry_id == other_obj.dry_id
+
+    with pytest.raises(ValueError):
+        load_sub_object(create_name, path='B.1')
+    with pytest.raises(KeyError):
+        load_sub_object(create_name, dry_id=obj.dry_id)
+
+    with pytest.raises(ValueError):
+        resolve_path(obj.definition(), 'C')
+
+
+def test_load_definition_1(create_temp_dir, create_name):
+    """
+    Definitions are read without importing their classes.
+    """
+    module_dir = os.path.join(create_temp_dir, 'modules')
+    os.mkdir(module_dir)
+    with open(os.path.join(module_dir, 'partial_mod.py'), 'w') as f:
+        f.write(
+            "import dryml\n\n\n"
+            "class Holder(dryml.Object):\n"
+            "    def __init__(self, A, n=1):\n"
+            "        self.A = A\n")
+
+    sys.path.insert(0, module_dir)
+    try:
+        import partial_mod
+        inner_obj = partial_mod.Holder(5)
+        obj = partial_mod.Holder(inner_obj, n=2)
+        assert obj.save_self(create_name)
+    finally:
+        sys.path.remove(module_dir)
+        del sys.modules['partial_mod']
+
+    obj_def = load_definition(create_name)
+    assert obj_def.cls == ClassRef('partial_mod', 'Holder')
+    assert obj_def.dry_id == obj.dry_id
+    assert obj_def.kwargs['n'] == 2
+    inner_def = obj_def.args[0]
+    assert inner_def.cls == ClassRef('partial_mod', 'Holder')
+    assert inner_def.dry_id == inner_obj.dry_id
+    assert 'partial_mod' not in sys.modules
+
+    inner_def = load_definition(create_name, dry_id=inner_obj.dry_id)
+    assert inner_def.args == (5,)
+    assert inner_def.dry_id == inner_obj.dry_id
+
+    with pytest.raises(ModuleNotFoundError):
+        load_definition(create_name, resolve_classes=True)
+
+
+def test_load_definition_2(create_name):
+    obj = objects.TestClassC(objects.TestClassC2(1))
+    assert obj.save_self(create_name)
+    assert load_definition(create_name, resolve_classes=True) == \
+        obj.definition()
+    assert dryml.load_definition(create_name).cls.resolve() is \
+        objects.TestClassC
+
+
+class EvalReduce(object):
+    def __reduce__(self):
+        return (eval, ("print('unpickled')",))
+
+
+def test_definition_unpickler_1(create_name):
+    """
+    Stored definitions can't call functions outside of an allowlist.
+    """
+    obj = objects.TestClassC(
+        [1.5, b'a', None],
+        B=(np.float32(2.5), collections.OrderedDict(a=1)))
+    assert obj.save_self(create_name)
+    obj_def = load_definition(create_name)
+    assert obj_def.args[0] == [1.5, b'a', None]
+    assert obj_def.kwargs['B'] == (np.float32(2.5), {'a': 1})
+
+    with pytest.raises(pickle.UnpicklingError):
+        _loads(dill.dumps(EvalReduce(), protocol=4))
+    with pytest.raises(pickle.UnpicklingError):
+        _loads(dill.dumps(types.FunctionType, protocol=4))
+    assert _loads(dill.dumps(objects.HelloObject, protocol=4)) == \
+        ClassRef('objects', 'HelloObject')
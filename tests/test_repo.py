@@ -663,3 +663,352 @@ def test_object_save_restore_with_repo_3(create_temp_dir):
     repo.load_objects_from_directory()
 
     repo.get(model_def, sel_kwargs={'verbosity': 2})
+
+
+@pytest.mark.usefixtures("create_temp_dir")
+def test_blob_store_repo_1(create_temp_dir):
+    """
+    Shared contained objects should only be stored once.
+    """
+    shared_obj = objects.TestClassC2(10)
+    shared_obj.set_val(20)
+
+    objs = []
+    for i in range(3):
+        objs.append(objects.TestClassC(shared_obj, B=objects.TestNest(i)))
+
+    repo = dryml.Repo(directory=create_temp_dir, use_blob_store=True)
+    for obj in objs:
+        repo.add_object(obj)
+    repo.save()
+
+    blob_dir = os.path.join(create_temp_dir, 'blobs')
+    blobs = []
+    for _, _, files in os.walk(blob_dir):
+        blobs += files
+    # One blob for the shared object, one for each TestNest, and one for
+    # each class.
+    assert len(blobs) == 7
+
+    # Saved files only reference contained objects.
+    with dryml.ObjectFile(
+            os.path.join(create_temp_dir, f"{objs[0].dry_id}.dry")) as f:
+        assert f"dry_objects/{shared_obj.dry_id}.ref" in \
+            f.z_file.namelist()
+        assert shared_obj.dry_id in f.contained_object_ids()
+        assert 'cls_def.ref' in f.z_file.namelist()
+
+    repo2 = dryml.Repo(directory=create_temp_dir)
+    assert len(repo2) == 7
+    for obj in objs:
+        new_obj = repo2.get(obj.definition())
+        assert new_obj.definition() == obj.definition()
+        assert new_obj.A.data == 20
+
+
+def test_repo_index_1(create_temp_dir, count_calls):
+    """
+    Definitions of unchanged files should come from the index.
+    """
+    import dryml.repo_index
+
+    objs = [objects.HelloStr(msg=f"test {i}") for i in range(3)]
+
+    repo = dryml.Repo(directory=create_temp_dir, use_index=True)
+    for obj in objs:
+        repo.add_object(obj)
+    repo.save()
+
+    index_path = os.path.join(
+        create_temp_dir, dryml.repo_index.RepoIndex.index_filename)
+    assert os.path.exists(index_path)
+    assert len(repo.index) == 3
+
+    # Count how often files are actually parsed.
+    reads = count_calls(dryml.ObjectFile, 'definition')
+    repo2 = dryml.Repo(directory=create_temp_dir, use_index=True)
+    assert len(repo2) == 3
+    sel = dryml.Selector(cls=objects.HelloStr, kwargs={'msg': 'test 1'})
+    assert repo2.get(sel, load_objects=False, open_container=False) \
+        .definition().dry_id == objs[1].dry_id
+    assert reads.num_calls == 0
+
+    # Changing a file should only cause that file to be read.
+    os.remove(os.path.join(create_temp_dir, f"{objs[0].dry_id}.dry"))
+    objects.HelloStr(msg='test 3').save_self(
+        os.path.join(create_temp_dir, 'new_obj.dry'))
+    repo3 = dryml.Repo(directory=create_temp_dir, use_index=True)
+    assert len(repo3) == 3
+    assert reads.num_calls == 1
+    assert len(repo3.index) == 3
+
+
+def test_repo_index_2(create_temp_dir, count_calls):
+    """
+    Files should be found by class and category through the index, and
+    files of other classes skipped without restoring their definitions.
+    """
+    strs = [objects.HelloStr(msg=f"test {i}") for i in range(3)]
+    ints = [objects.HelloInt(msg=i) for i in range(2)]
+
+    repo = dryml.Repo(directory=create_temp_dir, use_index=True)
+    for obj in strs+ints:
+        repo.add_object(obj)
+    repo.save()
+
+    int_str = dryml.utils.get_class_str(objects.HelloInt)
+    assert sorted(repo.index.filenames(cls_str=int_str)) == \
+        sorted(f"{obj.dry_id}.dry" for obj in ints)
+    cat_id = strs[0].definition().get_cat_def().get_category_id()
+    assert repo.index.filenames(cat_id=cat_id) == [f"{strs[0].dry_id}.dry"]
+    assert repo.index.category_id(f"{strs[0].dry_id}.dry") == cat_id
+
+    loads = count_calls(dryml.repo_index.pickle, 'loads')
+    repo2 = dryml.Repo(
+        directory=create_temp_dir, use_index=True, load_objects=False)
+    repo2.load_objects_from_directory(
+        selector=dryml.Selector(cls=int_str))
+    assert len(repo2) == 2
+    assert loads.num_calls == 2
+    for obj in ints:
+        assert obj in repo2
+
+    # Skipped files keep their entries
+    assert len(repo2.index) == 5
+
+
+def test_container_def_cache_1(create_temp_dir, count_calls):
+    """
+    Unloaded containers should only read their file when it changes.
+    """
+    obj = objects.HelloStr(msg='test')
+    obj_cont = dryml.repo.RepoContainer.from_object(
+        obj, directory=create_temp_dir)
+    obj_cont.save()
+    obj_cont.unload()
+
+    reads = count_calls(dryml.ObjectFile, 'definition')
+    # Saving primed the cache
+    for i in range(3):
+        assert obj_cont.definition() == obj.definition()
+        assert obj_cont.dry_id == obj.dry_id
+        assert obj_cont.category_id == \
+            obj.definition().get_cat_def().get_category_id()
+    assert reads.num_calls == 0
+
+    # Replacing the file invalidates the cache
+    obj2 = objects.HelloStr(msg='test2')
+    os.remove(obj_cont.filepath)
+    obj2.save_self(obj_cont.filepath)
+    assert obj_cont.definition() == obj2.definition()
+    assert obj_cont.definition() == obj2.definition()
+    assert obj_cont.dry_id == obj2.dry_id
+    assert reads.num_calls == 1
+
+
+@pytest.mark.parametrize("executor", ['thread', 'process'])
+def test_parallel_repo_load_1(create_temp_dir, capsys, executor):
+    """
+    Scanning and loading with several workers should match a serial
+    load, and malformed files should be reported in a stable order.
+    """
+    objs = [objects.HelloStr(msg=f"test {i}") for i in range(6)]
+    for obj in objs:
+        obj.save_self(os.path.join(create_temp_dir, f"{obj.dry_id}.dry"))
+
+    for name in ['bad_b.dry', 'bad_a.dry', '.bad_c.dry.0123abcd.tmp']:
+        with open(os.path.join(create_temp_dir, name), 'wb') as f:
+            f.write(b'not a dry file')
+
+    capsys.readouterr()
+    repo = dryml.Repo(directory=create_temp_dir, num_workers=4)
+    repo.load_objects_from_directory(num_workers=3, executor=executor)
+    out = capsys.readouterr().out
+    assert len(repo) == 6
+    assert out.index('bad_a.dry') < out.index('bad_b.dry')
+    # The error reading the file is reported
+    assert 'not a zip file' in out
+    # Leftovers of interrupted saves aren't
+    assert 'bad_c' not in out
+
+    loaded = repo.get(num_workers=3)
+    assert len(loaded) == 6
+    assert all(cont.is_loaded() for cont in repo.obj_dict.values())
+    assert set(o.dry_id for o in loaded) == set(o.dry_id for o in objs)
+    for obj in objs:
+        assert repo.get(obj.dry_id).definition() == obj.definition()
+
+    with pytest.raises(ValueError):
+        repo.load_objects_from_directory(num_workers=0)
+
+
+def test_repo_save_cache_1(create_temp_dir, monkeypatch):
+    """
+    A save should serialize each object once, even when it's shared.
+    """
+    num_saves = [0]
+    orig_save_object_imp = objects.TestClassC2.save_object_imp
+
+    def counting_save_object_imp(self, file):
+        num_saves[0] += 1
+        return orig_save_object_imp(self, file)
+
+    monkeypatch.setattr(
+        objects.TestClassC2, 'save_object_imp', counting_save_object_imp)
+
+    inner_objs = [objects.TestClassC2(i) for i in range(3)]
+    objs = [objects.TestClassC(inner) for inner in inner_objs]
+    # An object shared by two others
+    objs.append(objects.TestClassC(inner_objs[0]))
+
+    repo = dryml.Repo(directory=create_temp_dir)
+    for obj in objs:
+        repo.add_object(obj)
+    repo.save()
+    assert num_saves[0] == 3
+
+    inner_objs[1].set_val([1])
+    repo.save()
+
+    repo2 = dryml.Repo(directory=create_temp_dir)
+    assert repo2.get(objs[1].dry_id).A.data == [1]
+    assert repo2.get(inner_objs[1].dry_id).data == [1]
+    assert repo2.get(objs[0].dry_id).A.data == 0
+
+
+def test_repo_skip_unchanged_1(create_temp_dir):
+    """
+    Repos skipping unchanged objects shouldn't rewrite files of objects
+    which weren't marked modified since they were loaded or saved.
+    """
+    inner_objs = [objects.TestClassC2(i) for i in range(3)]
+    objs = [objects.TestClassC(inner) for inner in inner_objs]
+
+    repo = dryml.Repo(directory=create_temp_dir)
+    for obj in objs:
+        repo.add_object(obj)
+    repo.save()
+
+    def file_inodes():
+        # Inodes of replaced files may be reused, so check mtimes too
+        stats = {
+            filename: os.stat(os.path.join(create_temp_dir, filename))
+            for filename in os.listdir(create_temp_dir)
+            if filename.endswith('.dry')}
+        return {
+            filename: (st.st_ino, st.st_mtime_ns)
+            for filename, st in stats.items()}
+
+    # Objects loaded from disk aren't written back
+    repo2 = dryml.Repo(directory=create_temp_dir, skip_unchanged=True)
+    repo2.get()
+    inodes = file_inodes()
+    repo2.save()
+    assert file_inodes() == inodes
+
+    # Objects holding a modified object are written
+    inner_obj = repo2.get(objs[1].dry_id).A
+    inner_obj.set_val(42)
+    inner_obj.mark_modified()
+    repo2.save()
+    new_inodes = file_inodes()
+    changed = {
+        filename for filename in inodes
+        if inodes[filename] != new_inodes[filename]}
+    assert changed == {f"{objs[1].dry_id}.dry"}
+
+    # Forced saves write everything
+    inodes = file_inodes()
+    repo2.save(force=True)
+    new_inodes = file_inodes()
+    assert all(inodes[filename] != new_inodes[filename]
+               for filename in inodes)
+
+    repo3 = dryml.Repo(directory=create_temp_dir)
+    assert repo3.get(objs[1].dry_id).A.data == 42
+
+
+def test_repo_skip_unchanged_2(create_temp_dir):
+    """
+    By default, repos should save objects changed in place.
+    """
+    obj = objects.TestClassC2(1)
+    obj.set_val([1])
+
+    repo = dryml.Repo(directory=create_temp_dir)
+    repo.add_object(obj)
+    repo.save()
+    obj.data.append(2)
+    repo.save()
+
+    repo2 = dryml.Repo(directory=create_temp_dir)
+    assert repo2.get(obj.dry_id).data == [1, 2]
+
+
+def test_repo_update_incremental_1(create_temp_dir):
+    """
+    Incremental updates only append deltas to the object's file.
+    """
+    from dryml.checkpoint import list_deltas
+
+    inner_obj = objects.TestClassC2(0)
+    obj = objects.TestClassC(inner_obj)
+
+    repo = dryml.Repo(directory=create_temp_dir)
+    repo.update(obj, incremental=True)
+    filepath = os.path.join(create_temp_dir, f"{obj.dry_id}.dry")
+    base_ino = os.stat(filepath).st_ino
+
+    for i in range(1, 4):
+        inner_obj.set_val(i)
+        repo.update(obj, incremental=True)
+    assert os.stat(filepath).st_ino == base_ino
+    assert len(list_deltas(filepath)) == 3
+
+    repo2 = dryml.Repo(directory=create_temp_dir)
+    assert len(repo2) == 1
+    assert repo2.get(obj.dry_id).A.data == 3
+
+    # A full save replaces the deltas
+    inner_obj.set_val(4)
+    repo.update(obj)
+    assert len(list_deltas(filepath)) == 0
+    assert dryml.load_object(filepath).A.data == 4
+
+
+def test_repo_save_background_1(create_temp_dir):
+    """
+    Background repo saves write the compute data captured when the save
+    started.
+    """
+    import threading
+    import dryml.background_save
+
+    obj = objects.TestClassE()
+    repo = dryml.Repo(directory=create_temp_dir)
+    repo.add_object(obj)
+
+    release = threading.Event()
+    dryml.background_save.background_saver.submit(release.wait)
+
+    with dryml.context.ContextManager({'default': {}}):
+        obj.compute_activate()
+        obj.set_val(1)
+        future = repo.save(background=True)
+        obj.set_val(2)
+        assert not future.done()
+        release.set()
+        repo.flush()
+        assert future.done()
+
+        repo2 = dryml.Repo(directory=create_temp_dir)
+        new_obj = repo2.get(obj.dry_id)
+        new_obj.compute_activate()
+        assert new_obj.data == 1
+
+        # Regular saves capture the current data
+        repo.save()
+        new_obj = dryml.load_object(
+            os.path.join(create_temp_dir, f"{obj.dry_id}.dry"))
+        new_obj.compute_activate()
+        assert new_obj.data == 2